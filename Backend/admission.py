@@ -0,0 +1,138 @@
+# --------------------------------------------------
+# File: ~/RAG_Chatbot/Backend/admission.py
+# Description:
+# - 요청 종류별 admission control (우선순위 lane)
+#   · lookup    : 세션 가맹점 컨텍스트 / 가맹점 조회 (ms 단위)
+#   · retrieval : 질의 임베딩 + 응답 캐시 + FAISS 검색
+#   · llm       : Ollama 답변 생성
+# - lane 마다 동시 실행 수 / 대기열 길이 / 대기 시간 상한
+#   → 대기열이 가득 차거나 대기 시간 초과 시 즉시 Overloaded (HTTP 429 + Retry-After)
+#   → LLM 포화가 lookup 응답 시간으로 번지지 않음
+# - 설정: RAG_LANE_<LANE>_CONCURRENCY / _QUEUE / _TIMEOUT_MS (예: RAG_LANE_LLM_CONCURRENCY=2)
+# - 지표: rag_lane_queue_wait_seconds, rag_lane_rejected_total, rag_lane_active, rag_lane_waiting
+#
+# 사용 예:
+#   with lane("llm").slot():
+#       res = llm.generate([prompt])
+# --------------------------------------------------
+
+from contextlib import contextmanager
+from typing import Dict, Any
+import os
+import threading
+import time
+
+from tracing import observe, inc, describe, register_collector
+
+
+LOOKUP, RETRIEVAL, LLM = "lookup", "retrieval", "llm"
+
+# lane 기본값: (동시 실행 수, 대기열 길이, 대기 시간 상한 ms)
+# ⚠ retrieval / llm 의 (동시 실행 + 대기열) 합은 서버 threadpool 보다 작게 유지 (main.py)
+LANE_DEFAULTS = {
+    LOOKUP: (16, 64, 1000),
+    RETRIEVAL: (4, 16, 5000),
+    LLM: (2, 8, 30000),
+}
+
+RETRY_AFTER = os.environ.get("RAG_OVERLOAD_RETRY_AFTER", "1")
+
+
+class Overloaded(RuntimeError):
+    """lane 대기열 포화 / 대기 시간 초과 (HTTP 429 + Retry-After)"""
+
+    def __init__(self, lane: str, reason: str):
+        super().__init__(f"{lane} lane overloaded ({reason})")
+        self.lane = lane
+        self.reason = reason
+
+
+class Lane:
+    def __init__(self, name: str, concurrency: int, queue_max: int, timeout_ms: float):
+        self.name = name
+        self.concurrency = max(1, concurrency)
+        self.queue_max = max(0, queue_max)
+        self.timeout = timeout_ms / 1000
+        self.active = 0
+        self.waiting = 0
+        self._cond = threading.Condition()
+
+    @property
+    def capacity(self) -> int:
+        """동시에 붙잡을 수 있는 요청 스레드 수 (실행 + 대기)"""
+        return self.concurrency + self.queue_max
+
+    def _reject(self, reason: str):
+        inc("rag_lane_rejected_total", {"lane": self.name, "reason": reason})
+        raise Overloaded(self.name, reason)
+
+    @contextmanager
+    def slot(self, bounded: bool = True):
+        """
+        실행 슬롯 1개 점유
+        - bounded=False: 대기열 / 시간 상한 없이 대기 (일괄 처리 내부 worker 처럼 이미 수가 제한된 호출)
+        """
+        t0 = time.perf_counter()
+        with self._cond:
+            if self.active >= self.concurrency:
+                if bounded and self.waiting >= self.queue_max:
+                    self._reject("queue_full")
+                self.waiting += 1
+                try:
+                    deadline = t0 + self.timeout
+                    while self.active >= self.concurrency:
+                        remaining = deadline - time.perf_counter() if bounded else None
+                        if remaining is not None and remaining <= 0:
+                            self._reject("timeout")
+                        self._cond.wait(remaining)
+                finally:
+                    self.waiting -= 1
+            self.active += 1
+
+        observe("rag_lane_queue_wait_seconds", time.perf_counter() - t0, {"lane": self.name})
+        try:
+            yield
+        finally:
+            with self._cond:
+                self.active -= 1
+                self._cond.notify()
+
+
+def _from_env(name: str) -> Lane:
+    concurrency, queue_max, timeout_ms = LANE_DEFAULTS[name]
+    prefix = f"RAG_LANE_{name.upper()}_"
+    return Lane(
+        name,
+        int(os.environ.get(prefix + "CONCURRENCY", concurrency)),
+        int(os.environ.get(prefix + "QUEUE", queue_max)),
+        float(os.environ.get(prefix + "TIMEOUT_MS", timeout_ms)),
+    )
+
+
+_lanes: Dict[str, Lane] = {name: _from_env(name) for name in LANE_DEFAULTS}
+
+
+def lane(name: str) -> Lane:
+    return _lanes[name]
+
+
+def report() -> Dict[str, Any]:
+    return {
+        name: {"active": l.active, "waiting": l.waiting, "concurrency": l.concurrency, "queue_max": l.queue_max}
+        for name, l in _lanes.items()
+    }
+
+
+def _lane_collector():
+    out = []
+    for name, l in _lanes.items():
+        out.append(("rag_lane_active", "gauge", {"lane": name}, l.active))
+        out.append(("rag_lane_waiting", "gauge", {"lane": name}, l.waiting))
+    return out
+
+
+describe("rag_lane_queue_wait_seconds", "histogram", "Time a request waited for an admission lane slot")
+describe("rag_lane_rejected_total", "counter", "Requests rejected by admission control (HTTP 429)")
+describe("rag_lane_active", "gauge", "Requests running in each admission lane")
+describe("rag_lane_waiting", "gauge", "Requests queued for each admission lane")
+register_collector(_lane_collector)
@@ -0,0 +1,4 @@
+# --------------------------------------------------
+# File: ~/RAG_Chatbot/Backend/bench/__init__.py
+# Description: 성능 벤치마크 모음 (Backend 디렉터리에서 python -m bench.<모듈> 로 실행)
+# --------------------------------------------------
@@ -0,0 +1,150 @@
+# --------------------------------------------------
+# File: ~/RAG_Chatbot/Backend/bench/embedder_compare.py
+# Description:
+# - 임베딩 backend 별 처리량 / 정확도 비교 리포트
+#   · 처리량: batch size 별 문서 encode texts/s, 단건 질의 encode p50 / p95
+#   · 정확도: 기준 backend 대비 같은 문장 벡터 cosine, 질의 top-k 검색 결과 겹침
+# - 문서는 faiss_db/metadata.json 의 chunk 에서 표본 추출 (실제 적재 텍스트 그대로)
+#
+# 사용 예 (Backend 디렉터리에서):
+#   python -m bench.embedder_compare --backends sentence_transformers,onnx_int8
+#   python -m bench.embedder_compare --backends sentence_transformers,onnx_int8 --threads 4 --batch-sizes 8,16,32
+# --------------------------------------------------
+
+from typing import Dict, Any, List
+import argparse
+import json
+import os
+import random
+import time
+
+import numpy as np
+
+from bench.load_test import LAW_QUESTIONS, ONNURI_QUESTIONS, MENU_QUESTIONS
+from embedders import create_embedder
+from vector_store import MODEL_NAME, extract_text_for_embedding
+
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPO_DIR = os.path.dirname(BACKEND_DIR)
+RESULTS_DIR = os.path.join(BACKEND_DIR, "bench", "results")
+DEFAULT_METADATA = os.path.join(REPO_DIR, "faiss_db", "metadata.json")
+
+
+# ===============================
+# 입력
+# ===============================
+def load_corpus(path: str, limit: int, seed: int) -> List[str]:
+    with open(path, encoding="utf-8") as f:
+        chunks = json.load(f)
+    texts = [extract_text_for_embedding(c) for c in chunks]
+    texts = [t for t in texts if t and t.strip()]
+    random.Random(seed).shuffle(texts)
+    return texts[:limit]
+
+
+def _normalize(vecs: np.ndarray) -> np.ndarray:
+    return (vecs / np.linalg.norm(vecs, axis=1, keepdims=True)).astype("float32")
+
+
+# ===============================
+# 측정
+# ===============================
+def measure_backend(name: str, corpus: List[str], queries: List[str], batch_sizes: List[int], threads: int) -> Dict[str, Any]:
+    t0 = time.perf_counter()
+    embedder = create_embedder(MODEL_NAME, backend=name, threads=threads)
+    load_s = time.perf_counter() - t0
+
+    throughput = {}
+    vectors = None
+    for bs in batch_sizes:
+        embedder.batch_size = bs
+        t0 = time.perf_counter()
+        vectors = embedder.encode(corpus)
+        dt = time.perf_counter() - t0
+        throughput[bs] = round(len(corpus) / dt, 1) if dt else 0.0
+
+    latencies = []
+    q_vecs = []
+    for q in queries:
+        t0 = time.perf_counter()
+        q_vecs.append(embedder.encode([q])[0])
+        latencies.append((time.perf_counter() - t0) * 1000)
+
+    return {
+        "describe": embedder.describe(),
+        "load_s": round(load_s, 2),
+        "texts_per_s": throughput,
+        "query_p50_ms": round(float(np.percentile(latencies, 50)), 2),
+        "query_p95_ms": round(float(np.percentile(latencies, 95)), 2),
+        "_doc": _normalize(vectors),
+        "_query": _normalize(np.stack(q_vecs)),
+    }
+
+
+def agreement(ref: Dict[str, Any], other: Dict[str, Any], top_k: int) -> Dict[str, Any]:
+    """기준 대비 정확도: 같은 문장 cosine (차원 같을 때) + 질의 top-k 겹침"""
+    out: Dict[str, Any] = {}
+
+    if ref["_doc"].shape[1] == other["_doc"].shape[1]:
+        cos = np.sum(ref["_doc"] * other["_doc"], axis=1)
+        out["doc_cosine_mean"] = round(float(cos.mean()), 4)
+        out["doc_cosine_min"] = round(float(cos.min()), 4)
+
+    k = min(top_k, ref["_doc"].shape[0])
+    ref_top = np.argsort(-(ref["_query"] @ ref["_doc"].T), axis=1)[:, :k]
+    oth_top = np.argsort(-(other["_query"] @ other["_doc"].T), axis=1)[:, :k]
+
+    overlap = [len(set(a) & set(b)) / k for a, b in zip(ref_top, oth_top)]
+    out[f"top{k}_overlap"] = round(float(np.mean(overlap)), 4)
+    out["top1_agreement"] = round(float(np.mean(ref_top[:, 0] == oth_top[:, 0])), 4)
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="임베딩 backend 처리량 / 정확도 비교")
+    parser.add_argument("--backends", default="sentence_transformers,onnx_int8", help="비교할 backend (쉼표 구분, 첫 번째가 기준)")
+    parser.add_argument("--metadata", default=DEFAULT_METADATA, help="문서 표본을 뽑을 metadata.json")
+    parser.add_argument("--corpus", type=int, default=500, help="문서 표본 수")
+    parser.add_argument("--batch-sizes", default="1,8,16,32")
+    parser.add_argument("--threads", type=int, default=None, help="backend 연산 스레드 수")
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", help="결과 JSON 경로 (기본: bench/results/embedders_<시각>.json)")
+    args = parser.parse_args()
+
+    backends = [b.strip() for b in args.backends.split(",") if b.strip()]
+    batch_sizes = [int(x) for x in args.batch_sizes.split(",") if x.strip()]
+    corpus = load_corpus(args.metadata, args.corpus, args.seed)
+    queries = LAW_QUESTIONS + ONNURI_QUESTIONS + MENU_QUESTIONS
+
+    results = {}
+    for name in backends:
+        print(f"🔵 measuring {name} ({len(corpus)} texts, {len(queries)} queries) ...")
+        results[name] = measure_backend(name, corpus, queries, batch_sizes, args.threads)
+
+    ref_name = backends[0]
+    report: Dict[str, Any] = {
+        "meta": {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "reference": ref_name, "args": vars(args)},
+        "backends": {},
+    }
+
+    print(f"\n{'backend':<24} {'load s':>7} " + " ".join(f"{'bs=' + str(b):>9}" for b in batch_sizes) + f" {'q p50':>8} {'q p95':>8}  accuracy vs {ref_name}")
+    for name in backends:
+        r = results[name]
+        acc = agreement(results[ref_name], r, args.top_k) if name != ref_name else {}
+        report["backends"][name] = {k: v for k, v in r.items() if not k.startswith("_")}
+        report["backends"][name]["accuracy"] = acc
+        tp = " ".join(f"{r['texts_per_s'][b]:>9}" for b in batch_sizes)
+        acc_s = ", ".join(f"{k}={v}" for k, v in acc.items()) or "(reference)"
+        print(f"{name:<24} {r['load_s']:>7} {tp} {r['query_p50_ms']:>8} {r['query_p95_ms']:>8}  {acc_s}")
+
+    out = args.out or os.path.join(RESULTS_DIR, f"embedders_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n🟢 결과 저장: {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+# --------------------------------------------------
+# File: ~/RAG_Chatbot/Backend/bench/index_bench.py
+# Description:
+# - 인덱스 압축 모드별 (flat / sq8 / pq / pca+sq8 / pca+pq) 메모리 · recall · 지연 비교
+# - recall@k 는 flat 정확 검색 결과 대비, 재채점(re-rank) 전 / 후 모두 측정
+# - 벡터: 합성 군집 데이터 (기본) 또는 실제 float store (faiss_db/vectors.f32)
+#
+# 사용 예 (Backend 디렉터리에서):
+#   python -m bench.index_bench --n 100000
+#   python -m bench.index_bench --vectors ~/RAG_Chatbot/faiss_db/vectors.f32 --modes flat,sq8,pq
+# --------------------------------------------------
+
+from typing import Dict, Any, Tuple
+import argparse
+import json
+import os
+import time
+
+import faiss
+import numpy as np
+
+from vector_store import build_index, build_index_spec
+
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(BACKEND_DIR, "bench", "results")
+
+DEFAULT_MODES = "flat,sq8,pq,pca+sq8,pca+pq"
+
+
+# ===============================
+# 데이터
+# ===============================
+def _normalize(x: np.ndarray) -> np.ndarray:
+    return (x / np.linalg.norm(x, axis=1, keepdims=True)).astype("float32")
+
+
+def synth_vectors(n: int, nq: int, dim: int, clusters: int, seed: int) -> Tuple[np.ndarray, np.ndarray]:
+    """군집 구조가 있는 정규화 벡터 (실제 문서 임베딩처럼 주제별로 뭉침)"""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype("float32")
+
+    def draw(m: int) -> np.ndarray:
+        labels = rng.integers(0, clusters, m)
+        return _normalize(centers[labels] + 0.6 * rng.standard_normal((m, dim)).astype("float32"))
+
+    return draw(n), draw(nq)
+
+
+def load_vectors(path: str, dim: int, nq: int, seed: int) -> Tuple[np.ndarray, np.ndarray]:
+    """float store 에서 읽고, 질의는 기존 벡터에 잡음을 섞어 생성"""
+    data = np.fromfile(os.path.expanduser(path), dtype="float32").reshape(-1, dim)
+    rng = np.random.default_rng(seed)
+    picks = data[rng.choice(len(data), nq, replace=False)]
+    queries = _normalize(picks + 0.05 * rng.standard_normal(picks.shape).astype("float32"))
+    return data, queries
+
+
+# ===============================
+# 측정
+# ===============================
+def recall(found: np.ndarray, truth: np.ndarray) -> float:
+    k = truth.shape[1]
+    return float(np.mean([len(set(f[:k]) & set(t)) / k for f, t in zip(found, truth)]))
+
+
+def measure(mode: str, data: np.ndarray, queries: np.ndarray, truth: np.ndarray, k: int, rerank_factor: int, pca_dim: int) -> Dict[str, Any]:
+    spec = build_index_spec(mode, data.shape[1], pca_dim=pca_dim)
+
+    t0 = time.perf_counter()
+    index = build_index(data, spec)
+    build_s = time.perf_counter() - t0
+
+    code_size = index.sa_code_size()
+
+    t0 = time.perf_counter()
+    _, raw = index.search(queries, k)
+    raw_ms = (time.perf_counter() - t0) * 1000 / len(queries)
+
+    # 재채점: 후보 k × factor 를 원본 float32 로 다시 계산
+    t0 = time.perf_counter()
+    _, cand = index.search(queries, k * rerank_factor)
+    reranked = np.empty((len(queries), k), dtype="int64")
+    for i, ids in enumerate(cand):
+        ids = ids[ids >= 0]
+        exact = data[ids] @ queries[i]
+        reranked[i] = ids[np.argsort(-exact)[:k]]
+    rerank_ms = (time.perf_counter() - t0) * 1000 / len(queries)
+
+    return {
+        "mode": mode,
+        "spec": spec,
+        "build_s": round(build_s, 2),
+        "bytes_per_vector": code_size,
+        "index_mb": round(index.ntotal * code_size / 2**20, 1),
+        "compression": round(data.shape[1] * 4 / code_size, 1),
+        f"recall@{k}": round(recall(raw, truth), 4),
+        f"recall@{k}_rerank": round(recall(reranked, truth), 4),
+        "search_ms": round(raw_ms, 3),
+        "search_rerank_ms": round(rerank_ms, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="인덱스 압축 모드별 메모리 / recall 비교")
+    parser.add_argument("--modes", default=DEFAULT_MODES, help="비교할 모드 (쉼표 구분)")
+    parser.add_argument("--vectors", help="float store 경로 (없으면 합성 데이터)")
+    parser.add_argument("--n", type=int, default=50000, help="합성 벡터 수")
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--rerank-factor", type=int, default=4)
+    parser.add_argument("--pca-dim", type=int, default=256)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", help="결과 JSON 경로 (기본: bench/results/index_<시각>.json)")
+    args = parser.parse_args()
+
+    if args.vectors:
+        data, queries = load_vectors(args.vectors, args.dim, args.queries, args.seed)
+    else:
+        data, queries = synth_vectors(args.n, args.queries, args.dim, args.clusters, args.seed)
+
+    exact = faiss.IndexFlatIP(data.shape[1])
+    exact.add(data)
+    _, truth = exact.search(queries, args.k)
+
+    print(f"🔵 {len(data)} vectors × {data.shape[1]} dim, {len(queries)} queries, k={args.k}")
+    print(f"{'mode':<10} {'spec':<16} {'B/vec':>6} {'MB':>8} {'x':>5} {'recall':>7} {'+rerank':>8} {'ms':>7} {'+rr ms':>7} {'build s':>8}")
+
+    rows = []
+    for mode in [m.strip() for m in args.modes.split(",") if m.strip()]:
+        r = measure(mode, data, queries, truth, args.k, args.rerank_factor, args.pca_dim)
+        rows.append(r)
+        print(
+            f"{r['mode']:<10} {r['spec']:<16} {r['bytes_per_vector']:>6} {r['index_mb']:>8} {r['compression']:>5} "
+            f"{r[f'recall@{args.k}']:>7} {r[f'recall@{args.k}_rerank']:>8} {r['search_ms']:>7} {r['search_rerank_ms']:>7} {r['build_s']:>8}"
+        )
+
+    report = {
+        "meta": {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "n": len(data), "dim": int(data.shape[1]), "args": vars(args)},
+        "modes": rows,
+    }
+    out = args.out or os.path.join(RESULTS_DIR, f"index_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n🟢 결과 저장: {out}")
+
+
+if __name__ == "__main__":
+    main()
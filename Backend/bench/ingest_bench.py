@@ -0,0 +1,236 @@
+# --------------------------------------------------
+# File: ~/RAG_Chatbot/Backend/bench/ingest_bench.py
+# Description:
+# - chunk 전략별 (law / category / page / column_record / regular) 적재 비용 측정
+# - 크기 N 을 키운 합성 문서로 parse / embed(stub) / index 단계를 각각 측정
+#   (column_record 는 임베딩 없이 merchant_table 구성이 index 단계)
+# - log-log 기울기(차수)로 scaling curve 요약 → 초선형(super-linear) 회귀 감지
+#
+# 사용 예 (Backend 디렉터리에서):
+#   python -m bench.ingest_bench --sizes 250,500,1000,2000,4000
+#   python -m bench.ingest_bench --strategies law --fail-on-superlinear
+# --------------------------------------------------
+
+from typing import Callable, Dict, Any, List, Tuple
+import argparse
+import json
+import os
+import sys
+import time
+
+import faiss
+import numpy as np
+
+from bench.stubs import StubEmbedder
+from file_handler import (
+    parse_law_pdf_text,
+    parse_category_structure,
+    chunk_page,
+    chunk_column_record,
+    chunk_regular,
+)
+from merchant_table import MerchantTable, is_table_row
+from vector_store import extract_text_for_embedding
+
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(BACKEND_DIR, "bench", "results")
+
+DEFAULT_SIZES = "250,500,1000,2000,4000"
+# 이 차수를 넘으면 초선형으로 판정 (측정 노이즈 여유 포함)
+SUPERLINEAR_EXPONENT = 1.3
+# 최대 크기 parse 시간이 이보다 짧으면 타이머 노이즈로 보고 판정 생략 (초)
+SUPERLINEAR_MIN_TIME = 0.005
+
+CSV_MAPPING = {
+    "가맹점코드": 0, "가맹점명": 1, "사업자등록번호": 2,
+    "지류취급여부": 3, "전자취급여부": 4, "모바일취급여부": 5, "한도금액": 6,
+}
+CLAUSES = "①②③④⑤⑥⑦⑧⑨⑩"
+
+
+# ===============================
+# 합성 문서 생성 (N = 단위 수)
+# ===============================
+def synth_law(n: int) -> str:
+    """N개 조문, 조문당 3개 항, 10조마다 장 / 5조마다 절"""
+    lines = []
+    for a in range(1, n + 1):
+        if a % 10 == 1:
+            lines.append(f"제{a // 10 + 1}장 총칙{a // 10 + 1}")
+        if a % 5 == 1:
+            lines.append(f"제{a // 5 + 1}절 통칙{a // 5 + 1}")
+        lines.append(f"제{a}조(조문{a}의 제목)")
+        for c in range(3):
+            lines.append(f"{CLAUSES[c]} 시장ㆍ군수ㆍ구청장은 제{a}조에 따른 사항을 정하여 고시하여야 한다. 항 번호 {c + 1}.")
+    return "\n".join(lines)
+
+
+def synth_category(n: int) -> str:
+    """N개 항목, 항목 5개마다 subtitle / 25개마다 title"""
+    lines = []
+    roman = ["i", "ii", "iii", "iv", "v"]
+    for i in range(n):
+        if i % 25 == 0:
+            lines += [f"{i // 25 + 1}.", f"업무분류{i // 25 + 1}"]
+        if i % 5 == 0:
+            lines += [f"{chr(65 + (i // 5) % 26)}.", f"세부메뉴{i // 5}"]
+        lines += [f"{roman[i % 5]}.", f"메뉴항목{i}", f"(https://example.local/menu/{i})"]
+    return "\n".join(lines)
+
+
+def synth_page(n: int) -> List[str]:
+    """N개 페이지, 페이지당 약 1,500자"""
+    body = "온누리상품권은 전통시장 및 상점가의 판매 촉진을 위해 발행하는 상품권입니다. " * 30
+    return [f"{p}. 안내 {body}" for p in range(n)]
+
+
+def synth_csv(n: int) -> str:
+    """N개 가맹점 행"""
+    return "\n".join(
+        f"{10000000000 + i},가맹점{i},{1000000000 + i},Y,{'Y' if i % 2 else 'N'},N,3100000"
+        for i in range(n)
+    )
+
+
+def synth_regular(n: int) -> str:
+    """N × 800자 일반 텍스트"""
+    unit = "일반 문서 본문 텍스트입니다. " * 50
+    return (unit * (n // 2 + 1))[: n * 800]
+
+
+STRATEGIES: Dict[str, Tuple[Callable[[int], Any], Callable[[Any], List[Dict]]]] = {
+    "law": (synth_law, parse_law_pdf_text),
+    "category": (synth_category, parse_category_structure),
+    "page": (synth_page, lambda pages: [c for p in pages for c in chunk_page(p)]),
+    "column_record": (synth_csv, lambda text: chunk_column_record(text, {"mapping": CSV_MAPPING})),
+    "regular": (synth_regular, lambda text: chunk_regular(text, {"chunk_size": 800, "overlap": 80})),
+}
+
+
+# ===============================
+# 측정
+# ===============================
+def _best_of(fn: Callable[[], Any], repeat: int) -> Tuple[float, Any]:
+    best, out = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def measure(strategy: str, n: int, embedder: StubEmbedder, repeat: int) -> Dict[str, Any]:
+    synth, parse = STRATEGIES[strategy]
+    doc = synth(n)
+
+    parse_s, chunks = _best_of(lambda: parse(doc), repeat)
+    if chunks and all(is_table_row(c) for c in chunks):
+        return _measure_table(n, doc, chunks, parse_s, repeat)
+    texts = [extract_text_for_embedding(c) for c in chunks]
+
+    def embed():
+        vecs = embedder.encode(texts)
+        vecs = vecs / np.linalg.norm(vecs, axis=1, keepdims=True)
+        return vecs.astype("float32")
+
+    embed_s, vectors = _best_of(embed, repeat)
+
+    def index():
+        idx = faiss.IndexFlatIP(vectors.shape[1])
+        idx.add(vectors)
+        return idx
+
+    index_s, _ = _best_of(index, repeat)
+
+    size_bytes = sum(len(t.encode("utf-8")) for t in (doc if isinstance(doc, list) else [doc]))
+    return {
+        "n": n,
+        "bytes": size_bytes,
+        "chunks": len(chunks),
+        "parse_s": round(parse_s, 6),
+        "embed_s": round(embed_s, 6),
+        "index_s": round(index_s, 6),
+        "parse_chunks_per_s": round(len(chunks) / parse_s, 1) if parse_s else 0.0,
+        "embed_chunks_per_s": round(len(chunks) / embed_s, 1) if embed_s else 0.0,
+        "index_chunks_per_s": round(len(chunks) / index_s, 1) if index_s else 0.0,
+    }
+
+
+def _measure_table(n: int, doc: str, chunks: List[Dict], parse_s: float, repeat: int) -> Dict[str, Any]:
+    """가맹점 CSV: 임베딩 없음 → index 단계 = 열 단위 테이블 구성"""
+    rows = [{**c, "file_name": "bench.csv"} for c in chunks]
+    index_s, table = _best_of(lambda: MerchantTable.from_rows(rows), repeat)
+    return {
+        "n": n,
+        "bytes": len(doc.encode("utf-8")),
+        "chunks": len(chunks),
+        "parse_s": round(parse_s, 6),
+        "embed_s": 0.0,
+        "index_s": round(index_s, 6),
+        "parse_chunks_per_s": round(len(chunks) / parse_s, 1) if parse_s else 0.0,
+        "embed_chunks_per_s": 0.0,
+        "index_chunks_per_s": round(len(chunks) / index_s, 1) if index_s else 0.0,
+        "table_bytes": table.nbytes,
+    }
+
+
+def scaling_exponent(points: List[Dict[str, Any]], key: str) -> float:
+    """log(time) ~ k·log(N) 최소제곱 기울기 k (1.0 = 선형)"""
+    xs = [p["n"] for p in points if p[key] > 0]
+    ys = [p[key] for p in points if p[key] > 0]
+    if len(xs) < 2:
+        return 0.0
+    k, _ = np.polyfit(np.log(xs), np.log(ys), 1)
+    return round(float(k), 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="chunk 전략별 적재 micro-benchmark")
+    parser.add_argument("--strategies", default=",".join(STRATEGIES), help="측정할 전략 (쉼표 구분)")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="문서 크기 N 목록 (쉼표 구분)")
+    parser.add_argument("--repeat", type=int, default=3, help="크기별 반복 (최솟값 사용)")
+    parser.add_argument("--dim", type=int, default=1024, help="stub 임베딩 차원")
+    parser.add_argument("--out", help="결과 JSON 경로 (기본: bench/results/ingest_<시각>.json)")
+    parser.add_argument("--fail-on-superlinear", action="store_true", help="parse 차수 초과 시 exit 1")
+    args = parser.parse_args()
+
+    sizes = [int(x) for x in args.sizes.split(",") if x.strip()]
+    embedder = StubEmbedder(dim=args.dim)
+
+    report: Dict[str, Any] = {
+        "meta": {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "args": vars(args)},
+        "strategies": {},
+    }
+    superlinear = []
+
+    for strategy in [s.strip() for s in args.strategies.split(",") if s.strip()]:
+        points = [measure(strategy, n, embedder, args.repeat) for n in sizes]
+        exponents = {k: scaling_exponent(points, k) for k in ["parse_s", "embed_s", "index_s"]}
+        report["strategies"][strategy] = {"points": points, "exponent": exponents}
+
+        print(f"\n[{strategy}]")
+        print(f"{'N':>7} {'chunks':>8} {'parse ms':>10} {'embed ms':>10} {'index ms':>10}")
+        for p in points:
+            print(f"{p['n']:>7} {p['chunks']:>8} {p['parse_s'] * 1000:>10.2f} {p['embed_s'] * 1000:>10.2f} {p['index_s'] * 1000:>10.2f}")
+        flag = ""
+        if exponents["parse_s"] > SUPERLINEAR_EXPONENT and points[-1]["parse_s"] >= SUPERLINEAR_MIN_TIME:
+            flag = "  ⚠ SUPER-LINEAR"
+        print(f"  차수: parse={exponents['parse_s']} embed={exponents['embed_s']} index={exponents['index_s']}{flag}")
+        if flag:
+            superlinear.append(strategy)
+
+    report["superlinear"] = superlinear
+
+    out = args.out or os.path.join(RESULTS_DIR, f"ingest_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n🟢 결과 저장: {out}")
+
+    if args.fail_on_superlinear and superlinear:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
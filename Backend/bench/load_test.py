@@ -0,0 +1,344 @@
+# --------------------------------------------------
+# File: ~/RAG_Chatbot/Backend/bench/load_test.py
+# Description:
+# - /rag_query end-to-end 부하 테스트 (stub embedder + stub Ollama)
+# - intent 혼합 질의 (가맹점 / 법령 / 온누리 / 메뉴) 를 동시성 단계별로 실행
+# - p50 / p95 / p99 지연, 처리량, 서버 RSS 를 JSON 으로 저장 → 버전 간 비교
+#
+# 사용 예 (Backend 디렉터리에서):
+#   python -m bench.load_test --levels 1,4,16 --requests 200
+#   python -m bench.load_test --compare bench/results/a.json bench/results/b.json
+# --------------------------------------------------
+
+from typing import List, Dict, Any, Tuple
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import csv
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import numpy as np
+
+from bench.stubs import StubOllamaServer
+
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPO_DIR = os.path.dirname(BACKEND_DIR)
+RESULTS_DIR = os.path.join(BACKEND_DIR, "bench", "results")
+MERCHANT_CSV = os.path.join(REPO_DIR, "input", "가맹점정보.csv")
+
+DEFAULT_MIX = "merchant=0.4,law=0.2,onnuri=0.2,menu=0.2,offtopic=0.05"
+
+LAW_QUESTIONS = [
+    "전통시장법 제1조 목적이 뭐야?",
+    "가맹점 등록 취소 사유 법령 기준",
+    "임시시장 개설 기준을 알려줘",
+    "시장정비사업 시행자 법령",
+    "전통시장법 시행령 상인조직 기준",
+    "시행규칙 임시시장 개설신고 서류",
+    "상점가 지정 요건 조항",
+    "온누리상품권 가맹점 등록 법적 기준",
+]
+
+ONNURI_QUESTIONS = [
+    "온누리상품권 사용처",
+    "온누리 상품권 어디서 써요",
+    "디지털 온누리 회원 가입 방법을 알려주세요.",
+    "온누리상품권 소득공제 조건",
+    "지류 상품권 환전 방법",
+    "디지털 상품권 구매 한도",
+]
+
+MENU_QUESTIONS = [
+    "시장관리 메뉴 어디서 찾아?",
+    "상인회관리 페이지 링크",
+    "지자체관리 화면 경로",
+    "구역관리 메뉴",
+    "소속확인관리 페이지 어디서",
+    "가맹점 신청 화면 경로",
+]
+
+# 인사 / 잡담 → 항상 NO_MATCH 여야 함 (아니면 offtopic_answered 로 집계)
+OFFTOPIC_QUESTIONS = [
+    "안녕하세요",
+    "오늘 날씨 어때",
+    "점심 뭐 먹지",
+    "고마워요",
+    "주말에 뭐해",
+]
+
+
+# ===============================
+# 워크로드
+# ===============================
+def load_merchant_questions(limit: int = 500) -> List[str]:
+    out = []
+    with open(MERCHANT_CSV, newline="", encoding="utf-8-sig") as f:
+        for i, row in enumerate(csv.DictReader(f)):
+            if i >= limit:
+                break
+            out.append(f"가맹점코드 {row['가맹점코드']}")
+            out.append(f"{row['가맹점명']} 가맹점 정보")
+    return out
+
+
+def build_workload(mix: str, total: int, seed: int) -> List[Tuple[str, str]]:
+    """[(kind, question), ...] — seed 고정 → run 간 동일 질의 순서"""
+    pools = {
+        "merchant": load_merchant_questions(),
+        "law": LAW_QUESTIONS,
+        "onnuri": ONNURI_QUESTIONS,
+        "menu": MENU_QUESTIONS,
+        "offtopic": OFFTOPIC_QUESTIONS,
+    }
+    weights = {}
+    for part in mix.split(","):
+        k, v = part.split("=")
+        weights[k.strip()] = float(v)
+
+    rng = random.Random(seed)
+    kinds = list(weights)
+    picks = rng.choices(kinds, weights=[weights[k] for k in kinds], k=total)
+    return [(k, rng.choice(pools[k])) for k in picks]
+
+
+# ===============================
+# 서버 / 측정 유틸
+# ===============================
+def _post(url: str, question: str, timeout: float) -> Dict[str, Any]:
+    req = urllib.request.Request(
+        url,
+        data=json.dumps({"question": question}).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+        method="POST"
+    )
+    with urllib.request.urlopen(req, timeout=timeout) as res:
+        return json.loads(res.read().decode("utf-8"))
+
+
+def wait_ready(base_url: str, proc, timeout: float = 600.0):
+    t0 = time.time()
+    while time.time() - t0 < timeout:
+        if proc.poll() is not None:
+            raise RuntimeError(f"benchmark server exited (code={proc.returncode})")
+        try:
+            with urllib.request.urlopen(f"{base_url}/ready", timeout=2) as res:
+                if res.status == 200:
+                    return time.time() - t0
+        except Exception:
+            time.sleep(0.5)
+    raise TimeoutError("benchmark server not ready")
+
+
+def rss_mb(pid: int) -> float:
+    try:
+        import psutil
+        return round(psutil.Process(pid).memory_info().rss / 2**20, 1)
+    except ImportError:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    return 0.0
+
+
+def _pct(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {"p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0, "mean_ms": 0.0}
+    arr = np.asarray(values)
+    return {
+        "p50_ms": round(float(np.percentile(arr, 50)), 2),
+        "p95_ms": round(float(np.percentile(arr, 95)), 2),
+        "p99_ms": round(float(np.percentile(arr, 99)), 2),
+        "mean_ms": round(float(arr.mean()), 2),
+    }
+
+
+def run_level(url: str, workload: List[Tuple[str, str]], concurrency: int, timeout: float, pid: int) -> Dict[str, Any]:
+    lock = threading.Lock()
+    cursor = iter(workload)
+    samples: List[Tuple[str, str, float, bool]] = []
+
+    def worker():
+        while True:
+            with lock:
+                item = next(cursor, None)
+            if item is None:
+                return
+            kind, question = item
+            t0 = time.perf_counter()
+            try:
+                res = _post(url, question, timeout)
+                ok = "error" not in res
+                rtype = res.get("type", "ERROR")
+            except urllib.error.HTTPError as e:
+                # 429 = admission control 거절 (오류와 구분해서 집계)
+                ok, rtype = False, "REJECTED" if e.code == 429 else "ERROR"
+            except Exception:
+                ok, rtype = False, "ERROR"
+            dt = (time.perf_counter() - t0) * 1000
+            with lock:
+                samples.append((kind, rtype, dt, ok))
+
+    rss_before = rss_mb(pid)
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for _ in range(concurrency):
+            pool.submit(worker)
+    wall = time.perf_counter() - t0
+
+    ok_lat = [s[2] for s in samples if s[3]]
+    by_kind = {}
+    for kind in sorted({s[0] for s in samples}):
+        lat = [s[2] for s in samples if s[0] == kind and s[3]]
+        by_kind[kind] = {"requests": len(lat), **_pct(lat)}
+
+    by_type: Dict[str, int] = {}
+    for s in samples:
+        by_type[s[1]] = by_type.get(s[1], 0) + 1
+
+    return {
+        "concurrency": concurrency,
+        "requests": len(samples),
+        "errors": sum(1 for s in samples if not s[3] and s[1] != "REJECTED"),
+        "rejected": sum(1 for s in samples if s[1] == "REJECTED"),
+        "wall_s": round(wall, 3),
+        "throughput_rps": round(len(samples) / wall, 2) if wall else 0.0,
+        **_pct(ok_lat),
+        "by_kind": by_kind,
+        "response_types": by_type,
+        "offtopic_answered": sum(1 for s in samples if s[0] == "offtopic" and s[3] and s[1] != "NO_MATCH"),
+        "rss_mb_before": rss_before,
+        "rss_mb_after": rss_mb(pid),
+    }
+
+
+def _git_rev() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, text=True).strip()
+    except Exception:
+        return "unknown"
+
+
+# ===============================
+# 실행 / 비교
+# ===============================
+def run(args) -> Dict[str, Any]:
+    levels = [int(x) for x in args.levels.split(",") if x.strip()]
+    sandbox = args.sandbox or tempfile.mkdtemp(prefix="rag_bench_")
+
+    ollama = StubOllamaServer(latency_ms=args.llm_latency_ms, token_ms=args.token_ms, tokens=args.tokens).start()
+    cmd = [
+        sys.executable, "-m", "bench.server",
+        "--sandbox", sandbox,
+        "--port", str(args.port),
+        "--ollama-url", ollama.url,
+        "--embed-ms", str(args.embed_ms),
+        "--embed-call-ms", str(args.embed_call_ms),
+    ]
+    if args.no_answer_cache:
+        cmd.append("--no-answer-cache")
+
+    proc = subprocess.Popen(cmd, cwd=BACKEND_DIR)
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        startup_s = wait_ready(base_url, proc)
+        print(f"🟢 benchmark server ready ({startup_s:.1f}s, sandbox={sandbox})")
+
+        url = f"{base_url}/rag_query"
+        # 예열 (import / 첫 요청 비용 제외)
+        for _, q in build_workload(args.mix, 20, args.seed + 1):
+            _post(url, q, args.timeout)
+
+        results = []
+        for level in levels:
+            workload = build_workload(args.mix, args.requests, args.seed)
+            r = run_level(url, workload, level, args.timeout, proc.pid)
+            results.append(r)
+            print(
+                f"c={level:<3} rps={r['throughput_rps']:<8} p50={r['p50_ms']:<8} "
+                f"p95={r['p95_ms']:<8} p99={r['p99_ms']:<8} err={r['errors']} 429={r.get('rejected', 0)} offtopic={r['offtopic_answered']} rss={r['rss_mb_after']}MB"
+            )
+
+        return {
+            "meta": {
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "git_rev": _git_rev(),
+                "startup_s": round(startup_s, 2),
+                "llm_requests": ollama.requests,
+                "args": vars(args),
+            },
+            "levels": results,
+        }
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+        ollama.stop()
+
+
+def compare(path_a: str, path_b: str):
+    with open(path_a, encoding="utf-8") as f:
+        a = json.load(f)
+    with open(path_b, encoding="utf-8") as f:
+        b = json.load(f)
+
+    print(f"A: {path_a} ({a['meta'].get('git_rev')})")
+    print(f"B: {path_b} ({b['meta'].get('git_rev')})")
+    print(f"{'c':>4} {'metric':<16} {'A':>10} {'B':>10} {'Δ%':>8}")
+
+    base = {r["concurrency"]: r for r in a["levels"]}
+    for rb in b["levels"]:
+        ra = base.get(rb["concurrency"])
+        if not ra:
+            continue
+        for key in ["throughput_rps", "p50_ms", "p95_ms", "p99_ms", "rss_mb_after"]:
+            va, vb = ra.get(key, 0.0), rb.get(key, 0.0)
+            delta = ((vb - va) / va * 100) if va else 0.0
+            print(f"{rb['concurrency']:>4} {key:<16} {va:>10} {vb:>10} {delta:>+7.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="/rag_query 부하 테스트 (stub embedder / stub Ollama)")
+    parser.add_argument("--levels", default="1,2,4,8,16", help="동시성 단계 (쉼표 구분)")
+    parser.add_argument("--requests", type=int, default=200, help="단계별 요청 수")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="질의 비율 (merchant/law/onnuri/menu/offtopic)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--port", type=int, default=8701)
+    parser.add_argument("--sandbox", help="HOME 대역 디렉터리 (재사용 시 인덱스 재생성 생략)")
+    parser.add_argument("--llm-latency-ms", type=float, default=300.0)
+    parser.add_argument("--token-ms", type=float, default=5.0)
+    parser.add_argument("--tokens", type=int, default=40)
+    parser.add_argument("--embed-ms", type=float, default=0.0)
+    parser.add_argument("--embed-call-ms", type=float, default=0.0)
+    parser.add_argument("--no-answer-cache", action="store_true")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--out", help="결과 JSON 경로 (기본: bench/results/load_<시각>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("A", "B"), help="두 결과 JSON 비교")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    report = run(args)
+
+    out = args.out or os.path.join(RESULTS_DIR, f"load_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"🟢 결과 저장: {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+# --------------------------------------------------
+# File: ~/RAG_Chatbot/Backend/bench/metadata_bench.py
+# Description:
+# - generation metadata 메모리 / 할당 측정 (합성 청크 N 개)
+#   · 열기: MappedMetadata 생성 + intent ID 필터 계산 시간 / 상주 메모리 (tracemalloc)
+#   · 질의: 후보 id → 필터 + top-k 결과 (vector_store._collect) 질의당 시간 / 할당 bytes
+#   · 저장: 중복 hash 확인 (save_faiss) 시간
+# - 청크 형식은 실제 적재 결과와 같음 (law / category / regular, 반복되는 파일명 · 장 · 절)
+#
+# 사용 예 (Backend 디렉터리에서):
+#   python -m bench.metadata_bench --n 1000000
+# --------------------------------------------------
+
+from typing import Dict, Any, List
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+import vector_store
+
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(BACKEND_DIR, "bench", "results")
+
+LAW_FILES = ["전통시장법.pdf", "전통시장법_시행령.pdf", "전통시장법_시행규칙.pdf"]
+DOC_FILES = ["온누리상품권_업무지침.pdf", "가맹점_업무처리_안내.pdf"]
+
+
+# ===============================
+# 데이터
+# ===============================
+def synth_rows(n: int, seed: int) -> List[Dict[str, Any]]:
+    rng = np.random.default_rng(seed)
+    kinds = rng.choice(3, n, p=[0.6, 0.1, 0.3])
+    rows = []
+    for i in range(n):
+        row = {"id": i, "page_no": int(i % 300) + 1}
+        if kinds[i] == 0:
+            row.update({
+                "file_name": LAW_FILES[i % 3], "strategy": "law",
+                "chapter": f"제{i % 9 + 1}장 시장 활성화", "section": f"제{i % 4 + 1}절 지원",
+                "article": f"제{i % 80 + 1}조", "clause": "①②③④"[i % 4], "page_end": int(i % 300) + 2,
+            })
+        elif kinds[i] == 1:
+            row.update({
+                "file_name": "메뉴구조.pdf", "strategy": "category",
+                "title": f"업무관리{i % 12}", "subtitle": f"하위메뉴{i % 40}", "url": f"https://example/page.do?mnuId={i}",
+            })
+        else:
+            row.update({"file_name": DOC_FILES[i % 2], "strategy": "regular"})
+        row["text"] = f"청크 본문 {i} " * 8
+        row["hash"] = hashlib.md5(f"{row['file_name']}-{i}".encode("utf-8")).hexdigest()
+        rows.append(row)
+    return rows
+
+
+# ===============================
+# 측정
+# ===============================
+FILTERS = (("law", frozenset(LAW_FILES)), ("category", None), (None, frozenset(DOC_FILES)))
+
+
+def open_generation(gen_dir: str):
+    meta = vector_store.MappedMetadata(gen_dir)
+    for strategy, files in FILTERS:
+        meta.id_filter(strategy, files)
+    return meta
+
+
+def measure(gen_dir: str, n: int, queries: int, candidates: int, top_k: int, seed: int) -> Dict[str, Any]:
+    t0 = time.perf_counter()
+    open_generation(gen_dir)
+    open_s = time.perf_counter() - t0
+
+    # 상주 메모리는 tracemalloc 으로 (추적 중에는 느려지므로 시간은 위에서 따로 측정)
+    tracemalloc.start()
+    meta = open_generation(gen_dir)
+    resident, _ = tracemalloc.get_traced_memory()
+
+    rng = np.random.default_rng(seed)
+    ids = rng.integers(0, n, (queries, candidates))
+    scores = -np.sort(-rng.random((queries, candidates)).astype("float32"), axis=1)
+
+    def run_query(q: int):
+        vector_store._collect(meta, scores[q], ids[q], top_k, "law", frozenset(LAW_FILES))
+
+    # 질의당 할당: 호출 중 최대 추가 할당 (tracemalloc peak)
+    allocated = 0
+    for q in range(queries):
+        base, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        run_query(q)
+        allocated += tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+
+    meta._row.cache_clear()
+    t0 = time.perf_counter()
+    for q in range(queries):
+        run_query(q)
+    query_ms = (time.perf_counter() - t0) * 1000 / queries
+
+    # 저장 시 중복 확인: 새 청크 1,000 개 hash vs 저장된 전체
+    new = np.asarray([hashlib.md5(f"new-{i}".encode("utf-8")).digest() for i in range(1000)], dtype="S16")
+    t0 = time.perf_counter()
+    vector_store._contains_hashes(vector_store._existing_hashes(meta), new)
+    dedupe_s = time.perf_counter() - t0
+
+    return {
+        "open_s": round(open_s, 3),
+        "resident_bytes_per_chunk": round(resident / n, 1),
+        "query_ms": round(query_ms, 3),
+        "query_alloc_bytes": int(allocated / queries),
+        "dedupe_s": round(dedupe_s, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="metadata 메모리 / 질의당 할당 측정")
+    parser.add_argument("--n", type=int, default=1_000_000, help="합성 청크 수")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--candidates", type=int, default=36, help="질의당 후보 id 수 (top_k × 3 × rerank)")
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=None, help="결과 JSON 경로 (기본: bench/results/metadata_<n>.json)")
+    args = parser.parse_args()
+
+    gen_dir = tempfile.mkdtemp(prefix="metadata_bench_")
+    try:
+        t0 = time.perf_counter()
+        vector_store._write_metadata(gen_dir, None, synth_rows(args.n, args.seed))
+        write_s = time.perf_counter() - t0
+        result = {"n": args.n, "write_s": round(write_s, 3), **measure(gen_dir, args.n, args.queries, args.candidates, args.top_k, args.seed)}
+    finally:
+        shutil.rmtree(gen_dir, ignore_errors=True)
+
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    out = args.out or os.path.join(RESULTS_DIR, f"metadata_{args.n}.json")
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
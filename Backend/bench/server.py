@@ -0,0 +1,101 @@
+# --------------------------------------------------
+# File: ~/RAG_Chatbot/Backend/bench/server.py
+# Description:
+# - 벤치마크용 FastAPI 서버 실행기 (load_test 가 subprocess 로 실행)
+# - HOME 을 sandbox 로 돌려 실제 ~/RAG_Chatbot 데이터는 건드리지 않음
+# - 임베딩 모델 → embedders "stub" backend (StubEmbedder), Ollama → OLLAMA_BASE_URL (StubOllamaServer)
+# - sandbox 인덱스가 비어 있으면 repo 의 input/ 문서를 먼저 임베딩
+#
+# 사용 예 (Backend 디렉터리에서):
+#   python -m bench.server --sandbox /tmp/rag_bench --port 8701 --ollama-url http://127.0.0.1:11500
+# --------------------------------------------------
+
+import argparse
+import functools
+import os
+import shutil
+import sys
+
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPO_DIR = os.path.dirname(BACKEND_DIR)
+CONFIG_FILES = ["doc_profiles.json", "chunk_config.json", "intent_keywords.json"]
+
+
+def prepare_sandbox(sandbox: str) -> str:
+    """sandbox/RAG_Chatbot 에 설정 파일 + input 문서 복사 (이미 있으면 유지)"""
+    base = os.path.join(sandbox, "RAG_Chatbot")
+    os.makedirs(base, exist_ok=True)
+
+    for name in CONFIG_FILES:
+        src = os.path.join(REPO_DIR, name)
+        dst = os.path.join(base, name)
+        if os.path.exists(src) and not os.path.exists(dst):
+            shutil.copy(src, dst)
+
+    src_input = os.path.join(REPO_DIR, "input")
+    dst_input = os.path.join(base, "input")
+    if os.path.isdir(src_input) and not os.path.exists(dst_input):
+        shutil.copytree(src_input, dst_input)
+
+    return base
+
+
+def ingest_inputs(base: str):
+    """main.upload_file 과 같은 경로로 input/ 전체 임베딩"""
+    from file_handler import pdf_to_text_with_page, csv_to_text, apply_chunk_strategy, chunk_pdf_pages
+    from vector_store import save_faiss
+
+    input_dir = os.path.join(base, "input")
+    for filename in sorted(os.listdir(input_dir)):
+        path = os.path.join(input_dir, filename)
+        chunks = []
+        if filename.lower().endswith(".pdf"):
+            chunks = chunk_pdf_pages(pdf_to_text_with_page(path, filename), filename)
+        elif filename.lower().endswith(".csv"):
+            for c in apply_chunk_strategy(csv_to_text(path), filename):
+                chunks.append({"page_no": "-", "strategy": c.get("strategy"), **c})
+        if chunks:
+            save_faiss(chunks, file_name=filename)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RAG 벤치마크 서버 (stub embedder / stub Ollama)")
+    parser.add_argument("--sandbox", required=True)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8701)
+    parser.add_argument("--ollama-url", required=True)
+    parser.add_argument("--embed-ms", type=float, default=0.0, help="stub 임베딩 1건당 지연(ms)")
+    parser.add_argument("--embed-call-ms", type=float, default=0.0, help="stub encode 1회당 고정 지연(ms)")
+    parser.add_argument("--no-answer-cache", action="store_true", help="semantic 응답 캐시 비활성화")
+    args = parser.parse_args()
+
+    # ⚠ Backend 모듈 import 전에 HOME / Ollama 주소 / 임베딩 모델 교체
+    base = prepare_sandbox(args.sandbox)
+    os.environ["HOME"] = args.sandbox
+    os.environ["OLLAMA_BASE_URL"] = args.ollama_url
+    sys.path.insert(0, BACKEND_DIR)
+
+    import embedders
+    from bench.stubs import StubEmbedder
+    embedders.register_backend(StubEmbedder.name, functools.partial(StubEmbedder, per_item_ms=args.embed_ms, per_call_ms=args.embed_call_ms))
+    os.environ["RAG_EMBEDDER_BACKEND"] = StubEmbedder.name
+
+    import uvicorn
+    import vector_store
+    import main as app_main
+    import rag_pipeline
+    import startup
+
+    startup.wait("model", "index")
+    if not vector_store.metadata:
+        ingest_inputs(base)
+
+    if args.no_answer_cache:
+        rag_pipeline._answer_cache.threshold = 2.0
+
+    uvicorn.run(app_main.app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
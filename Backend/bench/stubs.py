@@ -0,0 +1,114 @@
+# --------------------------------------------------
+# File: ~/RAG_Chatbot/Backend/bench/stubs.py
+# Description:
+# - 벤치마크용 로컬 대역 (모델 다운로드 / GPU / Ollama 불필요)
+# - StubEmbedder: HashingEmbedder + 임베딩 지연 흉내 (embedders backend "stub")
+#   · per_call_ms (encode 1회 고정 비용) + per_item_ms (텍스트 1건당)
+# - StubOllamaServer: /api/generate 를 흉내내는 HTTP 서버 (지연 / 토큰 수 설정)
+# --------------------------------------------------
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import threading
+import time
+
+from embedders import HashingEmbedder
+
+
+class StubEmbedder(HashingEmbedder):
+    """
+    HashingEmbedder + 모델 연산 시간 흉내 (per_call_ms + per_item_ms × 건수)
+    - embedders.register_backend("stub", ...) 로 vector_store 에 연결
+    """
+
+    name = "stub"
+
+    def __init__(self, model_name: str = "stub", batch_size: int = 16, threads=None, dim: int = 1024, per_item_ms: float = 0.0, per_call_ms: float = 0.0):
+        super().__init__(model_name, batch_size=batch_size, threads=threads, dim=dim)
+        self.per_item_ms = per_item_ms
+        self.per_call_ms = per_call_ms
+
+    def encode(self, texts):
+        if isinstance(texts, str):
+            texts = [texts]
+        out = super().encode(texts)
+        if self.per_item_ms or self.per_call_ms:
+            time.sleep((self.per_call_ms + self.per_item_ms * len(texts)) / 1000)
+        return out
+
+
+class StubOllamaServer:
+    """
+    Ollama /api/generate (stream NDJSON) 대역
+
+    latency_ms      : 첫 토큰까지 지연 (prompt eval 흉내)
+    token_ms        : 토큰당 생성 지연
+    tokens          : 생성 토큰 수
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency_ms: float = 300.0, token_ms: float = 5.0, tokens: int = 40):
+        self.latency_ms = latency_ms
+        self.token_ms = token_ms
+        self.tokens = tokens
+        self.requests = 0
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                body = json.dumps({"models": [{"name": "stub"}]}).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                stub.requests += 1
+
+                prompt = payload.get("prompt") or json.dumps(payload.get("messages", []), ensure_ascii=False)
+                time.sleep(stub.latency_ms / 1000)
+
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+
+                for i in range(stub.tokens):
+                    time.sleep(stub.token_ms / 1000)
+                    self._chunk({"model": payload.get("model"), "response": "응답 ", "done": False})
+                self._chunk({
+                    "model": payload.get("model"),
+                    "response": "",
+                    "done": True,
+                    "done_reason": "stop",
+                    "prompt_eval_count": len(prompt),
+                    "eval_count": stub.tokens,
+                })
+                self.wfile.write(b"0\r\n\r\n")
+
+            def _chunk(self, obj):
+                data = (json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8")
+                self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+                self.wfile.flush()
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://{host}:{self.httpd.server_address[1]}"
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
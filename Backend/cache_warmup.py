@@ -0,0 +1,155 @@
+# --------------------------------------------------
+# File: ~/RAG_Chatbot/Backend/cache_warmup.py
+# Description:
+# - chat_history_sessions 의 실제 사용자 질문으로 캐시 예열
+# - 빈도 상위 질문을 파이프라인에 재생 → 질의 임베딩 / 응답 캐시 채움
+# - CLI (실행 중인 서버에 HTTP 재생) + 서버 기동 시 in-process 재생
+#
+# 사용 예:
+#   python cache_warmup.py --top 50 --concurrency 2
+#   python cache_warmup.py --url http://127.0.0.1:8601 --report warmup.json
+# --------------------------------------------------
+
+from typing import List, Dict, Any, Callable, Tuple
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import glob
+import json
+import os
+import time
+import urllib.request
+
+
+BASE_DIR = os.path.join(os.path.expanduser("~"), "RAG_Chatbot")
+CHAT_HISTORY_DIR = os.path.join(BASE_DIR, "chat_history_sessions")
+
+DEFAULT_TOP = 50
+DEFAULT_CONCURRENCY = 2
+
+# 프론트 버튼 플로우가 자동 전송하는 안내 문구 (실제 질의 아님)
+SKIP_SUFFIXES = ("진행하겠습니다.",)
+
+
+# ===============================
+# 과거 질문 수집
+# ===============================
+def collect_questions(history_dir: str = CHAT_HISTORY_DIR, top: int = DEFAULT_TOP) -> List[Tuple[str, int]]:
+    """
+    반환: [(질문, 등장 횟수), ...] 빈도 내림차순
+    """
+    counter: Counter = Counter()
+
+    for path in glob.glob(os.path.join(history_dir, "*.json")):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                history = json.load(f)
+        except Exception:
+            continue
+
+        for msg in history if isinstance(history, list) else []:
+            if msg.get("role") != "user":
+                continue
+            content = (msg.get("content") or "").strip()
+            if not content or content.endswith(SKIP_SUFFIXES):
+                continue
+            counter[content] += 1
+
+    return counter.most_common(top)
+
+
+# ===============================
+# 재생
+# ===============================
+def warm_up(
+    ask: Callable[[str], Dict[str, Any]],
+    questions: List[Tuple[str, int]],
+    concurrency: int = DEFAULT_CONCURRENCY
+) -> Dict[str, Any]:
+    """
+    ask: 질문 → 응답 dict (rag_query 또는 HTTP 호출)
+    concurrency: 동시 재생 수 상한 (LLM / CPU 보호)
+    """
+
+    def run(item):
+        question, count = item
+        t0 = time.perf_counter()
+        try:
+            res = ask(question)
+            status = "ok"
+        except Exception as e:
+            res = {"error": str(e)}
+            status = "error"
+        return {
+            "question": question,
+            "count": count,
+            "status": status,
+            "type": res.get("type"),
+            "answer_mode": res.get("answer_mode"),
+            "already_cached": "cache" in res,
+            "elapsed_ms": round((time.perf_counter() - t0) * 1000, 1)
+        }
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        entries = list(pool.map(run, questions))
+
+    return {
+        "questions": len(entries),
+        "errors": sum(1 for e in entries if e["status"] != "ok"),
+        "cacheable": sum(1 for e in entries if e["type"] not in (None, "NO_MATCH", "MERCHANT_DATA")),
+        "elapsed_s": round(time.perf_counter() - t0, 2),
+        "entries": entries
+    }
+
+
+def warm_up_local(top: int = DEFAULT_TOP, concurrency: int = DEFAULT_CONCURRENCY) -> Dict[str, Any]:
+    """서버 프로세스 내부 재생 (기동 훅용)"""
+    from rag_pipeline import rag_query, answer_stats
+
+    report = warm_up(lambda q: rag_query(question=q), collect_questions(top=top), concurrency)
+    report["cache"] = answer_stats().get("cache")
+    print(f"🟢 Cache warm-up 완료 — 질문 {report['questions']}건, {report['elapsed_s']}s")
+    return report
+
+
+def _http_ask(url: str, timeout: float):
+    def ask(question: str) -> Dict[str, Any]:
+        req = urllib.request.Request(
+            f"{url.rstrip('/')}/rag_query",
+            data=json.dumps({"question": question}).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST"
+        )
+        with urllib.request.urlopen(req, timeout=timeout) as res:
+            return json.loads(res.read().decode("utf-8"))
+    return ask
+
+
+# ===============================
+# CLI
+# ===============================
+def main():
+    parser = argparse.ArgumentParser(description="과거 채팅 질문으로 RAG 서버 캐시 예열")
+    parser.add_argument("--url", default="http://127.0.0.1:8601", help="RAG 서버 주소")
+    parser.add_argument("--history-dir", default=CHAT_HISTORY_DIR)
+    parser.add_argument("--top", type=int, default=DEFAULT_TOP, help="재생할 상위 질문 수")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--report", help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    questions = collect_questions(args.history_dir, args.top)
+    report = warm_up(_http_ask(args.url, args.timeout), questions, args.concurrency)
+
+    for e in report["entries"]:
+        print(f"{e['elapsed_ms']:>9.1f}ms  x{e['count']:<3} {e['status']:<5} {str(e['type']):<18} {e['question']}")
+    print(f"총 {report['questions']}건 / 오류 {report['errors']}건 / {report['elapsed_s']}s")
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+# --------------------------------------------------
+# File: ~/RAG_Chatbot/Backend/config_store.py
+# Description:
+# - doc_profiles.json / chunk_config.json 감시 + 검증 + 컴파일
+#   · mtime 확인은 RELOAD_CHECK_INTERVAL 마다 1회 (매 요청 / 매 페이지마다 stat · parse 하지 않음)
+#   · 변경 시 다시 읽어 검증 → 불변 객체로 컴파일 → 참조 1개를 원자적으로 교체 (재시작 불필요)
+#   · 원본 설정 (raw) 도 깊은 읽기 전용 사본 (dict → MappingProxyType, list → tuple)
+#   · 검증 실패 시 이전 설정 유지 (⚠ 로그 + rag_config_reloads_total{result="invalid"})
+# - doc_profiles → intent 별 파일 / 전략 집합 + 검색 ID 필터 key (vector_store.id_filter)
+# - chunk_config → 파일별 chunk 전략 / 설정 (file_handler 전략 dispatch)
+#
+# 사용 예:
+#   profile = profiles().get("LAW")                  # IntentProfile | None
+#   rule = chunking().rule_for("전통시장법.pdf")       # ChunkRule(strategy="law", cfg=...)
+# --------------------------------------------------
+
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Mapping, NamedTuple, Optional, Tuple
+import json
+import os
+import threading
+import time
+
+from tracing import inc, describe
+
+
+BASE_DIR = os.path.join(os.path.expanduser("~"), "RAG_Chatbot")
+DOC_PROFILES_PATH = os.path.join(BASE_DIR, "doc_profiles.json")
+CHUNK_CONFIG_PATH = os.path.join(BASE_DIR, "chunk_config.json")
+
+# 파일 mtime 확인 주기 (초)
+RELOAD_CHECK_INTERVAL = float(os.environ.get("RAG_CONFIG_CHECK_INTERVAL", "1.0"))
+
+# file_handler 가 구현한 chunk 전략
+CHUNK_STRATEGIES = ("regular", "law", "category", "column_record", "page")
+
+DEFAULT_PROFILES = {"intents": {}}
+DEFAULT_CHUNK_CONFIG = {
+    "default": {"strategy": "regular", "chunk_size": 800, "overlap": 80},
+    "pdf": {},
+    "csv": {}
+}
+
+
+class ConfigError(ValueError):
+    """설정 파일 검증 실패 (이전 설정 유지)"""
+
+
+# ===============================
+# 컴파일 결과 (불변)
+# ===============================
+class IntentProfile(NamedTuple):
+    name: str
+    files: Optional[frozenset]              # None = 파일 제한 없음
+    file_list: Tuple[str, ...]              # 설정 순서 그대로
+    strategies: Tuple[Optional[str], ...]   # 전략 지정 없으면 (None,)
+    top_k: int
+    use_hybrid_rank: bool
+    reason: str                             # 검색 결과 matched_by
+
+    def filter_keys(self):
+        """vector_store.id_filter key — (strategy, files)"""
+        return [(st, self.files) for st in self.strategies]
+
+
+class Profiles(NamedTuple):
+    intents: MappingProxyType               # intent → IntentProfile
+    raw: Mapping[str, Any]                  # 원본 (semantic_intent 등 mapping 소비자용, 읽기 전용)
+
+    def get(self, intent: str) -> Optional[IntentProfile]:
+        return self.intents.get(intent)
+
+    def filter_keys(self):
+        return {key for p in self.intents.values() for key in p.filter_keys()}
+
+
+class ChunkRule(NamedTuple):
+    strategy: str
+    cfg: Mapping[str, Any]                  # chunk_size / overlap / mapping ... (읽기 전용)
+
+
+class ChunkConfig(NamedTuple):
+    default: ChunkRule
+    by_file: MappingProxyType               # (확장자 구분, 파일명) → ChunkRule
+    raw: Mapping[str, Any]                  # 원본 (읽기 전용)
+
+    def rule_for(self, file_name: str) -> ChunkRule:
+        kind = "pdf" if file_name.lower().endswith(".pdf") else "csv"
+        return self.by_file.get((kind, file_name), self.default)
+
+
+# ===============================
+# 검증 + 컴파일
+# ===============================
+def _require(cond: bool, message: str):
+    if not cond:
+        raise ConfigError(message)
+
+
+def _freeze(value: Any) -> Any:
+    """JSON 값 → 깊은 읽기 전용 사본 (dict → MappingProxyType, list → tuple)"""
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def compile_profiles(data: Dict[str, Any]) -> Profiles:
+    _require(isinstance(data, dict) and isinstance(data.get("intents"), dict), "intents 객체 필요")
+
+    intents = {}
+    for name, cfg in data["intents"].items():
+        where = f"intents.{name}"
+        _require(isinstance(cfg, dict), f"{where}: 객체 필요")
+
+        files = cfg.get("files") or []
+        strategies = cfg.get("strategies") or []
+        _require(isinstance(files, list) and all(isinstance(f, str) for f in files), f"{where}.files: 문자열 목록 필요")
+        _require(isinstance(strategies, list) and all(isinstance(s, str) for s in strategies), f"{where}.strategies: 문자열 목록 필요")
+
+        top_k = cfg.get("top_k", 3)
+        _require(isinstance(top_k, int) and not isinstance(top_k, bool) and top_k > 0, f"{where}.top_k: 양의 정수 필요")
+        _require(isinstance(cfg.get("use_hybrid_rank", False), bool), f"{where}.use_hybrid_rank: bool 필요")
+
+        intents[name] = IntentProfile(
+            name=name,
+            files=frozenset(files) or None,
+            file_list=tuple(files),
+            strategies=tuple(strategies) or (None,),
+            top_k=top_k,
+            use_hybrid_rank=cfg.get("use_hybrid_rank", False),
+            reason=f"semantic:{','.join(strategies)}" if strategies else "semantic",
+        )
+
+    return Profiles(intents=MappingProxyType(intents), raw=_freeze(data))
+
+
+def _chunk_rule(cfg: Any, where: str) -> ChunkRule:
+    _require(isinstance(cfg, dict), f"{where}: 객체 필요")
+    strategy = cfg.get("strategy", "regular")
+    _require(strategy in CHUNK_STRATEGIES, f"{where}.strategy: {strategy!r} (가능: {', '.join(CHUNK_STRATEGIES)})")
+
+    if strategy == "regular":
+        size, overlap = cfg.get("chunk_size", 800), cfg.get("overlap", 80)
+        _require(isinstance(size, int) and size > 0, f"{where}.chunk_size: 양의 정수 필요")
+        _require(isinstance(overlap, int) and 0 <= overlap < size, f"{where}.overlap: 0 이상 chunk_size 미만")
+    elif strategy == "column_record":
+        mapping = cfg.get("mapping")
+        _require(
+            isinstance(mapping, dict) and mapping
+            and all(isinstance(i, int) and not isinstance(i, bool) and i >= 0 for i in mapping.values()),
+            f"{where}.mapping: 열 이름 → 0 이상 정수 필요"
+        )
+
+    return ChunkRule(strategy=strategy, cfg=_freeze(cfg))
+
+
+def compile_chunk_config(data: Dict[str, Any]) -> ChunkConfig:
+    _require(isinstance(data, dict), "객체 필요")
+
+    by_file = {}
+    for kind in ("pdf", "csv"):
+        section = data.get(kind, {})
+        _require(isinstance(section, dict), f"{kind}: 객체 필요")
+        for file_name, cfg in section.items():
+            by_file[(kind, file_name)] = _chunk_rule(cfg, f"{kind}.{file_name}")
+
+    return ChunkConfig(
+        default=_chunk_rule(data.get("default", DEFAULT_CHUNK_CONFIG["default"]), "default"),
+        by_file=MappingProxyType(by_file),
+        raw=_freeze(data)
+    )
+
+
+# ===============================
+# 파일 감시 (mtime)
+# ===============================
+class WatchedConfig:
+    """
+    JSON 설정 파일 1개 + 컴파일 함수
+    - get(): 최대 RELOAD_CHECK_INTERVAL 마다 stat 1회, 나머지는 컴파일 결과 참조만 반환
+    - 파일 없음 → 기본값, 검증 실패 → 이전 컴파일 결과 유지
+    """
+
+    def __init__(self, name: str, path: str, compile_fn: Callable[[Dict[str, Any]], Any], default: Dict[str, Any]):
+        self.name = name
+        self.path = path
+        self.compile_fn = compile_fn
+        self.default = default
+        self._lock = threading.Lock()
+        self._signature = None
+        self._checked_at = 0.0
+        self._compiled = compile_fn(default)
+        self.reload()
+
+    def get(self):
+        now = time.monotonic()
+        if now - self._checked_at >= RELOAD_CHECK_INTERVAL:
+            self._checked_at = now
+            if self._stat() != self._signature:
+                self.reload()
+        return self._compiled
+
+    def reload(self) -> bool:
+        """강제 리로드 → 새 설정 적용 여부"""
+        with self._lock:
+            signature = self._stat()
+            try:
+                if signature is None:
+                    compiled, result = self.compile_fn(self.default), "missing"
+                else:
+                    with open(self.path, "r", encoding="utf-8") as f:
+                        compiled, result = self.compile_fn(json.load(f)), "ok"
+            except (OSError, ValueError) as e:
+                self._signature = signature
+                inc("rag_config_reloads_total", {"config": self.name, "result": "invalid"})
+                print(f"⚠ [CONFIG] {self.name} 검증 실패 — 이전 설정 유지: {e}")
+                return False
+
+            changed = signature != self._signature
+            self._signature = signature
+            self._compiled = compiled
+            inc("rag_config_reloads_total", {"config": self.name, "result": result})
+            if changed and result == "ok":
+                print(f"🟢 [CONFIG] {self.name} 적용")
+            return True
+
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+            return st.st_mtime_ns, st.st_size
+        except OSError:
+            return None
+
+
+_profiles = WatchedConfig("doc_profiles", DOC_PROFILES_PATH, compile_profiles, DEFAULT_PROFILES)
+_chunking = WatchedConfig("chunk_config", CHUNK_CONFIG_PATH, compile_chunk_config, DEFAULT_CHUNK_CONFIG)
+
+
+def profiles() -> Profiles:
+    return _profiles.get()
+
+
+def chunking() -> ChunkConfig:
+    return _chunking.get()
+
+
+def reload_all():
+    _profiles.reload()
+    _chunking.reload()
+
+
+describe("rag_config_reloads_total", "counter", "Config file (re)loads by result (ok / missing / invalid)")
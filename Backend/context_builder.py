@@ -0,0 +1,126 @@
+# --------------------------------------------------
+# File: ~/RAG_Chatbot/Backend/context_builder.py
+# Description:
+# - LLM 프롬프트용 컨텍스트 압축
+# - top-k 후보의 문장 중 질문 관련도가 높은 문장만 token budget 안에서 선택
+# - chunk_regular overlap 등으로 겹치는 문장 제거
+# --------------------------------------------------
+
+from typing import List, Dict, Any, Tuple
+import re
+
+from ranking import hybrid_scores
+
+
+# 기본 token budget / 문장을 뽑을 후보 수
+CONTEXT_TOKEN_BUDGET = 384
+CONTEXT_TOP_K = 3
+
+SENTENCE_SPLIT_RE = re.compile(r"(?<=[^\d][.?!])\s+|(?=[①②③④⑤⑥⑦⑧⑨⑩])")
+TOKEN_RE = re.compile(r"[가-힣]|[A-Za-z]+|\d+|[^\sA-Za-z\d가-힣]")
+
+
+# ===============================
+# 토큰 수 추정
+# ===============================
+def estimate_tokens(text: str) -> int:
+    """
+    LLM 토크나이저 없이 쓰는 보수적 추정치
+    - 한글 1음절 = 1 token, 영문 단어 / 숫자열 / 기호 = 1 token
+    """
+    return len(TOKEN_RE.findall(text or ""))
+
+
+def split_sentences(text: str) -> List[str]:
+    text = re.sub(r"\s*\n\s*", " ", text or "").strip()
+    return [s.strip() for s in SENTENCE_SPLIT_RE.split(text) if s and s.strip()]
+
+
+def _norm(text: str) -> str:
+    return re.sub(r"\s+", "", text)
+
+
+# ===============================
+# 컨텍스트 생성
+# ===============================
+def build_context(
+    question: str,
+    candidates: List[Dict[str, Any]],
+    token_budget: int = CONTEXT_TOKEN_BUDGET,
+    top_k: int = CONTEXT_TOP_K
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    반환: (context 문자열, 통계 dict)
+
+    1. 상위 top_k 후보를 문장 단위로 분해
+    2. 이미 본 문장에 포함되는 문장(overlap 조각 포함)은 제거
+    3. 문장 점수 = 후보 검색 점수(dense) + 문장 BM25 가중합
+    4. 점수순으로 budget까지 채운 뒤 원문 순서로 재배치
+       (후보별 조문/제목 헤더 포함)
+    """
+    headers: Dict[int, str] = {}
+    sentences: List[str] = []
+    owners: List[int] = []
+    dense: List[float] = []
+    seen_blob = ""
+    duplicates = 0
+
+    for i, c in enumerate(candidates[:top_k]):
+        head = [str(c.get(k)) for k in ["article", "clause", "title"] if c.get(k) and c.get(k) != "-"]
+        headers[i] = " ".join(head)
+
+        for sent in split_sentences(c.get("text") or ""):
+            key = _norm(sent)
+            if not key or key in seen_blob:
+                duplicates += 1
+                continue
+            seen_blob += key + "\x00"
+            sentences.append(sent)
+            owners.append(i)
+            dense.append(float(c.get("score", 0.0)))
+
+    stats = {
+        "budget": token_budget,
+        "candidates": min(len(candidates), top_k),
+        "sentences": len(sentences),
+        "duplicates": duplicates,
+    }
+
+    if not sentences:
+        context = "\n".join(h for h in headers.values() if h).strip()
+        stats.update({"selected": 0, "tokens": estimate_tokens(context)})
+        return context, stats
+
+    scores = hybrid_scores(question, sentences, dense)
+    if scores is None:
+        scores = dense
+
+    order = sorted(range(len(sentences)), key=lambda j: scores[j], reverse=True)
+
+    used = 0
+    chosen = set()
+    covered = set()
+    for j in order:
+        # 헤더는 그 후보의 첫 문장이 선택될 때만 budget 에 포함
+        cost = estimate_tokens(sentences[j])
+        if owners[j] not in covered:
+            cost += estimate_tokens(headers[owners[j]])
+        # 최소 1문장은 포함 (budget 초과라도 근거 없는 프롬프트는 만들지 않음)
+        if chosen and used + cost > token_budget:
+            continue
+        chosen.add(j)
+        covered.add(owners[j])
+        used += cost
+
+    # 원문 순서로 재배치 (후보 순위 → 문장 위치)
+    lines = []
+    current = None
+    for j in sorted(chosen):
+        if owners[j] != current:
+            current = owners[j]
+            lines.append(headers[current])
+        lines.append(sentences[j])
+
+    context = "\n".join(l for l in lines if l).strip()
+    stats.update({"selected": len(chosen), "tokens": estimate_tokens(context)})
+    return context, stats
@@ -3,35 +3,173 @@
 # Description:
 # - 질문 → intent 결정
 # - rule 기반 + forced_intent 지원
+# - 임베딩 기반 semantic intent 점수와 결합 (선택)
 # --------------------------------------------------
 
+from typing import Dict, List
+import math
+
 from intent_classifier import classify_intent
+import vector_store
+
+
+# rule 만으로 확정하고 질의 임베딩을 생략하는 intent (FAISS 미사용)
+NO_EMBEDDING_INTENTS = {"MERCHANT_DATA"}
+RULE_ONLY_CONFIDENCE = 0.9
+
+# semantic 점수 → 분포 변환 온도 / 신뢰도 구간 (cosine)
+SEMANTIC_TEMPERATURE = 0.05
+SEMANTIC_FLOOR = 0.35
+SEMANTIC_CEIL = 0.75
+
+# rule / semantic 결합 가중치
+RULE_WEIGHT = 0.6
+SEMANTIC_WEIGHT = 0.4
+
+# 이 값 미만이면 AMBIGUOUS
+MIN_CONFIDENCE = 0.35
 
 
 class DecisionEngine:
+    def __init__(self, semantic=None):
+        """
+        semantic: SemanticIntentClassifier (없으면 rule 기반만 사용)
+        """
+        self.semantic = semantic
+
     def decide(self, question: str, forced_intent: str = None) -> dict:
         """
         반환 형식:
         {
           "intent": str,
           "confidence": float,
-          "reason": str
+          "reason": str,
+          "scores": {intent: float}
         }
         """
 
         # 1️⃣ 강제 intent (버튼/특정 플로우)
         if forced_intent:
-            return {
-                "intent": forced_intent,
-                "confidence": 1.0,
-                "reason": "forced_intent"
-            }
+            return self._forced(forced_intent)
 
         # 2️⃣ 규칙 기반 intent 분류
-        base = classify_intent(question)
+        rule, base = self._rule(question)
+        if not self._needs_semantic(question, rule):
+            return rule
 
+        # 3️⃣ semantic intent (검색과 같은 질의 벡터 재사용)
+        return self._with_semantic(question, rule, base)
+
+    def decide_batch(self, questions: List[str], forced_intent: str = None) -> List[dict]:
+        """
+        여러 질문 intent 결정 (decide 와 같은 결과)
+        - semantic 이 필요한 질문만 모아 1회 일괄 임베딩 → 이후 단계는 질의 벡터 캐시 사용
+        """
+        if forced_intent:
+            return [self._forced(forced_intent) for _ in questions]
+
+        rules = [self._rule(q) for q in questions]
+        pending = [q for q, (rule, _) in zip(questions, rules) if self._needs_semantic(q, rule)]
+        if pending:
+            try:
+                vector_store.embed_queries(pending)
+            except Exception:
+                pass
+
+        return [
+            self._with_semantic(q, rule, base) if self._needs_semantic(q, rule) else rule
+            for q, (rule, base) in zip(questions, rules)
+        ]
+
+    # ===============================
+    # internal
+    # ===============================
+    def _forced(self, forced_intent: str) -> dict:
         return {
+            "intent": forced_intent,
+            "confidence": 1.0,
+            "reason": "forced_intent",
+            "scores": {forced_intent: 1.0}
+        }
+
+    def _rule(self, question: str):
+        base = classify_intent(question)
+        rule = {
             "intent": base.get("intent", "AMBIGUOUS"),
             "confidence": float(base.get("confidence", 0.0)),
-            "reason": "rule_match"
+            "reason": "rule_match",
+            "scores": base.get("scores", {})
+        }
+        return rule, base
+
+    def _needs_semantic(self, question: str, rule: dict) -> bool:
+        if self.semantic is None or not question.strip():
+            return False
+
+        # CSV 조회처럼 임베딩이 필요 없는 확실한 질문은 그대로 확정
+        # (다른 intent 키워드도 함께 걸리면 semantic 단계에서 판단)
+        rule_only = (
+            rule["intent"] in NO_EMBEDDING_INTENTS
+            and rule["confidence"] >= RULE_ONLY_CONFIDENCE
+            and len(rule["scores"]) == 1
+        )
+        return not rule_only
+
+    def _with_semantic(self, question: str, rule: dict, base: dict) -> dict:
+        semantic = self._semantic_scores(question)
+        if not semantic:
+            return rule
+
+        return self._combine(rule, base, semantic)
+
+    def _semantic_scores(self, question: str) -> Dict[str, float]:
+        try:
+            q_vec = vector_store.embed_query(question)
+            return self.semantic.scores(q_vec)
+        except Exception:
+            return {}
+
+    def _combine(self, rule: dict, base: dict, semantic: Dict[str, float]) -> dict:
+        """
+        두 단계를 각각 (intent 분포, 신뢰도) 로 보고 신뢰도 가중 평균
+
+        - rule 분포: 키워드 가중치 점유율 / 신뢰도: 1 - exp(-1위 가중치 합)
+        - semantic 분포: softmax(cos / T) / 신뢰도: 1위 cosine 의 FLOOR~CEIL 선형 구간
+        - confidence = 결합 분포 1위 확률 × noisy-OR(두 신뢰도)
+        """
+        rule_dist = base.get("scores", {}) or {}
+        raw = base.get("raw_scores", {}) or {}
+        r_rule = 1.0 - math.exp(-max(raw.values())) if raw else 0.0
+
+        top_sim = max(semantic.values())
+        exps = {k: math.exp((v - top_sim) / SEMANTIC_TEMPERATURE) for k, v in semantic.items()}
+        z = sum(exps.values())
+        sem_dist = {k: v / z for k, v in exps.items()}
+        r_sem = min(1.0, max(0.0, (top_sim - SEMANTIC_FLOOR) / (SEMANTIC_CEIL - SEMANTIC_FLOOR)))
+
+        a_rule = RULE_WEIGHT * r_rule
+        a_sem = SEMANTIC_WEIGHT * r_sem
+        if a_rule + a_sem == 0:
+            return rule
+
+        combined: Dict[str, float] = {}
+        for k in set(rule_dist) | set(sem_dist):
+            combined[k] = (a_rule * rule_dist.get(k, 0.0) + a_sem * sem_dist.get(k, 0.0)) / (a_rule + a_sem)
+
+        intent = max(combined, key=combined.get)
+        confidence = combined[intent] * (1.0 - (1.0 - r_rule) * (1.0 - r_sem))
+
+        if not rule_dist:
+            reason = "semantic"
+        elif intent == rule["intent"]:
+            reason = "rule_match+semantic"
+        else:
+            reason = "semantic_override"
+
+        return {
+            "intent": intent if confidence >= MIN_CONFIDENCE else "AMBIGUOUS",
+            "confidence": round(confidence, 4),
+            "reason": reason,
+            "scores": {k: round(v, 4) for k, v in sorted(combined.items(), key=lambda x: -x[1])},
+            "semantic_scores": {k: round(v, 4) for k, v in semantic.items()}
         }
@@ -0,0 +1,119 @@
+# --------------------------------------------------
+# File: ~/RAG_Chatbot/Backend/embed_scheduler.py
+# Description:
+# - 동시 질의 임베딩 micro-batching
+#   · 요청 스레드는 질의를 대기열에 넣고 결과 벡터를 기다림
+#   · scheduler 스레드가 첫 요청 도착 후 최대 RAG_EMBED_BATCH_WAIT_MS 동안
+#     (또는 RAG_EMBED_BATCH_MAX 개가 찰 때까지) 모아 encode 1회 → 각 요청에 전달
+#   · encode 중 도착한 요청은 다음 batch 로 자연스럽게 합쳐짐
+# - RAG_EMBED_BATCH_MAX=1 → batching 없이 호출 스레드에서 바로 encode
+# - 지표: rag_embed_batch_size (batch 1회당 질의 수), rag_embed_queue_wait_seconds
+#
+# 사용 예:
+#   scheduler = EmbedScheduler(lambda texts: embedder.encode(texts))
+#   vec = scheduler.encode("온누리상품권 가맹점 조건")   # (dim,)
+# --------------------------------------------------
+
+from collections import deque
+from typing import Callable, List, Optional
+import os
+import threading
+import time
+
+import numpy as np
+
+from tracing import observe, describe
+
+
+BATCH_MAX = int(os.environ.get("RAG_EMBED_BATCH_MAX", "16"))
+BATCH_WAIT_MS = float(os.environ.get("RAG_EMBED_BATCH_WAIT_MS", "2"))
+
+BATCH_SIZE_METRIC = "rag_embed_batch_size"
+QUEUE_WAIT_METRIC = "rag_embed_queue_wait_seconds"
+
+
+class _Request:
+    __slots__ = ("text", "enqueued", "done", "vector", "error")
+
+    def __init__(self, text: str):
+        self.text = text
+        self.enqueued = time.perf_counter()
+        self.done = threading.Event()
+        self.vector: Optional[np.ndarray] = None
+        self.error: Optional[BaseException] = None
+
+
+class EmbedScheduler:
+    """
+    encode_fn(texts) → (n, dim) 를 여러 호출 스레드가 공유
+    - 같은 batch 안의 중복 질의는 1번만 encode
+    - encode 예외는 해당 batch 의 모든 요청에 그대로 전달
+    """
+
+    def __init__(self, encode_fn: Callable[[List[str]], np.ndarray], max_batch: int = BATCH_MAX, max_wait_ms: float = BATCH_WAIT_MS):
+        self.encode_fn = encode_fn
+        self.max_batch = max(1, int(max_batch))
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self._pending = deque()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def encode(self, text: str) -> np.ndarray:
+        if self.max_batch == 1:
+            return np.asarray(self.encode_fn([text]))[0]
+
+        req = _Request(text)
+        with self._cond:
+            self._pending.append(req)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="embed-scheduler", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+        req.done.wait()
+        if req.error is not None:
+            raise req.error
+        return req.vector
+
+    # ===============================
+    # scheduler 스레드
+    # ===============================
+    def _next_batch(self) -> List[_Request]:
+        with self._cond:
+            while not self._pending:
+                self._cond.wait()
+
+            deadline = self._pending[0].enqueued + self.max_wait
+            while len(self._pending) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            n = min(self.max_batch, len(self._pending))
+            return [self._pending.popleft() for _ in range(n)]
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+
+            started = time.perf_counter()
+            for req in batch:
+                observe(QUEUE_WAIT_METRIC, started - req.enqueued)
+            observe(BATCH_SIZE_METRIC, len(batch))
+
+            texts = list(dict.fromkeys(req.text for req in batch))
+            try:
+                vecs = np.asarray(self.encode_fn(texts))
+                by_text = dict(zip(texts, vecs))
+                for req in batch:
+                    req.vector = by_text[req.text]
+            except BaseException as e:
+                for req in batch:
+                    req.error = e
+            finally:
+                for req in batch:
+                    req.done.set()
+
+
+describe(BATCH_SIZE_METRIC, "histogram", "Queries per batched query-embedding encode", buckets=(1, 2, 4, 8, 16, 32, 64, 128))
+describe(QUEUE_WAIT_METRIC, "histogram", "Time a query waited for its embedding batch to start")
@@ -0,0 +1,203 @@
+# --------------------------------------------------
+# File: ~/RAG_Chatbot/Backend/embedders.py
+# Description:
+# - 임베딩 백엔드 인터페이스 + 구현체
+#   · sentence_transformers : 기존 SentenceTransformer (float32, torch CPU)
+#   · onnx_int8             : 같은 모델의 ONNX + int8 동적 양자화 (onnxruntime CPU)
+#   · hashing               : 모델 없는 결정적 해시 임베딩 (테스트 / 벤치마크용)
+# - 환경 변수로 선택 (vector_store.load_embedder 에서 생성)
+#   RAG_EMBEDDER_BACKEND  (기본 sentence_transformers)
+#   RAG_EMBED_BATCH_SIZE  (기본 16)
+#   RAG_EMBED_THREADS     (기본: 라이브러리 기본값)
+# --------------------------------------------------
+
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, List, Optional
+import hashlib
+import os
+
+import numpy as np
+
+
+BASE_DIR = os.path.join(os.path.expanduser("~"), "RAG_Chatbot")
+ONNX_CACHE_DIR = os.path.join(BASE_DIR, "models")
+
+DEFAULT_BACKEND = "sentence_transformers"
+DEFAULT_BATCH_SIZE = 16
+HASHING_DIM = 1024
+
+
+class BaseEmbedder(ABC):
+    """
+    encode(texts) → (len(texts), dim) float32 (정규화 전 원본 벡터)
+    - L2 normalize 는 vector_store 에서 공통 처리
+    - dim / encode 미구현 백엔드는 생성 시 TypeError
+    """
+
+    name = "base"
+
+    def __init__(self, batch_size: int = DEFAULT_BATCH_SIZE, threads: Optional[int] = None):
+        self.batch_size = batch_size
+        self.threads = threads
+
+    @property
+    @abstractmethod
+    def dim(self) -> int:
+        ...
+
+    @abstractmethod
+    def encode(self, texts: List[str]) -> np.ndarray:
+        ...
+
+    def describe(self) -> Dict[str, object]:
+        return {"backend": self.name, "dim": self.dim, "batch_size": self.batch_size, "threads": self.threads}
+
+
+# ===============================
+# sentence-transformers (기존 방식)
+# ===============================
+class SentenceTransformerEmbedder(BaseEmbedder):
+    name = "sentence_transformers"
+
+    def __init__(self, model_name: str, batch_size: int = DEFAULT_BATCH_SIZE, threads: Optional[int] = None):
+        super().__init__(batch_size, threads)
+        import torch
+        from sentence_transformers import SentenceTransformer
+
+        if threads:
+            torch.set_num_threads(threads)
+        self.model_name = model_name
+        self.model = SentenceTransformer(model_name, device="cpu")
+
+    @property
+    def dim(self) -> int:
+        return self.model.get_sentence_embedding_dimension()
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        return self.model.encode(texts, convert_to_numpy=True, batch_size=self.batch_size).astype("float32")
+
+
+# ===============================
+# ONNX + int8 동적 양자화 (onnxruntime CPU)
+# ===============================
+class OnnxInt8Embedder(BaseEmbedder):
+    """
+    - 최초 1회: 모델을 ONNX 로 export → int8 동적 양자화 → ONNX_CACHE_DIR 에 저장
+    - 이후: 양자화 파일을 바로 로드
+    - 필요 패키지: optimum[onnxruntime] (선택 의존성)
+    """
+
+    name = "onnx_int8"
+
+    def __init__(
+        self,
+        model_name: str,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        threads: Optional[int] = None,
+        quantization: str = None
+    ):
+        super().__init__(batch_size, threads)
+        try:
+            import onnxruntime as ort
+            from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+        except ImportError as e:
+            raise RuntimeError(
+                "onnx_int8 backend 에는 optimum[onnxruntime] 설치가 필요합니다: "
+                "pip install 'optimum[onnxruntime]'"
+            ) from e
+
+        self.model_name = model_name
+        self.quantization = quantization or os.environ.get("RAG_ONNX_QUANTIZATION", "avx2")
+        local_dir = os.path.join(ONNX_CACHE_DIR, model_name.replace("/", "__") + "-onnx")
+        qfile = f"onnx/model_qint8_{self.quantization}.onnx"
+
+        session_options = ort.SessionOptions()
+        if threads:
+            session_options.intra_op_num_threads = threads
+        model_kwargs = {"provider": "CPUExecutionProvider", "session_options": session_options}
+
+        if not os.path.exists(os.path.join(local_dir, qfile)):
+            print(f"🔵 Exporting {model_name} → ONNX int8 ({self.quantization}) ...")
+            base = SentenceTransformer(model_name, device="cpu", backend="onnx")
+            base.save_pretrained(local_dir)
+            export_dynamic_quantized_onnx_model(base, self.quantization, local_dir)
+
+        self.model = SentenceTransformer(
+            local_dir,
+            device="cpu",
+            backend="onnx",
+            model_kwargs={**model_kwargs, "file_name": qfile}
+        )
+
+    @property
+    def dim(self) -> int:
+        return self.model.get_sentence_embedding_dimension()
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        return self.model.encode(texts, convert_to_numpy=True, batch_size=self.batch_size).astype("float32")
+
+    def describe(self) -> Dict[str, object]:
+        return {**super().describe(), "quantization": self.quantization}
+
+
+# ===============================
+# 해시 임베딩 (테스트 / 벤치마크)
+# ===============================
+class HashingEmbedder(BaseEmbedder):
+    """
+    - 같은 입력 → 항상 같은 벡터 (모델 / 네트워크 불필요)
+    - 공백 제거 후 글자 bigram 을 해시 버킷에 누적 → 비슷한 문장끼리 cosine 이 높음
+    """
+
+    name = "hashing"
+
+    def __init__(self, model_name: str = None, batch_size: int = DEFAULT_BATCH_SIZE, threads: Optional[int] = None, dim: int = HASHING_DIM):
+        super().__init__(batch_size, threads)
+        self._dim = dim
+
+    @property
+    def dim(self) -> int:
+        return self._dim
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        out = np.zeros((len(texts), self._dim), dtype="float32")
+        for i, t in enumerate(texts):
+            t = "".join((t or "").split())
+            for j in range(max(len(t) - 1, 1)):
+                h = hashlib.blake2b(t[j:j + 2].encode("utf-8"), digest_size=8).digest()
+                out[i, int.from_bytes(h, "little") % self._dim] += 1.0
+            out[i, 0] += 1e-3
+        return out
+
+
+# ===============================
+# 백엔드 선택
+# ===============================
+BACKENDS: Dict[str, Callable[..., BaseEmbedder]] = {
+    SentenceTransformerEmbedder.name: SentenceTransformerEmbedder,
+    OnnxInt8Embedder.name: OnnxInt8Embedder,
+    HashingEmbedder.name: HashingEmbedder,
+}
+
+
+def register_backend(name: str, factory: Callable[..., BaseEmbedder]):
+    """외부 백엔드 등록 (예: 벤치마크용 지연 stub)"""
+    BACKENDS[name] = factory
+
+
+def create_embedder(
+    model_name: str,
+    backend: str = None,
+    batch_size: int = None,
+    threads: int = None
+) -> BaseEmbedder:
+    backend = backend or os.environ.get("RAG_EMBEDDER_BACKEND", DEFAULT_BACKEND)
+    batch_size = batch_size or int(os.environ.get("RAG_EMBED_BATCH_SIZE", DEFAULT_BATCH_SIZE))
+    if threads is None and os.environ.get("RAG_EMBED_THREADS"):
+        threads = int(os.environ["RAG_EMBED_THREADS"])
+
+    factory = BACKENDS.get(backend)
+    if factory is None:
+        raise ValueError(f"unknown embedder backend: {backend} (available: {', '.join(BACKENDS)})")
+
+    return factory(model_name, batch_size=batch_size, threads=threads)
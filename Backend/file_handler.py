@@ -6,27 +6,13 @@
 import fitz
 import re
 import csv
-import os
-import json
 from typing import List, Dict
 
-BASE_DIR = os.path.join(os.path.expanduser("~"), "RAG_Chatbot")
-CONFIG_PATH = os.path.join(BASE_DIR, "chunk_config.json")
-
-DEFAULT_CONFIG = {
-    "default": {"strategy": "regular", "chunk_size": 800, "overlap": 80},
-    "pdf": {},
-    "csv": {}
-}
+import config_store
 
 def load_config():
-    if not os.path.exists(CONFIG_PATH):
-        return DEFAULT_CONFIG
-    try:
-        with open(CONFIG_PATH, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except:
-        return DEFAULT_CONFIG
+    """chunk_config.json 원본 (검증 / 컴파일 / 핫 리로드는 config_store)"""
+    return config_store.chunking().raw
 
 #  ===== PDF Reader — 줄바꿈 유지 + 페이지 텍스트를 리스트로 반환 =====
 def pdf_to_text_with_page(pdf_path: str, file_name: str) -> List[Dict]:
@@ -50,12 +36,20 @@ def pdf_to_text_with_page(pdf_path: str, file_name: str) -> List[Dict]:
 #  ===== CSV Reader =====
 def csv_to_text(file_path: str) -> str:
     rows = []
-    with open(file_path, newline="", encoding="utf-8") as csvfile:
+    with open(file_path, newline="", encoding="utf-8-sig") as csvfile:
         reader = csv.reader(csvfile)
         for row in reader:
             rows.append(",".join(row))
     return "\n".join(rows)
 
+#  ===== 가맹점 delta CSV Reader (헤더 필수, 선택 열: op = upsert | delete) =====
+def read_delta_csv(text: str) -> List[Dict]:
+    reader = csv.DictReader(text.lstrip("\ufeff").splitlines())
+    rows = []
+    for row in reader:
+        rows.append({(k or "").strip(): (v or "").strip() for k, v in row.items() if k})
+    return rows
+
 #  ===== CATEGORY PARSER — category.pdf 전용 파서 =====
 def parse_category_structure(raw_text: str) -> List[Dict]:
     import re
@@ -128,33 +122,81 @@ def parse_category_structure(raw_text: str) -> List[Dict]:
     return chunks
 
 # ===== LAW PARSER — 전통시장법 / 시행령 / 시행규칙 전용 =====
+LAW_CHAPTER_RE = re.compile(r"(제\d+장\s*[^\s]*)")
+LAW_SECTION_RE = re.compile(r"(제\d+절\s*[^\s]*)")
+# 제N조의M (가지조문) 도 별도 조문으로 분리
+LAW_ARTICLE_RE = re.compile(r"(제\d+조(?:의\d+)?)\s*\((.*?)\)")
+LAW_CLAUSE_RE = re.compile(r"[①②③④⑤⑥⑦⑧⑨⑩]")
+
+
 def parse_law_pdf_text(text: str) -> List[Dict]:
     """
     전통시장법 / 시행령 / 시행규칙 등 법령 PDF 파싱 전용 함수
     - 한 줄에 조문이 여러 개 붙어 있어도 처리 가능
     - 제N장, 제N절, 제N조, (조문명), ①②③ 등 처리
+    - 페이지 정보가 필요하면 parse_law_document 사용
     """
+    return _parse_law(text)
 
+
+def parse_law_document(pages: List[Dict]) -> List[Dict]:
+    """
+    법령 PDF 전체를 1회 파싱 (pdf_to_text_with_page 결과 입력)
+    - 페이지를 이어 붙여 파싱 → 페이지를 넘어가는 조문 / 장·절 문맥 유지
+    - 항(clause)별 시작 / 끝 페이지를 page_no / page_end 로 기록
+    """
+    parts = []
+    page_starts = []
+    page_nos = []
+    pos = 0
+    for p in pages:
+        page_starts.append(pos)
+        page_nos.append(p["page_no"])
+        parts.append(p["text"])
+        pos += len(p["text"]) + 1  # 구분자 "\n"
+
+    return _parse_law("\n".join(parts), page_starts, page_nos)
+
+
+def _parse_law(text: str, page_starts: List[int] = None, page_nos: List = None) -> List[Dict]:
+    """
+    문서 길이에 선형인 단일 패스 파서
+    - 장 / 절 / 조 위치는 finditer 로 이미 정렬되어 있으므로
+      조문마다 다시 정렬하지 않고 전진 커서만 이동
+    - 장이 바뀌면 절은 "-" 로 초기화
+    - 페이지 번호도 위치가 증가하는 순서로만 조회 → 전진 커서
+    """
     chunks = []
 
-    # 정규식
-    chapter_re = re.compile(r"(제\d+장\s*[^\s]*)")
-    section_re = re.compile(r"(제\d+절\s*[^\s]*)")
-    article_re = re.compile(r"(제\d+조)\s*\((.*?)\)")
-    clause_re = re.compile(r"([①②③④⑤⑥⑦⑧⑨⑩])")
+    chapters = list(LAW_CHAPTER_RE.finditer(text))
+    sections = list(LAW_SECTION_RE.finditer(text))
+    articles = list(LAW_ARTICLE_RE.finditer(text))
 
-    # 현재 상태
     current_chapter = "-"
     current_section = "-"
-
-    # 텍스트 전체에서 모두 탐색
-    chapters = list(chapter_re.finditer(text))
-    sections = list(section_re.finditer(text))
-    articles = list(article_re.finditer(text))
-
-    # chapter & section 위치 인덱싱
-    chapter_positions = {m.start(): m.group(1) for m in chapters}
-    section_positions = {m.start(): m.group(1) for m in sections}
+    ci = si = pi = 0
+    INF = len(text) + 1
+
+    def page_at(pos: int):
+        nonlocal pi
+        while pi + 1 < len(page_starts) and page_starts[pi + 1] <= pos:
+            pi += 1
+        return page_nos[pi]
+
+    def emit(article, title, clause, body_text, abs_start, abs_end):
+        chunk = {
+            "strategy": "law",
+            "chapter": current_chapter,
+            "section": current_section,
+            "article": article,
+            "title": title,
+            "clause": clause,
+            "text": body_text
+        }
+        if page_starts:
+            chunk["page_no"] = page_at(abs_start)
+            chunk["page_end"] = page_at(max(abs_start, abs_end - 1))
+        chunks.append(chunk)
 
     # 각 조문(article) 순회
     for idx, art in enumerate(articles):
@@ -163,53 +205,41 @@ def parse_law_pdf_text(text: str) -> List[Dict]:
         start = art.end()
 
         # 다음 조문 시작 지점
-        end = articles[idx+1].start() if idx + 1 < len(articles) else len(text)
-
-        body = text[start:end].strip()
+        end = articles[idx + 1].start() if idx + 1 < len(articles) else len(text)
 
-        # 현재 조문 앞에 chapter/section이 있는지 확인
-        for pos in sorted(chapter_positions.keys()):
-            if pos < art.start():
-                current_chapter = chapter_positions[pos]
-            else:
+        # 현재 조문 앞의 장 / 절 heading 까지 커서 전진 (위치 순서대로)
+        while True:
+            next_c = chapters[ci].start() if ci < len(chapters) else INF
+            next_s = sections[si].start() if si < len(sections) else INF
+            if min(next_c, next_s) >= art.start():
                 break
-
-        for pos in sorted(section_positions.keys()):
-            if pos < art.start():
-                current_section = section_positions[pos]
+            if next_c <= next_s:
+                current_chapter = chapters[ci].group(1)
+                current_section = "-"
+                ci += 1
             else:
-                break
+                current_section = sections[si].group(1)
+                si += 1
 
-        # 항 분리
-        clauses = clause_re.split(body)
+        body = text[start:end]
+        marks = list(LAW_CLAUSE_RE.finditer(body))
 
         # 항이 없는 조문
-        if len(clauses) <= 1:
-            chunks.append({
-                "strategy": "law",
-                "chapter": current_chapter,
-                "section": current_section,
-                "article": article,
-                "title": title,
-                "clause": "-",
-                "text": body
-            })
+        if not marks:
+            emit(article, title, "-", body.strip(), art.start(), end)
             continue
 
-        # 항이 있는 조문
-        for i in range(1, len(clauses), 2):
-            clause_no = clauses[i]        # ①
-            clause_text = clauses[i+1].strip()  # 내용
-
-            chunks.append({
-                "strategy": "law",
-                "chapter": current_chapter,
-                "section": current_section,
-                "article": article,
-                "title": title,
-                "clause": clause_no,
-                "text": clause_text
-            })
+        # 항이 있는 조문 (첫 항 앞의 머리말은 기존과 같이 제외)
+        for j, m in enumerate(marks):
+            c_end = marks[j + 1].start() if j + 1 < len(marks) else len(body)
+            emit(
+                article,
+                title,
+                m.group(0),
+                body[m.end():c_end].strip(),
+                start + m.start(),
+                start + c_end
+            )
 
     return chunks
 
@@ -230,6 +260,13 @@ def chunk_column_record(text: str, cfg) -> List[Dict]:
     mapping = cfg.get("mapping", {})
     rows = [line.split(",") for line in text.splitlines() if line.strip()]
 
+    # 헤더 행 (값 == mapping 필드명) 은 데이터가 아님
+    if rows and all(
+        idx < len(rows[0]) and rows[0][idx].strip().lstrip("\ufeff") == k
+        for k, idx in mapping.items()
+    ):
+        rows = rows[1:]
+
     out = []
     for row in rows:
         obj = {k: (row[idx] if idx < len(row) else None)
@@ -244,30 +281,38 @@ def chunk_page(text: str) -> List[Dict]:
     return [{"strategy": "page", "text": text}]
 
 # ===== APPLY STRATEGY =====
+# 전략 이름 → chunk 함수 (config_store.CHUNK_STRATEGIES 와 일치)
+CHUNKERS = {
+    "law": lambda text, cfg: parse_law_pdf_text(text),
+    "category": lambda text, cfg: parse_category_structure(text),
+    "column_record": chunk_column_record,
+    "page": lambda text, cfg: chunk_page(text),
+    "regular": chunk_regular,
+}
+
 def get_chunk_strategy(file_name: str):
-    cfg = load_config()
-    ext = "pdf" if file_name.lower().endswith(".pdf") else "csv"
-    return cfg.get(ext, {}).get(file_name, cfg.get("default", {}))
+    return config_store.chunking().rule_for(file_name).cfg
 
 
 def apply_chunk_strategy(raw_text: str, file_name: str) -> List[Dict]:
-    cfg = get_chunk_strategy(file_name)
-    strategy = cfg.get("strategy", "regular")
-
-    if strategy == "law":
-        return parse_law_pdf_text(raw_text)
+    rule = config_store.chunking().rule_for(file_name)
+    return CHUNKERS[rule.strategy](raw_text, rule.cfg)
 
-    elif strategy == "category":
-        return parse_category_structure(raw_text)
-
-    elif strategy == "column_record":
-        return chunk_column_record(raw_text, cfg)
+def chunk_pdf_pages(pages: List[Dict], file_name: str) -> List[Dict]:
+    """
+    pdf_to_text_with_page 결과 → 청크 (page_no / strategy 포함)
+    - law: 문서 전체 1회 파싱 (조문이 페이지를 넘어가도 유지)
+    - 그 외: 페이지 단위 전략 적용
+    """
+    if config_store.chunking().rule_for(file_name).strategy == "law":
+        return parse_law_document(pages)
 
-    elif strategy == "page":
-        return chunk_page(raw_text)
+    chunks = []
+    for p in pages:
+        for c in apply_chunk_strategy(p["text"], file_name):
+            chunks.append({"page_no": p["page_no"], "strategy": c.get("strategy"), **c})
+    return chunks
 
-    else:
-        return chunk_regular(raw_text, cfg)
 
 def chunk_text_dynamic(text: str, file_name: str) -> List[Dict]:
     return apply_chunk_strategy(text, file_name)
@@ -5,10 +5,28 @@
 # - LLM 문장 정제 (LAW / ONNURI_KNOWLEDGE만)
 # - 출처 문자열 하단 표시 (LAW / ONNURI_KNOWLEDGE만)
 # - MERCHANT_DATA는 정형 필드 출력 + 출처/LLM 제외
+# - 점수 격차가 큰 경우 문장 추출(extractive)로 LLM 생략
+# - LLM 컨텍스트는 token budget 안에서 관련 문장만 선택 (context_builder)
 # --------------------------------------------------
 
-from typing import List, Dict, Any
-from langchain_ollama import OllamaLLM
+from typing import List, Dict, Any, Optional
+import hashlib
+import os
+import threading
+
+import numpy as np
+
+from vector_store import embed_query, embed_chunk_sentences
+from ranking import hybrid_scores
+from context_builder import build_context, split_sentences, estimate_tokens, CONTEXT_TOKEN_BUDGET
+from tracing import span
+from admission import lane, LLM
+from menu_index import breadcrumb
+
+
+# Ollama 서버 (벤치마크 / 다른 호스트 사용 시 OLLAMA_BASE_URL 로 변경)
+OLLAMA_MODEL = "timHan/llama3korean8B4QKM:latest"
+OLLAMA_BASE_URL = os.environ.get("OLLAMA_BASE_URL", "http://127.0.0.1:11434")
 
 
 # ===============================
@@ -42,13 +60,77 @@ ONNURI_PROMPT = """
 """
 
 
+# ===============================
+# 관련성 하한
+# ===============================
+# 검색 1위 dense 점수 (cosine) 가 이 값 미만이면 관련 문서 없음 → NO_MATCH (LLM 호출 없음)
+RELEVANCE_MIN_SCORE = float(os.environ.get("RAG_RELEVANCE_MIN_SCORE", "0.35"))
+
+NO_MATCH_ANSWER = "관련 정보를 찾을 수 없습니다."
+
+
+def no_match() -> Dict[str, Any]:
+    return {
+        "type": "NO_MATCH",
+        "answer": NO_MATCH_ANSWER,
+        "confidence": 0.0
+    }
+
+
+def is_relevant(candidates: List[Dict[str, Any]]) -> bool:
+    """후보 중 최고 score 가 RELEVANCE_MIN_SCORE 이상인지"""
+    return bool(candidates) and max(float(c.get("score", 0.0)) for c in candidates) >= RELEVANCE_MIN_SCORE
+
+
+# ===============================
+# Extractive 모드 기준값
+# ===============================
+# 1위 후보 dense 점수 하한 / 1위-2위 점수 격차 하한
+EXTRACTIVE_MIN_SCORE = 0.6
+EXTRACTIVE_MIN_MARGIN = 0.08
+# 문장 후보를 뽑을 상위 청크 수
+EXTRACTIVE_TOP_N = 2
+# 최종 문장의 질문 유사도 하한 (cosine)
+EXTRACTIVE_MIN_SENTENCE_SCORE = 0.5
+# 인접 문장을 span에 포함시키는 기준 (best 대비 비율)
+EXTRACTIVE_SPAN_RATIO = 0.9
+
+
 class AnswerFormatter:
-    def __init__(self):
-        self.llm = OllamaLLM(
-            model="timHan/llama3korean8B4QKM:latest",
-            base_url="http://127.0.0.1:11434",
-            max_tokens=200
-        )
+    def __init__(self, context_token_budget: int = CONTEXT_TOKEN_BUDGET):
+        # OllamaLLM 은 첫 사용 시 생성 (langchain import 비용을 기동 경로에서 제외)
+        self._llm = None
+        self._llm_lock = threading.Lock()
+        # LLM 생략 여부 집계 (요청 단위)
+        self._stats_lock = threading.Lock()
+        self.stats = {"extractive": 0, "llm": 0}
+
+        # LLM 컨텍스트 token budget + 프롬프트 토큰 집계
+        self.context_token_budget = context_token_budget
+        self.prompt_stats = {
+            "prompts": 0,
+            "estimated_tokens": 0,
+            "context_tokens": 0,
+            "prompt_eval_tokens": 0,
+            "deduplicated_sentences": 0,
+        }
+
+    @property
+    def llm(self):
+        if self._llm is None:
+            with self._llm_lock:
+                if self._llm is None:
+                    from langchain_ollama import OllamaLLM
+                    self._llm = OllamaLLM(
+                        model=OLLAMA_MODEL,
+                        base_url=OLLAMA_BASE_URL,
+                        max_tokens=200
+                    )
+        return self._llm
+
+    def load_llm(self):
+        """기동 시 백그라운드 예열용"""
+        return self.llm
 
     # ===============================
     # 메인 진입점
@@ -57,16 +139,14 @@ class AnswerFormatter:
         self,
         question: str,
         decision: Dict[str, Any],
-        candidates: List[Dict[str, Any]]
+        candidates: List[Dict[str, Any]],
+        llm_bounded: bool = True
     ) -> Dict[str, Any]:
+        """llm_bounded=False: LLM lane 대기열 상한 없이 대기 (일괄 처리 worker)"""
 
         # 1️⃣ 후보 없음
         if not candidates:
-            return {
-                "type": "NO_MATCH",
-                "answer": "관련 정보를 찾을 수 없습니다.",
-                "confidence": 0.0
-            }
+            return no_match()
 
         intent = decision.get("intent", "AMBIGUOUS")
         confidence = float(decision.get("confidence", 0.0))
@@ -82,6 +162,16 @@ class AnswerFormatter:
                 "confidence": confidence if confidence > 0 else 0.9
             }
 
+        # ===============================
+        # 2️⃣-1 SYSTEM_MENU: 메뉴 경로 + URL
+        # ===============================
+        if intent == "SYSTEM_MENU":
+            return {
+                "type": "SYSTEM_MENU",
+                "answer": self._format_menu(candidates),
+                "confidence": confidence
+            }
+
         # ===============================
         # 3️⃣ 기본 Answer 생성
         # ===============================
@@ -96,20 +186,64 @@ class AnswerFormatter:
             source_text = self._build_source_text(candidates)
 
         # ===============================
-        # 5️⃣ LLM 적용 (LAW / ONNURI만)
+        # 5️⃣ Extractive → LLM 적용 (LAW / ONNURI만)
         # ===============================
+        answer_mode = None
         if intent in ["LAW", "ONNURI_KNOWLEDGE"]:
-            answer_text = self._apply_llm(
-                question=question,
-                intent=intent,
-                sources=candidates
-            )
-
-        return {
+            with span("extractive"):
+                extracted = self._try_extractive(question, candidates)
+            if extracted:
+                answer_text = extracted
+                answer_mode = "extractive"
+            else:
+                answer_text = self._apply_llm(
+                    question=question,
+                    intent=intent,
+                    sources=candidates,
+                    bounded=llm_bounded
+                )
+                answer_mode = "llm"
+            self._count(answer_mode)
+
+        out = {
             "type": intent,
             "answer": (answer_text + source_text).strip(),
             "confidence": confidence
         }
+        if answer_mode:
+            out["answer_mode"] = answer_mode
+        return out
+
+    def get_stats(self) -> Dict[str, Any]:
+        """LLM 생략(extractive) 비율 조회"""
+        with self._stats_lock:
+            stats = dict(self.stats)
+        total = stats["extractive"] + stats["llm"]
+        stats["total"] = total
+        stats["llm_bypass_ratio"] = round(stats["extractive"] / total, 4) if total else 0.0
+
+        with self._stats_lock:
+            prompt = dict(self.prompt_stats)
+        n = prompt["prompts"]
+        prompt["avg_estimated_tokens"] = round(prompt["estimated_tokens"] / n, 1) if n else 0.0
+        prompt["avg_prompt_eval_tokens"] = round(prompt["prompt_eval_tokens"] / n, 1) if n else 0.0
+        prompt["context_token_budget"] = self.context_token_budget
+        stats["prompt"] = prompt
+        return stats
+
+    def _count(self, mode: str):
+        with self._stats_lock:
+            self.stats[mode] += 1
+
+    def _record_prompt(self, prompt: str, ctx_stats: Dict[str, Any], generation_info: Optional[Dict[str, Any]]):
+        """추정 토큰 수 + Ollama가 돌려준 실제 prompt_eval_count 누적"""
+        with self._stats_lock:
+            self.prompt_stats["prompts"] += 1
+            self.prompt_stats["estimated_tokens"] += estimate_tokens(prompt)
+            self.prompt_stats["context_tokens"] += ctx_stats.get("tokens", 0)
+            self.prompt_stats["deduplicated_sentences"] += ctx_stats.get("duplicates", 0)
+            if generation_info and generation_info.get("prompt_eval_count"):
+                self.prompt_stats["prompt_eval_tokens"] += int(generation_info["prompt_eval_count"])
 
     # ===============================
     # MERCHANT_DATA 정형 출력
@@ -147,6 +281,41 @@ class AnswerFormatter:
 
         return "\n".join(lines)
 
+    def _format_menu(self, candidates: List[Dict[str, Any]]) -> str:
+        """
+        메뉴 경로 (대메뉴 > 중메뉴 > 메뉴) + URL
+        - 메뉴 색인 결과는 동점 후보 모두, dense 결과는 1위만
+        """
+        top = candidates[0]
+        shown = [c for c in candidates if c.get("score") == top.get("score")] if top.get("breadcrumb") else [top]
+
+        blocks = []
+        for c in shown:
+            path = c.get("breadcrumb") or breadcrumb(c) or self._extract_answer_text(c)
+            blocks.append(path + (f"\n[페이지] {c['url']}" if c.get("url") else ""))
+        return "\n\n".join(blocks)
+
+    def format_law_article(self, chunks: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        조문 직접 조회 (law_index) 결과 → 원문 그대로 (임베딩 / LLM 없음)
+        - 항 1개: 본문만, 조문 전체: 항 기호를 붙여 순서대로
+        """
+        if len(chunks) == 1:
+            body, source = chunks[0].get("text", ""), chunks[0]
+        else:
+            body = "\n".join(
+                c.get("text", "") if c.get("clause") in (None, "-") else f"{c['clause']} {c.get('text', '')}"
+                for c in chunks
+            )
+            source = {**chunks[0], "clause": "-"}
+
+        return {
+            "type": "LAW",
+            "answer": (body + self._build_source_text([source])).strip(),
+            "confidence": 0.99,
+            "answer_mode": "article"
+        }
+
     # ===============================
     # 내부 유틸
     # ===============================
@@ -191,22 +360,79 @@ class AnswerFormatter:
 
         return "\n\n" + "\n".join(lines)
 
+    # ===============================
+    # Extractive 답변 (LLM 생략)
+    # ===============================
+    def _try_extractive(
+        self,
+        question: str,
+        candidates: List[Dict[str, Any]]
+    ) -> Optional[str]:
+        """
+        검색 점수 격차가 충분할 때만 상위 청크의 문장을 그대로 답변으로 사용
+        - 질의 벡터는 검색 단계의 캐시(embed_query)를 재사용
+        - 문장 벡터는 청크 hash 기준 LRU (vector_store.embed_chunk_sentences) → 처음 보는 청크만 encode
+        - 문장 점수 = dense(cosine) + BM25 가중합 (ranking.hybrid_scores)
+        - 조건 미달이면 None → LLM 사용
+        """
+        scores = [float(c.get("score", 0.0)) for c in candidates]
+        top = scores[0]
+        runner_up = max(scores[1:], default=0.0)
+        if top < EXTRACTIVE_MIN_SCORE or top - runner_up < EXTRACTIVE_MIN_MARGIN:
+            return None
+
+        chunks = []
+        for c in candidates[:EXTRACTIVE_TOP_N]:
+            text = c.get("text") or ""
+            sents = split_sentences(text)
+            if sents:
+                chunks.append((c.get("hash") or hashlib.md5(text.encode("utf-8")).hexdigest(), sents))
+        if not chunks:
+            return None
+
+        sentences = [sent for _, sents in chunks for sent in sents]
+        owners = [i for i, (_, sents) in enumerate(chunks) for _ in sents]
+
+        try:
+            q_vec = embed_query(question)[0]
+            dense = np.vstack(embed_chunk_sentences(chunks)) @ q_vec
+        except Exception:
+            return None
+
+        final = hybrid_scores(question, sentences, dense)
+        if final is None:
+            final = dense
+
+        best = int(np.argmax(final))
+        if dense[best] < EXTRACTIVE_MIN_SENTENCE_SCORE:
+            return None
+
+        # 같은 청크 안에서 best 문장 뒤로 점수가 비슷한 문장이 이어지면 한 span으로 반환
+        end = best + 1
+        while (
+            end < len(sentences)
+            and owners[end] == owners[best]
+            and final[end] >= final[best] * EXTRACTIVE_SPAN_RATIO
+        ):
+            end += 1
+
+        return " ".join(sentences[best:end])
+
     def _apply_llm(
         self,
         question: str,
         intent: str,
-        sources: List[Dict[str, Any]]
+        sources: List[Dict[str, Any]],
+        bounded: bool = True
     ) -> str:
 
-        context_parts = []
-        for c in sources[:2]:
-            parts = []
-            for k in ["article", "clause", "title", "text"]:
-                if c.get(k):
-                    parts.append(str(c.get(k)))
-            context_parts.append(" ".join(parts))
-
-        context = "\n".join(context_parts).strip()
+        # 상위 후보 문장 중 관련 문장만 budget 안에서 선택 (중복 제거 포함)
+        with span("llm_prompt"):
+            context, ctx_stats = build_context(
+                question,
+                sources,
+                token_budget=self.context_token_budget
+            )
         if not context:
             return sources[0].get("text", "")
 
@@ -221,9 +447,14 @@ class AnswerFormatter:
                 context=context
             )
 
-        try:
-            res = self.llm.generate([prompt])
-            text = res.generations[0][0].text.strip()
-            return text if text else sources[0].get("text", "")
-        except Exception:
-            return sources[0].get("text", "")
+        # LLM lane 포화 시 Overloaded (429) — 원문 fallback 으로 삼키지 않음
+        with lane(LLM).slot(bounded=bounded):
+            try:
+                with span("llm_generation"):
+                    res = self.llm.generate([prompt])
+                gen = res.generations[0][0]
+                self._record_prompt(prompt, ctx_stats, gen.generation_info)
+                text = gen.text.strip()
+                return text if text else sources[0].get("text", "")
+            except Exception:
+                return sources[0].get("text", "")
@@ -1,61 +1,201 @@
 # --------------------------------------------------
 # File: ~/RAG_Chatbot/Backend/intent_classifier.py
-# Description: 경량 규칙 기반 Intent 분류기 (실습용)
+# Description:
+# - 경량 규칙 기반 Intent 분류기
+# - intent_keywords.json (키워드 / 가중치) → 단일 정규식으로 컴파일
+# - 질문 1회 스캔으로 intent별 점수 계산, 파일 수정 시 자동 리로드
+# - intent별 예시 질문(examples)은 semantic_intent 프로토타입으로 사용
 # --------------------------------------------------
 
-def classify_intent(question: str) -> dict:
-    q = question.strip()
+from typing import Dict, Any, Tuple
+import os
+import re
+import json
+import math
+import threading
+import time
 
-    if not q:
-        return {"intent": "AMBIGUOUS", "confidence": 0.0, "scores": {}}
 
-    # ===== MERCHANT_DATA =====
-    merchant_keywords = [
-        "가맹점", "가맹주", "사업자번호", "가맹점코드"
-    ]
-    if any(k in q for k in merchant_keywords):
-        return {
-            "intent": "MERCHANT_DATA",
-            "confidence": 0.9,
-            "scores": {"MERCHANT_DATA": 0.9}
-        }
+BASE_DIR = os.path.join(os.path.expanduser("~"), "RAG_Chatbot")
+INTENT_KEYWORDS_PATH = os.path.join(BASE_DIR, "intent_keywords.json")
 
-    # ===== SYSTEM_MENU =====
-    menu_keywords = [
-        "메뉴", "페이지", "어디서", "경로", "화면", "링크"
-    ]
-    if any(k in q for k in menu_keywords):
-        return {
-            "intent": "SYSTEM_MENU",
-            "confidence": 0.9,
-            "scores": {"SYSTEM_MENU": 0.9}
-        }
+# 파일 mtime 확인 주기 (초) — 매 질문마다 stat 하지 않도록
+RELOAD_CHECK_INTERVAL = 1.0
 
-    # ===== LAW =====
-    law_keywords = [
-        "법", "법령", "조항", "기준", "시행령", "시행규칙"
-    ]
-    if any(k in q for k in law_keywords):
-        return {
-            "intent": "LAW",
-            "confidence": 0.9,
-            "scores": {"LAW": 0.9}
+# confidence = BASE + (1 - BASE) * (1위 점유율) * (1 - exp(-1위 점수 / SCALE))
+CONFIDENCE_BASE = 0.5
+CONFIDENCE_SCALE = 1.0
+
+# intent_keywords.json 이 없거나 깨졌을 때 사용하는 기본 규칙
+DEFAULT_KEYWORDS = {
+    "intents": {
+        "MERCHANT_DATA": {
+            "priority": 1,
+            "keywords": {"가맹점": 2.0, "가맹주": 2.0, "사업자번호": 3.0, "가맹점코드": 3.0}
+        },
+        "SYSTEM_MENU": {
+            "priority": 2,
+            "keywords": {"메뉴": 1.5, "페이지": 1.5, "어디서": 1.0, "경로": 1.0, "화면": 1.5, "링크": 1.5}
+        },
+        "LAW": {
+            "priority": 3,
+            "keywords": {"법": 0.5, "법령": 1.5, "조항": 1.5, "기준": 1.0, "시행령": 2.0, "시행규칙": 2.0}
+        },
+        "ONNURI_KNOWLEDGE": {
+            "priority": 4,
+            "keywords": {"온누리": 1.5, "상품권": 1.5, "지류": 1.0, "디지털": 1.0}
         }
+    }
+}
+
+
+# ===============================
+# 키워드 → trie 정규식
+# ===============================
+def _trie_pattern(words) -> str:
+    """
+    키워드 목록을 trie 형태의 정규식으로 변환
+    - 공통 접두사를 공유하므로 키워드 수천 개여도 위치당 분기 1회
+    - 더 긴 키워드가 우선 매칭 (가맹점코드 > 가맹점)
+    """
+    trie: Dict[str, Any] = {}
+    for w in words:
+        node = trie
+        for ch in w:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node) -> str:
+        alts = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not alts:
+            return ""
+        body = alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+        if "" in node:
+            body = "(?:" + body + ")?"
+        return body
+
+    return build(trie)
+
+
+class IntentMatcher:
+    """
+    intent_keywords.json 기반 컴파일 매처
+
+    컴파일 결과 (원자적으로 교체):
+    - pattern: 전체 키워드 단일 정규식
+    - weights: keyword → [(intent, weight), ...]
+    - priority: intent → 동점 시 우선순위 (작을수록 우선)
+    - examples: intent → 예시 질문 목록
+    """
+
+    def __init__(self, path: str = INTENT_KEYWORDS_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._checked_at = 0.0
+        self._compiled = self._compile(self._load())
+
+    # ===============================
+    # public
+    # ===============================
+    def classify(self, question: str) -> Dict[str, Any]:
+        q = question.strip().lower()
+
+        if not q:
+            return {"intent": "AMBIGUOUS", "confidence": 0.0, "scores": {}}
+
+        self._maybe_reload()
+        pattern, weights, priority, _ = self._compiled
+
+        raw: Dict[str, float] = {}
+        if pattern is not None:
+            for m in pattern.finditer(q):
+                for intent, w in weights[m.group(0)]:
+                    raw[intent] = raw.get(intent, 0.0) + w
+
+        if not raw:
+            return {"intent": "AMBIGUOUS", "confidence": 0.3, "scores": {}}
+
+        intent, top = min(raw.items(), key=lambda x: (-x[1], priority.get(x[0], 99)))
+        total = sum(raw.values())
+
+        share = top / total
+        strength = 1.0 - math.exp(-top / CONFIDENCE_SCALE)
+        confidence = CONFIDENCE_BASE + (1.0 - CONFIDENCE_BASE) * share * strength
 
-    # ===== ONNURI_KNOWLEDGE =====
-    onnuri_keywords = [
-        "온누리", "상품권", "지류", "디지털"
-    ]
-    if any(k in q for k in onnuri_keywords):
         return {
-            "intent": "ONNURI_KNOWLEDGE",
-            "confidence": 0.9,
-            "scores": {"ONNURI_KNOWLEDGE": 0.9}
+            "intent": intent,
+            "confidence": round(confidence, 4),
+            "scores": {k: round(v / total, 4) for k, v in raw.items()},
+            "raw_scores": raw
         }
 
-    # ===== fallback =====
-    return {
-        "intent": "AMBIGUOUS",
-        "confidence": 0.3,
-        "scores": {}
-    }
+    def examples(self) -> Tuple[Dict[str, list], int]:
+        """(intent → 예시 질문, 컴파일 버전) — 버전이 바뀌면 프로토타입 재계산"""
+        self._maybe_reload()
+        compiled = self._compiled
+        return compiled[3], id(compiled)
+
+    def reload(self):
+        """intent_keywords.json 수정 후 강제 리로드"""
+        with self._lock:
+            self._compiled = self._compile(self._load())
+
+    # ===============================
+    # internal
+    # ===============================
+    def _maybe_reload(self):
+        now = time.monotonic()
+        if now - self._checked_at < RELOAD_CHECK_INTERVAL:
+            return
+        self._checked_at = now
+
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            mtime = None
+
+        if mtime != self._mtime:
+            self.reload()
+
+    def _load(self) -> Dict[str, Any]:
+        try:
+            self._mtime = os.stat(self.path).st_mtime
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if isinstance(data.get("intents"), dict):
+                return data
+        except Exception:
+            pass
+        return DEFAULT_KEYWORDS
+
+    def _compile(self, cfg: Dict[str, Any]) -> Tuple[Any, Dict[str, list], Dict[str, int], Dict[str, list]]:
+        weights: Dict[str, list] = {}
+        priority: Dict[str, int] = {}
+        examples: Dict[str, list] = {}
+
+        for idx, (intent, icfg) in enumerate(cfg.get("intents", {}).items()):
+            priority[intent] = int(icfg.get("priority", idx + 1))
+            keywords = icfg.get("keywords", {})
+            # 리스트 형태도 허용 (가중치 1.0)
+            if isinstance(keywords, list):
+                keywords = {k: 1.0 for k in keywords}
+            for k, w in keywords.items():
+                k = str(k).strip().lower()
+                if k:
+                    weights.setdefault(k, []).append((intent, float(w)))
+            examples[intent] = [str(e) for e in icfg.get("examples", []) if str(e).strip()]
+
+        pattern = re.compile(_trie_pattern(weights.keys())) if weights else None
+        return pattern, weights, priority, examples
+
+
+_matcher = IntentMatcher()
+
+
+def classify_intent(question: str) -> dict:
+    return _matcher.classify(question)
+
+
+def intent_examples() -> Tuple[Dict[str, list], int]:
+    return _matcher.examples()
@@ -0,0 +1,116 @@
+# --------------------------------------------------
+# File: ~/RAG_Chatbot/Backend/law_index.py
+# Description:
+# - 법령 조문 구조 색인: (파일, 제N조[의M]) → 항(clause)별 청크
+#   · 현재 generation metadata 의 law 전략 청크 (file_handler 법령 파서 결과) 로 구성
+#   · generation 이 바뀌면 첫 조회 시 재구성 (vector_store.derived)
+# - 질문의 조문 참조 파싱: 법령명 (파일명 기준) / 제N조 · 제N조의M / ② · 제2항
+#   → 임베딩 / FAISS 없이 해당 조문 청크 반환
+# - 참조가 없거나 색인에 없는 조문이면 None → 기존 dense 검색
+#
+# 사용 예:
+#   lookup("전통시장법 시행령 제5조 ②")   # [청크 dict] | None
+# --------------------------------------------------
+
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+import re
+
+import config_store
+import vector_store
+
+
+LAW_INTENT = "LAW"
+
+ARTICLE_REF_RE = re.compile(r"제\s*(\d+)\s*조(?:\s*의\s*(\d+))?")
+# 조문 참조 바로 뒤의 항: "②" / "제2항" / "2항"
+CLAUSE_REF_RE = re.compile(r"\s*(?:([①-⑳])|제?\s*(\d+)\s*항)")
+CIRCLED = "①②③④⑤⑥⑦⑧⑨⑩⑪⑫⑬⑭⑮⑯⑰⑱⑲⑳"
+
+
+class LawRef(NamedTuple):
+    file_name: Optional[str]    # None = 법령명 언급 없음 (LAW 파일 순서대로 조회)
+    article: str                # "제5조" / "제26조의6"
+    clause: Optional[str]       # "②" / None = 조문 전체
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"[\s_]+", "", text)
+
+
+def _aliases(files: Sequence[str]) -> List[Tuple[str, str]]:
+    """
+    파일명 → 질문에서 찾을 법령명 (긴 것 우선)
+    - "전통시장법_시행령.pdf" → "전통시장법시행령", "시행령" (다른 파일과 겹치지 않을 때)
+    """
+    out: Dict[str, Optional[str]] = {}
+    for f in files:
+        stem = f.rsplit(".", 1)[0]
+        names = {_normalize(stem)}
+        if "_" in stem:
+            names.add(_normalize(stem.rsplit("_", 1)[1]))
+        for name in names:
+            out[name] = f if out.get(name, f) == f else None
+    return sorted(((n, f) for n, f in out.items() if f), key=lambda x: -len(x[0]))
+
+
+def parse_reference(question: str, files: Sequence[str]) -> Optional[LawRef]:
+    m = ARTICLE_REF_RE.search(question)
+    if m is None:
+        return None
+
+    article = f"제{int(m.group(1))}조" + (f"의{int(m.group(2))}" if m.group(2) else "")
+
+    clause = None
+    c = CLAUSE_REF_RE.match(question, m.end())
+    if c is not None:
+        if c.group(1):
+            clause = c.group(1)
+        elif 1 <= int(c.group(2)) <= len(CIRCLED):
+            clause = CIRCLED[int(c.group(2)) - 1]
+
+    q = _normalize(question)
+    file_name = next((f for name, f in _aliases(files) if name in q), None)
+    return LawRef(file_name, article, clause)
+
+
+# ===============================
+# 구조 색인 (generation 당 1개)
+# ===============================
+class LawIndex:
+    def __init__(self, meta):
+        self.meta = meta
+        self.articles: Dict[Tuple[str, str], List[Tuple[str, int]]] = {}
+
+        flt = meta.id_filter("law")
+        ids = range(len(meta)) if flt is None else flt.ids
+        for i in ids:
+            chunk = meta[int(i)]
+            if chunk.get("strategy") != "law" or not chunk.get("article"):
+                continue
+            key = (chunk.get("file_name"), re.sub(r"\s+", "", chunk["article"]))
+            self.articles.setdefault(key, []).append((chunk.get("clause") or "-", int(i)))
+
+    def find(self, ref: LawRef, files: Sequence[str]) -> List[dict]:
+        for f in ([ref.file_name] if ref.file_name else files):
+            clauses = self.articles.get((f, ref.article))
+            if not clauses:
+                continue
+            ids = [i for clause, i in clauses if ref.clause is None or clause == ref.clause]
+            return [{**self.meta[i], "score": 1.0, "matched_by": ["law.article"]} for i in ids]
+        return []
+
+
+def lookup(question: str) -> Optional[List[dict]]:
+    """질문의 조문 참조 → 해당 조문 청크 (항 지정 시 그 항만), 없으면 None"""
+    profile = config_store.profiles().get(LAW_INTENT)
+    if profile is None or not profile.file_list:
+        return None
+
+    ref = parse_reference(question, profile.file_list)
+    if ref is None:
+        return None
+
+    index = vector_store.derived("law_index", LawIndex)
+    if index is None:
+        return None
+    return index.find(ref, profile.file_list) or None
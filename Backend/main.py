@@ -3,30 +3,85 @@
 # Description: FastAPI 기반 RAG 서버 메인 Entry Point
 # --------------------------------------------------
 
-from fastapi import FastAPI, UploadFile, File, Query
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, UploadFile, File, Query, Header
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Optional, List, Dict, Any
+from contextlib import asynccontextmanager
 import os
 import json
 from datetime import datetime
 import uuid
+import hmac
 import threading
 import time
 
+import anyio
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 
-from file_handler import pdf_to_text_with_page, csv_to_text, apply_chunk_strategy
-from vector_store import save_faiss, load_faiss_into_memory
+from file_handler import pdf_to_text_with_page, csv_to_text, apply_chunk_strategy, chunk_pdf_pages, read_delta_csv
+from vector_store import save_faiss, load_embedder, load_index
+import merchant_table
 
 # ✅ 앞으로 RAG 진입점은 rag_pipeline로 통일 (rag_service 대체)
-from rag_pipeline import rag_query
+from rag_pipeline import rag_query, rag_query_batch, answer_stats, invalidate_answer_cache, load_llm, load_intent_prototypes
+from cache_warmup import warm_up_local, DEFAULT_TOP, DEFAULT_CONCURRENCY
+from tracing import render_prometheus
+import startup
+from startup import ComponentNotReady
+import admission
+from admission import Overloaded
+import profiler
+from profiler import ProfilerBusy
+
+# ===== 서버 시작: 무거운 구성요소는 백그라운드 병렬 로드 (준비 상태는 /ready) =====
+startup.start(
+    {
+        "model": load_embedder,
+        "index": load_index,
+        "llm": load_llm,
+        "intent_prototypes": load_intent_prototypes,
+        "merchant_table": merchant_table.load,
+    },
+    # merchant_table: 구버전 인덱스의 CSV 행 이관이 index 단계에서 끝난 뒤 로드
+    after={"intent_prototypes": ("model", "index"), "merchant_table": ("index",)}
+)
+
+# ===== 동기 endpoint threadpool =====
+# retrieval / llm lane 이 (실행 + 대기열) 만큼 스레드를 붙잡아도 lookup 용 스레드가 남도록 크기 설정
+THREADPOOL_SIZE = int(os.environ.get(
+    "RAG_THREADPOOL_SIZE",
+    max(40, admission.lane("retrieval").capacity + admission.lane("llm").capacity + admission.lane("lookup").concurrency)
+))
+
+@asynccontextmanager
+async def lifespan(app):
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+    yield
+
+app = FastAPI(lifespan=lifespan)
+
+# 준비 안 된 구성요소가 필요한 요청 → 503 + Retry-After
+STARTUP_RETRY_AFTER = os.environ.get("RAG_STARTUP_RETRY_AFTER", "2")
+
+@app.exception_handler(ComponentNotReady)
+def component_not_ready_handler(request, exc: ComponentNotReady):
+    return JSONResponse(
+        {"error": str(exc), "component": exc.component, "startup": startup.report()},
+        status_code=503,
+        headers={"Retry-After": STARTUP_RETRY_AFTER}
+    )
 
-# ===== 서버 시작 시 FAISS 로드 =====
-load_faiss_into_memory()
-app = FastAPI()
+# admission lane 포화 → 429 + Retry-After (대기열에 쌓지 않고 즉시 거절)
+@app.exception_handler(Overloaded)
+def overloaded_handler(request, exc: Overloaded):
+    return JSONResponse(
+        {"error": str(exc), "lane": exc.lane, "reason": exc.reason},
+        status_code=429,
+        headers={"Retry-After": admission.RETRY_AFTER}
+    )
 
 # ===== CORS 설정 =====
 app.add_middleware(
@@ -44,6 +99,18 @@ CHAT_HISTORY_DIR = os.path.join(BASE_DIR, "chat_history_sessions")
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 os.makedirs(CHAT_HISTORY_DIR, exist_ok=True)
 
+# ===== 관리자 인증 (쓰기 / 운영 endpoint) =====
+# X-Admin-Token 헤더로 인증 — RAG_ADMIN_TOKEN 미설정 시 /admin/* · 가맹점 변경 비활성 (404)
+ADMIN_TOKEN = os.environ.get("RAG_ADMIN_TOKEN", "")
+
+def _admin_denied(token: Optional[str]):
+    """관리자 토큰 확인 — 통과 시 None, 아니면 오류 응답"""
+    if not ADMIN_TOKEN:
+        return JSONResponse({"error": "admin endpoints disabled (RAG_ADMIN_TOKEN not set)"}, status_code=404)
+    if not token or not hmac.compare_digest(token.encode("utf-8"), ADMIN_TOKEN.encode("utf-8")):
+        return JSONResponse({"error": "forbidden"}, status_code=403)
+    return None
+
 # ===== 세션 저장 파일 경로 =====
 def get_session_file(session_id: str):
     return os.path.join(CHAT_HISTORY_DIR, f"{session_id}.json")
@@ -52,6 +119,17 @@ def get_session_file(session_id: str):
 class Question(BaseModel):
     question: str
 
+class QuestionBatch(BaseModel):
+    questions: List[str]
+    forced_intent: Optional[str] = None
+
+class MerchantUpsert(BaseModel):
+    records: List[Dict[str, Any]]
+    file_name: Optional[str] = None
+
+class MerchantDelete(BaseModel):
+    codes: List[str]
+
 class SystemMessage(BaseModel):
     session_id: str
     role: str   # "user" | "bot"
@@ -65,9 +143,16 @@ class SystemMessage(BaseModel):
 def read_root():
     return {"status": "ok"}
 
+# ===== 준비 상태 (구성요소별 로드 상태 / 소요 시간) =====
+@app.get("/ready")
+def ready():
+    report = startup.report()
+    return JSONResponse({**report, "lanes": admission.report()}, status_code=200 if report["ready"] else 503)
+
 # ===== 파일 업로드 + 임베딩 =====
 @app.post("/upload_file")
 async def upload_file(file: UploadFile = File(...)):
+    startup.require("model", "index")
     try:
         file_path = os.path.join(UPLOAD_DIR, file.filename)
         with open(file_path, "wb") as f:
@@ -76,19 +161,63 @@ async def upload_file(file: UploadFile = File(...)):
         chunks = []
         if file.filename.lower().endswith(".pdf"):
             pages = pdf_to_text_with_page(file_path, file.filename)
-            for p in pages:
-                for c in apply_chunk_strategy(p["text"], file.filename):
-                    chunks.append({"page_no": p["page_no"], "strategy": c.get("strategy"), **c})
+            chunks = chunk_pdf_pages(pages, file.filename)
         else:
             text = csv_to_text(file_path)
             for c in apply_chunk_strategy(text, file.filename):
                 chunks.append({"page_no": "-", "strategy": c.get("strategy"), **c})
 
         save_faiss(chunks, file_name=file.filename)
+        invalidate_answer_cache(file.filename)
         return {"filename": file.filename, "status": "업로드 + 임베딩 완료", "chunks": len(chunks)}
     except Exception as e:
         return JSONResponse({"error": str(e)}, status_code=500)
 
+# ===== 가맹점 레코드 변경 (가맹점코드 기준, 전체 재적재 없음 / 관리자 전용) =====
+@app.post("/merchants/upsert")
+def merchants_upsert(data: MerchantUpsert, x_admin_token: Optional[str] = Header(None)):
+    denied = _admin_denied(x_admin_token)
+    if denied:
+        return denied
+    startup.require("merchant_table")
+    try:
+        return merchant_table.upsert(data.records, file_name=data.file_name)
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+
+@app.post("/merchants/delete")
+def merchants_delete(data: MerchantDelete, x_admin_token: Optional[str] = Header(None)):
+    denied = _admin_denied(x_admin_token)
+    if denied:
+        return denied
+    startup.require("merchant_table")
+    return merchant_table.delete(data.codes)
+
+@app.post("/merchants/delta")
+async def merchants_delta(
+    file: UploadFile = File(...),
+    file_name: str = Query(None),
+    x_admin_token: Optional[str] = Header(None)
+):
+    """헤더 포함 delta CSV (변경된 가맹점만, op 열 = delete 면 삭제)"""
+    denied = _admin_denied(x_admin_token)
+    if denied:
+        return denied
+    startup.require("merchant_table")
+    try:
+        rows = read_delta_csv((await file.read()).decode("utf-8-sig"))
+        return {"rows": len(rows), **merchant_table.apply_delta(rows, file_name=file_name)}
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+
+@app.get("/merchants/{code}")
+def merchants_get(code: str):
+    startup.require("merchant_table")
+    row = merchant_table.get(code)
+    if row is None:
+        return JSONResponse({"error": f"가맹점코드 {code} 없음"}, status_code=404)
+    return row
+
 # ===== WATCHER =====
 class FileWatcher(FileSystemEventHandler):
     def on_created(self, event):
@@ -102,21 +231,24 @@ class FileWatcher(FileSystemEventHandler):
         print(f"[WATCHER] 새 파일 감지: {event.src_path}")
         time.sleep(0.5)
 
+        if not startup.wait("model", "index"):
+            print(f"[WATCHER] 모델 / 인덱스 로드 실패 — 자동 임베딩 생략: {event.src_path}")
+            return
+
         try:
             filename = os.path.basename(event.src_path)
             chunks = []
 
             if filename.lower().endswith(".pdf"):
                 pages = pdf_to_text_with_page(event.src_path, filename)
-                for p in pages:
-                    for c in apply_chunk_strategy(p["text"], filename):
-                        chunks.append({"page_no": p["page_no"], "strategy": c.get("strategy"), **c})
+                chunks = chunk_pdf_pages(pages, filename)
             else:
                 text = csv_to_text(event.src_path)
                 for c in apply_chunk_strategy(text, filename):
                     chunks.append({"page_no": "-", "strategy": c.get("strategy"), **c})
 
             save_faiss(chunks, file_name=filename)
+            invalidate_answer_cache(filename)
             print(f"[WATCHER] {filename} 자동 임베딩 완료 (chunks={len(chunks)})")
         except Exception as e:
             print(f"[WATCHER] 자동 임베딩 오류: {e}")
@@ -135,6 +267,34 @@ def start_watcher():
 
 threading.Thread(target=start_watcher, daemon=True).start()
 
+# ===== 캐시 예열 (선택: RAG_WARMUP_ON_STARTUP=1) =====
+warmup_report = {"status": "disabled"}
+
+def run_warmup():
+    global warmup_report
+    warmup_report = {"status": "waiting_startup"}
+    startup.wait()
+    warmup_report = {"status": "running"}
+    try:
+        warmup_report = {
+            "status": "done",
+            **warm_up_local(
+                top=int(os.environ.get("RAG_WARMUP_TOP", DEFAULT_TOP)),
+                concurrency=int(os.environ.get("RAG_WARMUP_CONCURRENCY", DEFAULT_CONCURRENCY))
+            )
+        }
+    except Exception as e:
+        warmup_report = {"status": "error", "error": str(e)}
+        print(f"[WARMUP] 캐시 예열 오류: {e}")
+
+if os.environ.get("RAG_WARMUP_ON_STARTUP") == "1":
+    threading.Thread(target=run_warmup, daemon=True).start()
+
+@app.get("/cache_warmup")
+def cache_warmup_report():
+    """기동 시 캐시 예열 결과"""
+    return warmup_report
+
 # ===== 세션 생성 =====
 @app.post("/new_chat_session")
 def new_chat_session():
@@ -178,14 +338,82 @@ def save_system_message(data: SystemMessage):
 def rag_query_api(
     q: Question,
     session_id: str = Query(None),
-    forced_intent: str = Query(None)
+    forced_intent: str = Query(None),
+    debug: bool = Query(False)
 ):
     return rag_query(
         question=q.question,
         session_id=session_id,
-        forced_intent=forced_intent
+        forced_intent=forced_intent,
+        debug=debug
     )
 
+# ===== RAG QUERY (일괄) =====
+@app.post("/rag_query_batch")
+def rag_query_batch_api(data: QuestionBatch, debug: bool = Query(False)):
+    """질문 목록 일괄 처리 — 결과는 입력 순서 (세션 컨텍스트 없음)"""
+    try:
+        return rag_query_batch(data.questions, forced_intent=data.forced_intent, debug=debug)
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+
+# ===== 지표 (Prometheus text format) =====
+@app.get("/metrics")
+def metrics():
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
+# ===== 답변 모드 통계 =====
+@app.get("/answer_stats")
+def answer_stats_api():
+    """LLM을 생략한(extractive) 요청 수 / 비율"""
+    return answer_stats()
+
+# ===== On-demand 프로파일링 (관리자 전용) =====
+@app.post("/admin/profile")
+def profile_start(
+    requests: Optional[int] = Query(None),
+    seconds: Optional[float] = Query(None),
+    interval_ms: Optional[float] = Query(None),
+    wait: bool = Query(False),
+    x_admin_token: Optional[str] = Header(None)
+):
+    """
+    다음 requests 건 / seconds 초 동안 stack sampling 시작 (먼저 오는 쪽에서 종료)
+    - wait=true: 세션이 끝날 때까지 기다려 결과 반환
+    """
+    denied = _admin_denied(x_admin_token)
+    if denied:
+        return denied
+    try:
+        session = profiler.start(requests=requests, seconds=seconds, interval_ms=interval_ms)
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    except ProfilerBusy as e:
+        return JSONResponse({"error": str(e), **profiler.report()}, status_code=409)
+
+    if wait:
+        session.done.wait(session.seconds + 1)
+    return session.report()
+
+@app.get("/admin/profile")
+def profile_report(format: str = Query("json"), x_admin_token: Optional[str] = Header(None)):
+    """실행 중 / 마지막 세션 결과 — format=collapsed 이면 flamegraph 용 collapsed stack (text)"""
+    denied = _admin_denied(x_admin_token)
+    if denied:
+        return denied
+    if format == "collapsed":
+        session = profiler.current()
+        return PlainTextResponse(session.collapsed() if session else "")
+    return profiler.report()
+
+@app.delete("/admin/profile")
+def profile_stop(x_admin_token: Optional[str] = Header(None)):
+    denied = _admin_denied(x_admin_token)
+    if denied:
+        return denied
+    profiler.stop()
+    return profiler.report()
+
 # ===== 유틸 함수 추가 =====
 def extract_merchant_fields(text: str) -> dict:
     """
@@ -0,0 +1,181 @@
+# --------------------------------------------------
+# File: ~/RAG_Chatbot/Backend/menu_index.py
+# Description:
+# - SYSTEM_MENU 메뉴 색인: 대메뉴(title) → 중메뉴(subtitle) → 메뉴(item) + URL
+#   · 현재 generation metadata 의 category 전략 청크 (parse_category_structure 결과) 로 구성
+#   · trie: 질문 안에 들어 있는 메뉴 이름을 위치마다 1회 전진으로 모두 찾기 / 접두어 조회
+#   · bigram 색인: 메뉴 이름 일부 ("수기 등록") 로 조회
+# - 임베딩 / FAISS 없이 breadcrumb (대메뉴 > 중메뉴 > 메뉴) + URL 반환, 못 찾으면 None → dense 검색
+#
+# 사용 예:
+#   lookup("구역관리 메뉴 어디야")   # MenuMatch(entries=[...], exact=True) | None
+# --------------------------------------------------
+
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+import re
+
+import vector_store
+
+
+MENU_INTENT = "SYSTEM_MENU"
+
+# 동점 후보가 이보다 많으면 특정 불가 → dense 검색
+MENU_MAX_RESULTS = 5
+
+TITLE, SUBTITLE, ITEM = 0, 1, 2
+# 메뉴 이름 일치 점수 = 단계 가중치 × 이름 길이 (구체적인 메뉴 우선)
+LEVEL_WEIGHT = {TITLE: 1, SUBTITLE: 2, ITEM: 3}
+
+# 메뉴 이름을 빼고 남아도 "메뉴 이름만 물은 질문" 으로 보는 표현
+MENU_FILLER_RE = re.compile(
+    r"메뉴|화면|페이지|경로|링크|주소|위치|어디서|어디에|어디야|어디|어떻게|가는|가려면|들어가|방법|"
+    r"알려줘|알려주세요|찾아줘|찾아|보여줘|있어|있나요|있습니까|입니까|인가요|요|[은는이가을를에의로]"
+)
+PARTICLE_RE = re.compile(r"(?:에서|으로|은|는|이|가|을|를|에|의|로)$")
+
+
+class MenuEntry(NamedTuple):
+    title: str
+    subtitle: str
+    item: str
+    url: str
+    chunk: dict     # 색인을 만든 generation 의 metadata 행
+
+    def breadcrumb(self) -> str:
+        return breadcrumb(self.chunk)
+
+
+class MenuMatch(NamedTuple):
+    entries: List[MenuEntry]
+    exact: bool     # 질문이 메뉴 이름 (+ "메뉴 어디야" 같은 표현) 뿐인지
+
+
+def breadcrumb(chunk: dict) -> str:
+    """대메뉴 > 중메뉴 > 메뉴 (연속 중복 이름은 1번)"""
+    parts: List[str] = []
+    for p in (chunk.get("title"), chunk.get("subtitle"), chunk.get("text")):
+        if p and (not parts or parts[-1] != p):
+            parts.append(p)
+    return " > ".join(parts)
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"[\W_]+", "", text or "").lower()
+
+
+# ===============================
+# 색인 (generation 당 1개)
+# ===============================
+class MenuIndex:
+    def __init__(self, meta):
+        self.entries: List[MenuEntry] = []
+        self.trie: Dict[str, dict] = {}
+        self.grams: Dict[str, Set[str]] = {}
+        self.names: Dict[str, List[Tuple[int, int]]] = {}   # 이름 → [(단계, entry 번호)]
+
+        flt = meta.id_filter("category")
+        for i in (range(len(meta)) if flt is None else flt.ids):
+            chunk = meta[int(i)]
+            if chunk.get("strategy") != "category" or not chunk.get("text"):
+                continue
+            entry = MenuEntry(chunk.get("title") or "", chunk.get("subtitle") or "", chunk["text"], chunk.get("url") or "", chunk)
+            n = len(self.entries)
+            self.entries.append(entry)
+            for level, name in ((TITLE, entry.title), (SUBTITLE, entry.subtitle), (ITEM, entry.item)):
+                self._add(_normalize(name), level, n)
+
+    def _add(self, name: str, level: int, n: int):
+        if not name:
+            return
+        if name not in self.names:
+            node = self.trie
+            for ch in name:
+                node = node.setdefault(ch, {})
+            node[""] = name
+            for g in {name[j:j + 2] for j in range(max(1, len(name) - 1))}:
+                self.grams.setdefault(g, set()).add(name)
+        self.names.setdefault(name, []).append((level, n))
+
+    # ===============================
+    # 조회
+    # ===============================
+    def lookup(self, question: str) -> Optional[MenuMatch]:
+        q = _normalize(question)
+        if not q:
+            return None
+
+        spans = self._spans(q)
+        if spans:
+            scores: Dict[int, float] = {}
+            for start, end, name in spans:
+                for level, n in self.names[name]:
+                    scores[n] = scores.get(n, 0.0) + LEVEL_WEIGHT[level] * (end - start)
+            residual = "".join(ch for j, ch in enumerate(q) if not any(s <= j < e for s, e, _ in spans))
+            return self._best(scores, exact=not MENU_FILLER_RE.sub("", residual))
+
+        return self._partial(question)
+
+    def _spans(self, q: str) -> List[Tuple[int, int, str]]:
+        """질문 안의 메뉴 이름 위치 (다른 일치에 포함되는 짧은 일치는 제외)"""
+        found = []
+        for start in range(len(q)):
+            node = self.trie
+            for j in range(start, len(q)):
+                node = node.get(q[j])
+                if node is None:
+                    break
+                if "" in node:
+                    found.append((start, j + 1, node[""]))
+        return [
+            (s, e, name) for s, e, name in found
+            if not any(s2 <= s and e <= e2 and (e2 - s2) > (e - s) for s2, e2, _ in found)
+        ]
+
+    def _partial(self, question: str) -> Optional[MenuMatch]:
+        """메뉴 이름 일부 / 접두어 — 모든 토큰을 포함하는 메뉴만"""
+        tokens = []
+        for t in question.split():
+            t = _normalize(PARTICLE_RE.sub("", t))
+            if len(t) >= 2 and not MENU_FILLER_RE.fullmatch(t):
+                tokens.append(t)
+        if not tokens:
+            return None
+
+        scores: Optional[Dict[int, float]] = None
+        for t in tokens:
+            hit: Dict[int, float] = {}
+            for name in self._containing(t):
+                for level, n in self.names[name]:
+                    hit[n] = max(hit.get(n, 0.0), LEVEL_WEIGHT[level] * len(t) / len(name))
+            scores = hit if scores is None else {n: s + hit[n] for n, s in scores.items() if n in hit}
+            if not scores:
+                return None
+        return self._best(scores, exact=False)
+
+    def _containing(self, token: str) -> Set[str]:
+        grams = [token[j:j + 2] for j in range(max(1, len(token) - 1))]
+        candidates = set.intersection(*(self.grams.get(g, set()) for g in grams))
+        return {name for name in candidates if token in name}
+
+    def _best(self, scores: Dict[int, float], exact: bool) -> Optional[MenuMatch]:
+        if not scores:
+            return None
+        top = max(scores.values())
+        best = [n for n in sorted(scores) if scores[n] >= top - 1e-9]
+        if len(best) > MENU_MAX_RESULTS:
+            return None
+        return MenuMatch([self.entries[n] for n in best], exact)
+
+
+def lookup(question: str) -> Optional[MenuMatch]:
+    index = vector_store.derived("menu_index", MenuIndex)
+    return index.lookup(question) if index is not None else None
+
+
+def candidates(match: MenuMatch) -> List[dict]:
+    """SearchEngine / formatter 용 결과 dict (FAISS 결과와 같은 형식 + breadcrumb)"""
+    kind = "exact" if match.exact else "partial"
+    return [
+        {**e.chunk, "breadcrumb": e.breadcrumb(), "score": 1.0 if match.exact else 0.8, "matched_by": [f"menu.{kind}"]}
+        for e in match.entries
+    ]
@@ -0,0 +1,630 @@
+# --------------------------------------------------
+# File: ~/RAG_Chatbot/Backend/merchant_table.py
+# Description:
+# - 가맹점 CSV (column_record) 전용 열 단위(columnar) 테이블
+#   · 임베딩 / FAISS 에 넣지 않음 (가맹점 조회는 필드 매칭만 사용)
+#   · 열마다 사전(dictionary) 인코딩: 고유 문자열 1회 저장 + 행별 코드 배열
+#     (고유값 수에 따라 uint8 / uint16 / int32 → Y/N 열은 행당 1byte)
+#   · 조회 인덱스: 열별 값 → 코드 (hash) + 코드 → 행 번호 (CSR posting)
+# - 가맹점코드 기준 upsert / delete → 해당 행과 조회 인덱스만 제자리 갱신
+#   · posting 변경분은 overlay(dict) 에만 기록 → 변경 비용 = delta 크기
+# - 저장
+#   · faiss_db/merchant_table.npz         ← 스냅샷 (tmp 작성 후 os.replace)
+#   · faiss_db/merchant_table.<epoch>.journal ← 스냅샷 이후 upsert / delete (JSON 1줄 = 1건)
+#   · journal 이 커지면 스냅샷으로 압축 (compaction)
+#   → 다른 worker 는 스냅샷 교체 / journal 추가분을 주기적으로 확인해 반영
+# --------------------------------------------------
+
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+import bisect
+import glob
+import json
+import os
+import threading
+import time
+import fcntl
+from contextlib import contextmanager
+
+import numpy as np
+
+from tracing import register_collector, describe
+
+
+# ===== 경로 설정 =====
+BASE_DIR = os.path.join(os.path.expanduser("~"), "RAG_Chatbot")
+DB_DIR = os.path.join(BASE_DIR, "faiss_db")
+TABLE_PATH = os.path.join(DB_DIR, "merchant_table.npz")
+LOCK_PATH = os.path.join(DB_DIR, ".merchant_table.lock")
+
+# chunk_column_record 가 붙이는 strategy → 이 테이블로 적재
+TABLE_STRATEGY = "csv"
+
+# upsert / delete 기준 키
+KEY_FIELD = "가맹점코드"
+# 가맹점 조회에 사용할 필드만 (조회 인덱스 대상)
+KEY_FIELDS = [KEY_FIELD, "가맹점명", "사업자등록번호"]
+# 행 값이 아닌 chunk / 요청 필드
+RESERVED_FIELDS = ("file_name", "strategy", "page_no", "id", "hash", "op")
+
+# 신규 가맹점 upsert 시 file_name 미지정이면 이 파일 소속 (doc_profiles MERCHANT_DATA files 중 하나)
+DEFAULT_FILE = os.environ.get("RAG_MERCHANT_FILE", "가맹점정보.csv")
+
+# 다른 worker 가 저장한 테이블 반영 주기 (초)
+POLL_SECONDS = float(os.environ.get("RAG_GENERATION_POLL_SECONDS", "1.0"))
+# journal 이 max(이 값, 행 수 / 4) 건을 넘으면 스냅샷으로 압축
+COMPACT_MIN_OPS = int(os.environ.get("RAG_MERCHANT_COMPACT_OPS", "10000"))
+
+
+def is_table_row(chunk: dict) -> bool:
+    return chunk.get("strategy") == TABLE_STRATEGY
+
+
+def _code_dtype(cardinality: int):
+    if cardinality <= 1 << 8:
+        return np.uint8
+    if cardinality <= 1 << 16:
+        return np.uint16
+    return np.int32
+
+
+class _Column:
+    """
+    사전 인코딩 열: values[codes[i]] = i 번째 행 값
+    - indexed=True 면 코드 → 행 번호 posting 유지 (CSR + 변경분 overlay)
+    """
+
+    __slots__ = ("values", "codes", "lookup", "indexed", "_order", "_starts", "_overlay", "_scan")
+
+    def __init__(self, values: List[str], codes: np.ndarray, indexed: bool = False):
+        self.values = values
+        self.codes = codes
+        self.lookup = {v: c for c, v in enumerate(values)}
+        self.indexed = indexed
+        self._order = self._starts = None
+        # CSR 구성 이후 바뀐 코드만: 코드 → 정렬된 행 번호
+        self._overlay: Dict[int, List[int]] = {}
+        # partial 검색용 고유값 배열 (values 가 늘면 다시 생성)
+        self._scan: Optional[np.ndarray] = None
+        if indexed:
+            self._order = np.argsort(codes, kind="stable").astype(np.int32)
+            self._starts = np.searchsorted(codes[self._order], np.arange(len(values) + 1))
+
+    @classmethod
+    def encode(cls, raw: Iterable[str], indexed: bool = False) -> "_Column":
+        intern: Dict[str, int] = {}
+        codes = [intern.setdefault(v, len(intern)) for v in raw]
+        return cls(list(intern), np.asarray(codes, dtype=_code_dtype(len(intern))), indexed)
+
+    # ===============================
+    # posting
+    # ===============================
+    def rows_of_code(self, code: int):
+        rows = self._overlay.get(code)
+        if rows is not None:
+            return rows
+        if code + 1 < len(self._starts):
+            return self._order[self._starts[code]:self._starts[code + 1]]
+        return ()
+
+    def rows_of(self, codes: Iterable[int]) -> np.ndarray:
+        parts = [np.asarray(self.rows_of_code(c), dtype=np.int32) for c in codes]
+        return np.concatenate(parts) if parts else np.empty(0, dtype=np.int32)
+
+    def containing(self, tokens: List[str]) -> np.ndarray:
+        """토큰 중 하나라도 포함하는 고유값 코드 (사전 전체를 numpy 로 1회 스캔)"""
+        if self._scan is None or len(self._scan) != len(self.values):
+            self._scan = np.asarray(self.values, dtype=str)
+        hit = np.zeros(len(self._scan), dtype=bool)
+        for t in tokens:
+            hit |= np.char.find(self._scan, t) >= 0
+        return np.flatnonzero(hit)
+
+    def _post(self, code: int, i: int):
+        rows = [int(r) for r in self.rows_of_code(code)]
+        bisect.insort(rows, i)
+        self._overlay[code] = rows
+
+    def _unpost(self, code: int, i: int):
+        rows = [int(r) for r in self.rows_of_code(code) if r != i]
+        self._overlay[code] = rows
+
+    # ===============================
+    # 변경 (행 단위)
+    # ===============================
+    def intern(self, v: str) -> int:
+        code = self.lookup.get(v)
+        if code is None:
+            code = len(self.values)
+            self.values.append(v)
+            self.lookup[v] = code
+            if code > np.iinfo(self.codes.dtype).max:
+                self.codes = self.codes.astype(_code_dtype(code + 1))
+        return code
+
+    def grow(self, capacity: int):
+        if len(self.codes) < capacity:
+            grown = np.zeros(max(capacity, 2 * len(self.codes)), dtype=self.codes.dtype)
+            grown[:len(self.codes)] = self.codes
+            self.codes = grown
+
+    def assign(self, i: int, v: str, existing: bool):
+        """i 번째 행 값 변경 (existing=False 면 새 행)"""
+        new = self.intern(v)
+        if self.indexed:
+            if existing:
+                old = int(self.codes[i])
+                if old == new:
+                    return
+                self._unpost(old, i)
+            self._post(new, i)
+        self.codes[i] = new
+
+    def remove(self, i: int):
+        if self.indexed:
+            self._unpost(int(self.codes[i]), i)
+
+    @property
+    def nbytes(self) -> int:
+        total = self.codes.nbytes + sum(len(v.encode("utf-8")) for v in self.values)
+        if self.indexed:
+            total += self._order.nbytes + self._starts.nbytes
+            total += sum(8 * len(rows) for rows in self._overlay.values())
+        return total
+
+
+class MerchantTable:
+    """
+    가맹점 행 테이블
+    - columns: 필드 이름 (CSV mapping 순서)
+    - file 열: 행이 어느 CSV 에서 왔는지
+    - alive: 삭제 표시 (삭제 행은 조회 posting 에서도 제거, 압축 시 정리)
+    - 배열 길이는 용량 (capacity) — 실제 행 수는 n
+    """
+
+    def __init__(self, columns: List[str], data: Dict[str, _Column], files: _Column):
+        self.columns = columns
+        self.data = data
+        self.files = files
+        self.n = len(files.codes)
+        self.live = self.n
+        self.alive = np.ones(self.n, dtype=bool)
+
+    @classmethod
+    def from_rows(cls, rows: List[Dict[str, Any]]) -> "MerchantTable":
+        columns: List[str] = []
+        for r in rows:
+            for k in r:
+                if k not in columns and k not in RESERVED_FIELDS:
+                    columns.append(k)
+
+        data = {c: _Column.encode((str(r.get(c) or "") for r in rows), c in KEY_FIELDS) for c in columns}
+        files = _Column.encode(r.get("file_name") or "" for r in rows)
+        return cls(columns, data, files)
+
+    def __len__(self) -> int:
+        return self.live
+
+    # ===============================
+    # 행 조회
+    # ===============================
+    def row(self, i: int) -> Dict[str, Any]:
+        """search 결과 형식 (기존 metadata 행과 같은 키)"""
+        i = int(i)
+        out: Dict[str, Any] = {"id": i, "file_name": self.files.values[self.files.codes[i]]}
+        for c in self.columns:
+            col = self.data[c]
+            out[c] = col.values[col.codes[i]]
+        out["strategy"] = TABLE_STRATEGY
+        out["page_no"] = "-"
+        return out
+
+    def rows(self) -> List[Dict[str, Any]]:
+        return [self.row(i) for i in np.flatnonzero(self.alive[:self.n])]
+
+    def find(self, key: str) -> List[int]:
+        """가맹점코드 → 행 번호 (삭제 행 제외)"""
+        col = self.data.get(KEY_FIELD)
+        code = col.lookup.get(key) if col is not None else None
+        if code is None:
+            return []
+        return [int(i) for i in col.rows_of_code(code)]
+
+    def lookup(self, tokens: List[str], files: List[str]) -> Optional[Tuple[int, str]]:
+        """
+        토큰 단위 exact → partial (KEY_FIELDS), 허용 파일의 가장 앞 행 1건
+        반환: (행 번호, "exact" | "partial") 또는 None
+        """
+        allowed = self._file_mask(files)
+        if allowed is None:
+            return None
+
+        hit = self._first(allowed, lambda col: [col.lookup[t] for t in tokens if t in col.lookup])
+        if hit is not None:
+            return hit, "exact"
+
+        # partial: 행 대신 고유값(사전)만 스캔
+        hit = self._first(allowed, lambda col: col.containing(tokens))
+        if hit is not None:
+            return hit, "partial"
+        return None
+
+    def _file_mask(self, files: List[str]) -> Optional[np.ndarray]:
+        codes = [self.files.lookup[f] for f in files if f in self.files.lookup]
+        if not codes:
+            return None
+        mask = np.zeros(len(self.files.values), dtype=bool)
+        mask[codes] = True
+        return mask
+
+    def _first(self, allowed: np.ndarray, match) -> Optional[int]:
+        best = None
+        for field in KEY_FIELDS:
+            col = self.data.get(field)
+            if col is None:
+                continue
+            rows = col.rows_of(match(col))
+            rows = rows[allowed[self.files.codes[rows]]]
+            if len(rows):
+                first = int(rows.min())
+                best = first if best is None else min(best, first)
+        return best
+
+    # ===============================
+    # 변경 (가맹점코드 기준)
+    # ===============================
+    def upsert(self, record: Dict[str, Any], file_name: str = None) -> str:
+        """
+        있으면 전달된 (빈 값 아닌) 필드만 갱신, 없으면 새 행 추가
+        반환: "inserted" | "updated"
+        """
+        key = str(record.get(KEY_FIELD) or "").strip()
+        fields = {
+            k: str(v).strip() for k, v in record.items()
+            if k not in RESERVED_FIELDS and v is not None and str(v).strip() != ""
+        }
+        for c in fields:
+            if c not in self.data:
+                self.columns.append(c)
+                self.data[c] = _Column.encode([""] * len(self.files.codes), c in KEY_FIELDS)
+
+        rows = self.find(key)
+        for i in rows:
+            for c, v in fields.items():
+                self.data[c].assign(i, v, existing=True)
+        if rows:
+            return "updated"
+
+        i = self.n
+        capacity = i + 1
+        for col in (*self.data.values(), self.files):
+            col.grow(capacity)
+        if len(self.alive) < capacity:
+            self.alive = np.concatenate([self.alive, np.zeros(max(1, len(self.alive)), dtype=bool)])
+
+        for c, col in self.data.items():
+            col.assign(i, fields.get(c, ""), existing=False)
+        self.files.assign(i, file_name or DEFAULT_FILE, existing=False)
+        self.alive[i] = True
+        self.n += 1
+        self.live += 1
+        return "inserted"
+
+    def delete(self, key: str) -> int:
+        rows = self.find(key)
+        for i in rows:
+            for col in self.data.values():
+                col.remove(i)
+            self.alive[i] = False
+        self.live -= len(rows)
+        return len(rows)
+
+    def compacted(self) -> "MerchantTable":
+        """삭제 행 / overlay / 남는 용량 정리한 새 테이블"""
+        return MerchantTable.from_rows(self.rows())
+
+    # ===============================
+    # 저장 / 로드 (압축된 테이블만 저장)
+    # ===============================
+    def save(self, path: str, epoch: int):
+        arrays = {
+            "epoch": np.asarray([epoch], dtype=np.int64),
+            "columns": np.asarray(self.columns, dtype=str),
+            "file_values": np.asarray(self.files.values, dtype=str),
+            "file_codes": self.files.codes[:self.n],
+        }
+        for i, c in enumerate(self.columns):
+            arrays[f"values_{i}"] = np.asarray(self.data[c].values, dtype=str)
+            arrays[f"codes_{i}"] = self.data[c].codes[:self.n]
+
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, **arrays)
+        with open(tmp, "rb") as f:
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> Tuple["MerchantTable", int]:
+        with np.load(path, allow_pickle=False) as z:
+            epoch = int(z["epoch"][0]) if "epoch" in z.files else 0
+            columns = [str(c) for c in z["columns"]]
+            data = {
+                c: _Column([str(v) for v in z[f"values_{i}"]], z[f"codes_{i}"], c in KEY_FIELDS)
+                for i, c in enumerate(columns)
+            }
+            files = _Column([str(v) for v in z["file_values"]], z["file_codes"])
+        return cls(columns, data, files), epoch
+
+    @property
+    def nbytes(self) -> int:
+        return self.files.nbytes + self.alive.nbytes + sum(col.nbytes for col in self.data.values())
+
+
+# ===============================
+# 전역 테이블 (싱글톤)
+# ===============================
+table = MerchantTable.from_rows([])
+_epoch = 0
+_stat = None
+# 현재 epoch journal 에서 반영한 byte 위치 / 건수
+_journal_pos = 0
+_journal_ops = 0
+_last_poll = 0.0
+# 테이블 읽기 / 제자리 변경 직렬화 (조회는 μs 단위)
+_lock = threading.RLock()
+_write_thread_lock = threading.Lock()
+
+
+def exists() -> bool:
+    return os.path.exists(TABLE_PATH)
+
+
+def _journal_path(epoch: int) -> str:
+    return os.path.join(DB_DIR, f"merchant_table.{epoch}.journal")
+
+
+def load():
+    """저장된 테이블 + journal 열기 (startup 단계)"""
+    refresh(force=True)
+    print(f"🟢 Merchant table loaded. rows={len(table)}, journal={_journal_ops}, {table.nbytes / 2**20:.2f} MB")
+
+
+def refresh(force: bool = False) -> bool:
+    """
+    스냅샷이 바뀌었으면 다시 읽고, journal 추가분 반영
+    (요청 경로에서는 POLL_SECONDS 에 1회만 확인)
+    """
+    global table, _epoch, _stat, _journal_pos, _journal_ops, _last_poll
+
+    now = time.monotonic()
+    if not force and now - _last_poll < POLL_SECONDS:
+        return False
+    _last_poll = now
+
+    try:
+        st = os.stat(TABLE_PATH)
+    except FileNotFoundError:
+        return False
+    key = (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    loaded = None
+    if key != _stat:
+        loaded = MerchantTable.load(TABLE_PATH)
+
+    with _lock:
+        if loaded is not None and key != _stat:
+            (table, _epoch), _stat = loaded, key
+            _journal_pos = _journal_ops = 0
+        return _replay_journal() or loaded is not None
+
+
+def _replay_journal() -> bool:
+    """journal 의 완결된 줄만 반영 (_lock 안에서 호출)"""
+    global _journal_pos, _journal_ops
+
+    try:
+        with open(_journal_path(_epoch), "rb") as f:
+            f.seek(_journal_pos)
+            data = f.read()
+    except FileNotFoundError:
+        return False
+
+    end = data.rfind(b"\n") + 1
+    if not end:
+        return False
+    for line in data[:end].splitlines():
+        if line.strip():
+            _apply(json.loads(line))
+            _journal_ops += 1
+    _journal_pos += end
+    return True
+
+
+def _apply(op: Dict[str, Any]):
+    if op["op"] == "upsert":
+        return table.upsert(op["row"], op.get("file_name"))
+    if op["op"] == "delete":
+        return table.delete(op["key"])
+    raise ValueError(f"unknown journal op: {op['op']}")
+
+
+@contextmanager
+def _write_lock():
+    """프로세스 내 스레드 + worker 프로세스 간 쓰기 직렬화"""
+    os.makedirs(DB_DIR, exist_ok=True)
+    with _write_thread_lock:
+        with open(LOCK_PATH, "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _publish(new_table: MerchantTable):
+    """새 스냅샷 (새 epoch, 빈 journal) 게시 후 이전 journal 삭제 (쓰기 lock 안에서 호출)"""
+    global table, _epoch, _stat, _journal_pos, _journal_ops
+
+    epoch = time.time_ns()
+    new_table.save(TABLE_PATH, epoch)
+    st = os.stat(TABLE_PATH)
+    with _lock:
+        table, _epoch, _stat = new_table, epoch, (st.st_ino, st.st_mtime_ns, st.st_size)
+        _journal_pos = _journal_ops = 0
+
+    for path in glob.glob(os.path.join(DB_DIR, "merchant_table.*.journal")):
+        if path != _journal_path(epoch):
+            os.remove(path)
+
+
+def _commit(ops: List[Dict[str, Any]]) -> list:
+    """journal 에 추가 (fsync) 후 메모리 테이블에 제자리 반영 → op 별 결과"""
+    global _journal_pos, _journal_ops
+
+    with _write_lock():
+        refresh(force=True)
+        if not exists():
+            _publish(table.compacted())
+        data = b"".join((json.dumps(op, ensure_ascii=False) + "\n").encode("utf-8") for op in ops)
+        # journal 추가 ~ 반영까지 _lock 유지 → 같은 worker 의 refresh 가 새 줄을 먼저 반영하지 않음
+        with _lock:
+            with open(_journal_path(_epoch), "ab") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+                end = f.tell()
+
+            results = [_apply(op) for op in ops]
+            _journal_pos = end
+            _journal_ops += len(ops)
+
+        if _journal_ops > max(COMPACT_MIN_OPS, len(table) // 4):
+            with _lock:
+                compacted = table.compacted()
+            _publish(compacted)
+            print(f"🟢 가맹점 테이블 journal 압축 — 행: {len(compacted)}")
+    return results
+
+
+# ===============================
+# 적재 / 변경
+# ===============================
+def replace_file(file_name: str, rows: List[Dict[str, Any]]) -> int:
+    """file_name 의 기존 행을 rows 로 교체 (재업로드 = 전체 갱신) → 적재 행 수"""
+    with _write_lock():
+        refresh(force=True)
+        with _lock:
+            keep = [r for r in table.rows() if r["file_name"] != file_name]
+        new_rows = [{**r, "file_name": file_name} for r in rows]
+        _publish(MerchantTable.from_rows(keep + new_rows))
+
+    print(f"🟢 가맹점 테이블 저장 — 파일: {file_name}, 행: {len(new_rows)}, 전체: {len(table)}")
+    return len(new_rows)
+
+
+def import_rows(rows: List[Dict[str, Any]]):
+    """
+    구버전 인덱스 metadata 에 있던 CSV 행 이관 (테이블 파일이 없을 때 1회)
+    - 구버전은 CSV 헤더 행도 데이터로 적재했음 → 제외
+    """
+    with _write_lock():
+        if exists():
+            return
+        _publish(MerchantTable.from_rows([r for r in rows if not _is_header(r)]))
+
+
+def _is_header(row: Dict[str, Any]) -> bool:
+    return all(str(row.get(k) or "").lstrip("\ufeff") == k for k in KEY_FIELDS)
+
+
+def _key_of(record: Dict[str, Any]) -> str:
+    key = str(record.get(KEY_FIELD) or "").strip()
+    if not key:
+        raise ValueError(f"{KEY_FIELD} 가 없는 레코드: {record}")
+    return key
+
+
+def upsert(records: List[Dict[str, Any]], file_name: str = None) -> Dict[str, int]:
+    """가맹점코드 기준 upsert (빈 필드는 기존 값 유지)"""
+    ops = [
+        {"op": "upsert", "row": {**r, KEY_FIELD: _key_of(r)}, "file_name": file_name}
+        for r in records
+    ]
+    results = _commit(ops) if ops else []
+    return {"inserted": results.count("inserted"), "updated": results.count("updated")}
+
+
+def delete(keys: List[str]) -> Dict[str, int]:
+    ops = [{"op": "delete", "key": str(k).strip()} for k in keys if str(k).strip()]
+    results = _commit(ops) if ops else []
+    deleted = sum(1 for n in results if n)
+    return {"deleted": deleted, "missing": len(results) - deleted}
+
+
+def apply_delta(rows: List[Dict[str, Any]], file_name: str = None) -> Dict[str, int]:
+    """
+    delta CSV 행 반영 (read_delta_csv 결과)
+    - op 열이 delete / D 인 행은 삭제, 나머지는 upsert
+    """
+    ops = []
+    for r in rows:
+        key = _key_of(r)
+        if str(r.get("op") or "").strip().lower() in ("delete", "d"):
+            ops.append({"op": "delete", "key": key})
+        else:
+            ops.append({"op": "upsert", "row": {**r, KEY_FIELD: key}, "file_name": file_name})
+
+    results = _commit(ops) if ops else []
+    kinds = [op["op"] for op in ops]
+    return {
+        "inserted": results.count("inserted"),
+        "updated": results.count("updated"),
+        "deleted": sum(1 for kind, res in zip(kinds, results) if kind == "delete" and res),
+        "missing": sum(1 for kind, res in zip(kinds, results) if kind == "delete" and not res),
+    }
+
+
+# ===============================
+# 조회
+# ===============================
+def search(tokens: List[str], files: List[str]) -> Optional[Tuple[Dict[str, Any], str]]:
+    refresh()
+    with _lock:
+        hit = table.lookup(tokens, files)
+        if hit is None:
+            return None
+        return table.row(hit[0]), hit[1]
+
+
+def search_many(tokens_list: List[List[str]], files: List[str]) -> List[Optional[Tuple[Dict[str, Any], str]]]:
+    """여러 질의 일괄 조회 (잠금 1회) — 토큰 없는 질의는 None"""
+    refresh()
+    out = []
+    with _lock:
+        for tokens in tokens_list:
+            hit = table.lookup(tokens, files) if tokens else None
+            out.append(None if hit is None else (table.row(hit[0]), hit[1]))
+    return out
+
+
+def get(key: str) -> Optional[Dict[str, Any]]:
+    """가맹점코드 → 현재 행 (없거나 삭제됐으면 None)"""
+    refresh()
+    with _lock:
+        rows = table.find(str(key).strip())
+        return table.row(rows[0]) if rows else None
+
+
+def _table_collector():
+    with _lock:
+        rows, nbytes, ops = len(table), table.nbytes, _journal_ops
+    return [
+        ("rag_merchant_rows", "gauge", {}, rows),
+        ("rag_merchant_table_bytes", "gauge", {}, nbytes),
+        ("rag_merchant_journal_ops", "gauge", {}, ops),
+    ]
+
+
+describe("rag_merchant_rows", "gauge", "Rows in the columnar merchant table")
+describe("rag_merchant_table_bytes", "gauge", "In-memory size of the merchant table (codes + dictionaries + postings)")
+describe("rag_merchant_journal_ops", "gauge", "Upserts / deletes applied since the last merchant table snapshot")
+register_collector(_table_collector)
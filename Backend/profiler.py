@@ -0,0 +1,238 @@
+# --------------------------------------------------
+# File: ~/RAG_Chatbot/Backend/profiler.py
+# Description:
+# - 운영 중 on-demand 통계적 프로파일링 (stack sampling)
+#   · 평소에는 꺼짐: sampler 스레드 없음, 요청당 비용 = 전역 변수 확인 1회
+#   · start(requests=N, seconds=S): 다음 N 건 요청이 끝나거나 S 초가 지나면 자동 종료
+#   · 세션 중 INTERVAL 마다 모든 스레드 stack 수집 (sys._current_frames)
+#     → 대상 모듈 (rag_pipeline / search_engine / vector_store / formatter) frame 이 있는 stack 만,
+#       가장 바깥 대상 frame 부터 leaf (numpy / faiss / httpx 등 포함) 까지 집계
+# - 결과: 함수별 self / total 표본 비율 + flamegraph 용 collapsed stack ("a;b;c 12")
+# - 설정: RAG_PROFILE_MODULES (쉼표 구분), RAG_PROFILE_INTERVAL_MS, RAG_PROFILE_MAX_SECONDS
+#
+# 사용 예:
+#   profiler.start(requests=200, seconds=30)
+#   with profiler.request():          # rag_pipeline 요청 진입점
+#       ...
+#   profiler.report()                 # {"status": "done", "top_functions": [...], ...}
+# --------------------------------------------------
+
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from typing import Dict, Any, Optional, Tuple
+import os
+import sys
+import threading
+import time
+
+
+TARGET_MODULES = frozenset(
+    m.strip() for m in os.environ.get(
+        "RAG_PROFILE_MODULES", "rag_pipeline,search_engine,vector_store,formatter"
+    ).split(",") if m.strip()
+)
+DEFAULT_INTERVAL_MS = float(os.environ.get("RAG_PROFILE_INTERVAL_MS", "5"))
+DEFAULT_SECONDS = 30.0
+# 요청 수만 지정해도 이 시간이 지나면 종료 (트래픽이 없을 때 sampler 가 남지 않도록)
+MAX_SECONDS = float(os.environ.get("RAG_PROFILE_MAX_SECONDS", "300"))
+TOP_FUNCTIONS = 30
+
+
+class ProfilerBusy(RuntimeError):
+    """이미 프로파일링 세션이 실행 중"""
+
+
+class ProfileSession:
+    def __init__(self, requests: Optional[int], seconds: float, interval_ms: float):
+        self.max_requests = requests
+        self.seconds = seconds
+        self.interval = interval_ms / 1000
+        self.started_at = time.time()
+        self.deadline = time.monotonic() + seconds
+        self.ended_at = None
+        self.stop_reason = None
+        self.admitted = 0
+        self.finished = 0
+        self.ticks = 0
+        self.stacks: Counter = Counter()
+        self.done = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+
+    # ===============================
+    # 요청 수 기준 종료
+    # ===============================
+    def admit(self) -> bool:
+        with self._lock:
+            if self.done.is_set() or (self.max_requests is not None and self.admitted >= self.max_requests):
+                return False
+            self.admitted += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self.finished += 1
+            reached = self.max_requests is not None and self.finished >= self.max_requests
+        if reached:
+            self.stop("requests")
+
+    def stop(self, reason: str):
+        with self._lock:
+            if self.done.is_set():
+                return
+            self.stop_reason = reason
+            self.ended_at = time.time()
+            self.done.set()
+        _finish(self)
+
+    # ===============================
+    # sampler
+    # ===============================
+    def _run(self):
+        me = threading.get_ident()
+        while not self.done.wait(self.interval):
+            if time.monotonic() >= self.deadline:
+                self.stop("seconds")
+                return
+            found = [_collapse(frame) for tid, frame in sys._current_frames().items() if tid != me]
+            with self._lock:
+                self.stacks.update(stack for stack in found if stack)
+                self.ticks += 1
+
+    # ===============================
+    # 결과
+    # ===============================
+    def snapshot(self) -> Dict[Tuple[str, ...], int]:
+        with self._lock:
+            return dict(self.stacks)
+
+    def report(self) -> Dict[str, Any]:
+        stacks = self.snapshot()
+        samples = sum(stacks.values())
+        self_counts: Counter = Counter()
+        total_counts: Counter = Counter()
+        for stack, n in stacks.items():
+            self_counts[stack[-1]] += n
+            for label in set(stack):
+                total_counts[label] += n
+
+        def pct(n: int) -> float:
+            return round(100 * n / samples, 1) if samples else 0.0
+
+        end = self.ended_at or time.time()
+        return {
+            "status": "done" if self.done.is_set() else "running",
+            "stop_reason": self.stop_reason,
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started_at)),
+            "duration_s": round(end - self.started_at, 3),
+            "requests": {"limit": self.max_requests, "admitted": self.admitted, "finished": self.finished},
+            "interval_ms": self.interval * 1000,
+            "ticks": self.ticks,
+            "samples": samples,
+            "modules": sorted(TARGET_MODULES),
+            "top_functions": [
+                {"function": label, "self": n, "self_pct": pct(n), "total": total_counts[label], "total_pct": pct(total_counts[label])}
+                for label, n in self_counts.most_common(TOP_FUNCTIONS)
+            ],
+            "top_cumulative": [
+                {"function": label, "total": n, "total_pct": pct(n)}
+                for label, n in total_counts.most_common(TOP_FUNCTIONS)
+            ],
+        }
+
+    def collapsed(self) -> str:
+        """flamegraph.pl / speedscope 입력 형식: 'root;...;leaf 표본수' 1줄 = stack 1개"""
+        return "".join(f"{';'.join(stack)} {n}\n" for stack, n in sorted(self.snapshot().items()))
+
+
+def _collapse(frame) -> Optional[Tuple[str, ...]]:
+    """leaf frame → (가장 바깥 대상 모듈 frame, ..., leaf) 라벨, 대상 frame 이 없으면 None"""
+    labels = []
+    outer = -1
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "?")
+        if module in TARGET_MODULES:
+            outer = len(labels)
+        labels.append(f"{module}.{frame.f_code.co_qualname}")
+        frame = frame.f_back
+    if outer < 0:
+        return None
+    return tuple(reversed(labels[:outer + 1]))
+
+
+# ===============================
+# 세션 관리 (프로세스당 1개)
+# ===============================
+_session: Optional[ProfileSession] = None
+_last: Optional[ProfileSession] = None
+_start_lock = threading.Lock()
+
+
+def _finish(session: ProfileSession):
+    global _session, _last
+    with _start_lock:
+        if _session is session:
+            _session = None
+        _last = session
+    print(f"🟢 [PROFILE] 종료 ({session.stop_reason}) — 요청 {session.finished}건, 표본 {sum(session.snapshot().values())}개")
+
+
+def start(requests: int = None, seconds: float = None, interval_ms: float = None) -> ProfileSession:
+    """
+    프로파일링 시작 — requests 건 종료 또는 seconds 경과 중 먼저 오는 시점에 자동 종료
+    - requests 만 지정하면 seconds = MAX_SECONDS (상한)
+    """
+    global _session
+    if requests is not None and requests <= 0:
+        raise ValueError("requests 는 1 이상")
+    if seconds is not None and not 0 < seconds <= MAX_SECONDS:
+        raise ValueError(f"seconds 는 0 초과 {MAX_SECONDS:g} 이하")
+    if interval_ms is not None and interval_ms < 1:
+        raise ValueError("interval_ms 는 1 이상")
+
+    if seconds is None:
+        seconds = MAX_SECONDS if requests is not None else DEFAULT_SECONDS
+
+    with _start_lock:
+        if _session is not None:
+            raise ProfilerBusy("profiling session already running")
+        _session = ProfileSession(requests, seconds, interval_ms or DEFAULT_INTERVAL_MS)
+        _session._thread.start()
+    print(f"🔵 [PROFILE] 시작 — 요청 {requests or '-'}건 / 최대 {seconds:g}초, 간격 {_session.interval * 1000:g}ms")
+    return _session
+
+
+def stop() -> Optional[ProfileSession]:
+    session = _session
+    if session is not None:
+        session.stop("stopped")
+    return session
+
+
+def current() -> Optional[ProfileSession]:
+    """실행 중인 세션, 없으면 마지막으로 끝난 세션"""
+    return _session or _last
+
+
+def report() -> Dict[str, Any]:
+    session = current()
+    return session.report() if session is not None else {"status": "idle"}
+
+
+_IDLE = nullcontext()
+
+
+def request():
+    """요청 1건 context — 세션이 없으면 공유 no-op context (꺼져 있을 때 비용 = 전역 변수 확인)"""
+    session = _session
+    if session is None or not session.admit():
+        return _IDLE
+    return _tracked(session)
+
+
+@contextmanager
+def _tracked(session: ProfileSession):
+    try:
+        yield
+    finally:
+        session.release()
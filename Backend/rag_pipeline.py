@@ -5,10 +5,25 @@
 
 import os
 import json
+import time
+from concurrent.futures import ThreadPoolExecutor
 
-from decision_engine import DecisionEngine
+import config_store
+import vector_store
+import merchant_table
+import law_index
+import menu_index
+from intent_classifier import classify_intent
+import startup
+import tracing
+import profiler
+from admission import lane, LOOKUP, RETRIEVAL
+from tracing import span
+from decision_engine import DecisionEngine, NO_EMBEDDING_INTENTS
+from semantic_intent import SemanticIntentClassifier
 from search_engine import SearchEngine
-from formatter import AnswerFormatter
+from formatter import AnswerFormatter, is_relevant, no_match
+from semantic_cache import SemanticCache
 
 
 # ==============================
@@ -18,12 +33,28 @@ BASE_DIR = os.path.join(os.path.expanduser("~"), "RAG_Chatbot")
 CHAT_HISTORY_DIR = os.path.join(BASE_DIR, "chat_history_sessions")
 
 
+# ==============================
+# 추측(speculative) 병렬 검색 설정
+# ==============================
+# AMBIGUOUS 이거나 1·2위 intent 점수 차가 이 값 미만이면 여러 intent 동시 검색
+SPECULATIVE_MARGIN = 0.15
+SPECULATIVE_TOP_N = 3
+# intent 선택 점수 = 1위 결과 score + PRIOR_WEIGHT × intent 점수
+# (결과 score 가 formatter.RELEVANCE_MIN_SCORE 미만인 intent 는 후보 제외)
+SPECULATIVE_PRIOR_WEIGHT = 0.2
+
+_retrieval_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="retrieval")
+
+
 # ==============================
 # 엔진 인스턴스 (싱글톤)
 # ==============================
-_decision_engine = DecisionEngine()
 _search_engine = SearchEngine()
+_decision_engine = DecisionEngine(
+    semantic=SemanticIntentClassifier(lambda: _search_engine.profiles)
+)
 _formatter = AnswerFormatter()
+_answer_cache = SemanticCache()
 
 
 # ==============================
@@ -47,11 +78,23 @@ def load_active_merchant(session_id: str) -> dict | None:
     for msg in reversed(history):
         merchant = msg.get("active_merchant")
         if isinstance(merchant, dict):
-            return merchant
+            return _current_merchant(merchant)
 
     return None
 
 
+def _current_merchant(merchant: dict) -> dict | None:
+    """세션 저장 시점 값 → 가맹점 테이블 최신 값 (upsert / delete 반영)"""
+    code = merchant.get(merchant_table.KEY_FIELD)
+    if not code or not startup.is_ready("merchant_table"):
+        return merchant
+
+    current = merchant_table.get(code)
+    if current is None:
+        return None
+    return {**merchant, **{k: current[k] for k in merchant_table.table.columns if k in current}}
+
+
 # ==============================
 # 가맹점 컨텍스트 응답
 # ==============================
@@ -72,51 +115,394 @@ def answer_from_active_merchant(question: str, merchant: dict) -> str | None:
     return None
 
 
+# ==============================
+# 추측 병렬 검색
+# ==============================
+def _should_speculate(decision: dict) -> bool:
+    if decision.get("reason") == "forced_intent":
+        return False
+    # 임베딩 intent 도 함께 검색 → 모델 / 인덱스 로드 전에는 결정된 intent 만 검색 (가맹점 조회 즉시 응답)
+    if not (startup.is_ready("model") and startup.is_ready("index")):
+        return False
+    if decision.get("intent") == "AMBIGUOUS":
+        return True
+
+    ranked = sorted(decision.get("scores", {}).values(), reverse=True)
+    return len(ranked) >= 2 and ranked[0] - ranked[1] < SPECULATIVE_MARGIN
+
+
+def _speculative_intents(decision: dict) -> list:
+    """
+    점수 순 상위 intent + (부족하면) 임베딩 검색 intent로 채움
+    - CSV 조회 intent는 점수 후보에 있을 때만 포함 (부분 일치 오탐 방지)
+    """
+    profiles = _search_engine.profiles.get("intents", {})
+    scores = decision.get("scores", {})
+
+    out = [k for k, _ in sorted(scores.items(), key=lambda x: -x[1]) if k in profiles and scores[k] > 0]
+    for k in profiles:
+        if k not in out and k not in NO_EMBEDDING_INTENTS:
+            out.append(k)
+    return out[:SPECULATIVE_TOP_N]
+
+
+def _speculative_search(question: str, decision: dict):
+    """
+    후보 intent들을 동시에 검색하고 결과 점수가 가장 좋은 intent 채택
+    - 질의 벡터는 dispatch 전에 1회 계산 → 각 검색은 캐시 사용
+    - 관련성 하한을 넘는 intent 가 없으면 candidates = [] (인사 / 잡담 → NO_MATCH)
+    반환: (intent, candidates)
+    """
+    intents = _speculative_intents(decision)
+    if not intents:
+        return decision["intent"], []
+
+    if any(k not in NO_EMBEDDING_INTENTS for k in intents):
+        vector_store.embed_query(question)
+
+    futures = {
+        intent: _retrieval_pool.submit(tracing.propagate(_search_engine.search, question=question, intent=intent))
+        for intent in intents
+    }
+
+    scores = decision.get("scores", {})
+    best_intent, best_results, best_strength = decision["intent"], [], float("-inf")
+    for intent, fut in futures.items():
+        try:
+            results = fut.result()
+        except Exception:
+            continue
+        if not is_relevant(results):
+            continue
+
+        strength = float(results[0].get("score", 0.0)) + SPECULATIVE_PRIOR_WEIGHT * scores.get(intent, 0.0)
+        if strength > best_strength:
+            best_intent, best_results, best_strength = intent, results, strength
+
+    return best_intent, best_results
+
+
 # ==============================
 # RAG 파이프라인 단일 진입점
 # ==============================
 def rag_query(
     question: str,
     session_id: str = None,
-    forced_intent: str = None
+    forced_intent: str = None,
+    debug: bool = False
 ):
     """
     RAG 파이프라인 단일 진입점
 
     확장 Flow:
     1. 세션 기반 active_merchant 컨텍스트 질의
+       법령 조문 참조 (제N조 / 제N조의M / 항), 메뉴 이름 → 구조 색인 직접 조회 (임베딩 생략)
     2. Intent 판단 (DecisionEngine)
-    3. 문서 검색 (SearchEngine)
+    3. 문서 검색 (SearchEngine) — 저신뢰 시 후보 intent 병렬 검색
     4. Answer 생성 + 포맷 (AnswerFormatter)
+
+    단계별 admission lane (lookup / retrieval / llm) — 포화 시 admission.Overloaded (HTTP 429)
+    debug=True 이면 단계별 소요 시간(ms)을 "timings" 필드로 함께 반환
     """
+    with tracing.request_trace() as trace, profiler.request():
+        t0 = time.perf_counter()
+        response = _rag_query(question, session_id, forced_intent)
+        elapsed = time.perf_counter() - t0
+
+    rtype = response.get("type", "UNKNOWN")
+    tracing.observe("rag_request_duration_seconds", elapsed, {"type": rtype})
+    tracing.inc("rag_requests_total", {"type": rtype})
 
-    # 🔥 1️⃣ 가맹점 컨텍스트 우선 처리
-    active_merchant = load_active_merchant(session_id)
-    if active_merchant:
-        merchant_answer = answer_from_active_merchant(
+    if debug:
+        timings = {k: round(v, 3) for k, v in trace.items()}
+        timings["total"] = round(elapsed * 1000, 3)
+        response = {**response, "timings": timings}
+    return response
+
+
+def _rag_query(question: str, session_id: str, forced_intent: str):
+
+    # 🔥 1️⃣ 가맹점 컨텍스트 우선 처리 (세션 파일만 사용 → 기동 직후에도 응답)
+    with lane(LOOKUP).slot():
+        with span("session_lookup"):
+            active_merchant = load_active_merchant(session_id)
+        if active_merchant:
+            with span("merchant_lookup"):
+                merchant_answer = answer_from_active_merchant(
+                    question=question,
+                    merchant=active_merchant
+                )
+            if merchant_answer:
+                return {
+                    "type": "MERCHANT_CONTEXT",
+                    "answer": merchant_answer,
+                    "confidence": 0.95
+                }
+
+    # 📜 법령 조문 / 메뉴 이름 직접 참조 → 구조 색인 (없으면 아래 dense 검색)
+    direct = _direct_answer(question, forced_intent)
+    if direct:
+        return direct
+
+    # 🔁 2️⃣ 기존 RAG 흐름
+    # 임베딩 모델 / 인덱스 로드 전에는 규칙 기반 intent 만 사용 (semantic 단계 생략)
+    with span("intent_decision"):
+        decision = _decision_engine.decide(
             question=question,
-            merchant=active_merchant
+            forced_intent=forced_intent
         )
-        if merchant_answer:
-            return {
-                "type": "MERCHANT_CONTEXT",
-                "answer": merchant_answer,
-                "confidence": 0.95
-            }
 
-    # 🔁 2️⃣ 기존 RAG 흐름
-    decision = _decision_engine.decide(
-        question=question,
-        forced_intent=forced_intent
-    )
+    # 가맹점 조회는 merchant_table 만, 나머지는 인덱스 + 임베딩 모델 필요
+    if decision["intent"] in NO_EMBEDDING_INTENTS:
+        startup.require("merchant_table")
+    else:
+        startup.require("index", "model")
+    if decision["intent"] not in NO_EMBEDDING_INTENTS or _should_speculate(decision):
+        # 다른 worker 가 게시한 인덱스 generation 반영 (1초에 1회 확인)
+        vector_store.refresh_generation()
 
-    candidates = _search_engine.search(
-        question=question,
-        intent=decision["intent"]
-    )
+    # 검색까지는 lookup / retrieval lane, LLM 생성은 formatter 안에서 llm lane
+    with lane(_search_lane(decision)).slot():
+        # ⚡ 유사 질문 응답 캐시 (검색 + LLM 생략)
+        cache_intent = decision["intent"]
+        q_vec = None
+        if cache_intent not in NO_EMBEDDING_INTENTS:
+            try:
+                q_vec = vector_store.embed_query(question)
+            except Exception:
+                q_vec = None
+
+        if q_vec is not None:
+            with span("cache_lookup"):
+                cached = _answer_cache.lookup(cache_intent, q_vec)
+            if cached:
+                return cached
 
-    return _formatter.build_and_format(
+        # 🔀 3️⃣ 저신뢰 질문은 후보 intent 병렬 검색 후 최적 intent 채택
+        if _should_speculate(decision):
+            intent, candidates = _speculative_search(question, decision)
+            if not candidates:
+                return no_match()
+            if intent != decision["intent"]:
+                decision = {**decision, "intent": intent, "reason": f"{decision.get('reason')}+speculative"}
+        else:
+            candidates = _search_engine.search(
+                question=question,
+                intent=decision["intent"]
+            )
+
+    response = _formatter.build_and_format(
         question=question,
         decision=decision,
         candidates=candidates
     )
+
+    _store_answer(cache_intent, q_vec, question, decision, response)
+    return response
+
+
+def _direct_answer(question: str, forced_intent: str):
+    """구조 색인 (법령 조문 / 메뉴) 으로 바로 답할 수 있으면 응답, 아니면 None"""
+    if not startup.is_ready("index"):
+        return None
+
+    vector_store.refresh_generation()
+    with lane(LOOKUP).slot():
+        if forced_intent in (None, law_index.LAW_INTENT):
+            with span("law_lookup"):
+                chunks = law_index.lookup(question)
+            if chunks:
+                return _formatter.format_law_article(chunks)
+
+        if forced_intent in (None, menu_index.MENU_INTENT):
+            with span("menu_lookup"):
+                match = menu_index.lookup(question)
+            # 메뉴 이름 일부만 맞은 경우는 규칙상 SYSTEM_MENU 질문일 때만 (다른 intent 오인 방지)
+            if match and (match.exact or forced_intent or classify_intent(question)["intent"] == menu_index.MENU_INTENT):
+                return _formatter.build_and_format(
+                    question=question,
+                    decision={"intent": menu_index.MENU_INTENT, "confidence": 0.95 if match.exact else 0.8, "reason": "menu_index"},
+                    candidates=menu_index.candidates(match)
+                )
+    return None
+
+
+def _search_lane(decision: dict) -> str:
+    """가맹점 조회 (추측 검색 없음) 만 lookup lane — 임베딩 / FAISS 가 필요하면 retrieval"""
+    if decision["intent"] in NO_EMBEDDING_INTENTS and not _should_speculate(decision):
+        return LOOKUP
+    return RETRIEVAL
+
+
+def _store_answer(cache_intent: str, q_vec, question: str, decision: dict, response: dict):
+    # 가맹점 조회 / 결과 없음은 캐시하지 않음 (질문별 값이 달라야 함)
+    if q_vec is not None and response.get("type") not in ("NO_MATCH", *NO_EMBEDDING_INTENTS):
+        profile = config_store.profiles().get(decision["intent"])
+        files = list(profile.file_list) if profile else []
+        _answer_cache.store(cache_intent, q_vec, question, response, files)
+
+
+# ==============================
+# 일괄 질의 (back-office 대량 확인)
+# ==============================
+# 질의 임베딩 캐시(QUERY_CACHE_SIZE)보다 작게 유지 → 배치 안에서 재계산 없음
+BATCH_MAX_QUESTIONS = int(os.environ.get("RAG_BATCH_MAX_QUESTIONS", "500"))
+
+_format_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="batch-format")
+
+
+def rag_query_batch(questions: list, forced_intent: str = None, debug: bool = False) -> dict:
+    """
+    여러 질문 일괄 처리 (세션 컨텍스트 없음, 결과는 입력 순서)
+
+    단건 rag_query 와 같은 답변, 단계별로 묶어서 실행:
+    1. Intent 판단 — semantic 이 필요한 질문만 1회 일괄 임베딩
+    2. 검색 — 가맹점 조회는 merchant_table 일괄 조회, 문서는 intent 별 FAISS 행렬 검색 1회
+       (저신뢰 질문은 단건과 같이 후보 intent 병렬 검색)
+    3. Answer 생성 — 질문별 포맷 (LLM 호출 포함) 을 병렬 실행
+    """
+    if len(questions) > BATCH_MAX_QUESTIONS:
+        raise ValueError(f"질문 수 {len(questions)} > 최대 {BATCH_MAX_QUESTIONS}")
+
+    with tracing.request_trace() as trace, profiler.request():
+        t0 = time.perf_counter()
+        responses = _rag_query_batch(list(questions), forced_intent) if questions else []
+        elapsed = time.perf_counter() - t0
+
+    tracing.observe("rag_batch_duration_seconds", elapsed)
+    tracing.inc("rag_batch_questions_total", value=len(questions))
+    for r in responses:
+        tracing.inc("rag_requests_total", {"type": r.get("type", "UNKNOWN")})
+
+    out = {"count": len(responses), "results": responses}
+    if debug:
+        timings = {k: round(v, 3) for k, v in trace.items()}
+        timings["total"] = round(elapsed * 1000, 3)
+        out["timings"] = timings
+    return out
+
+
+def _rag_query_batch(questions: list, forced_intent: str) -> list:
+    # 📜 조문 / 메뉴 직접 참조는 단건과 같이 구조 색인으로 응답, 나머지만 일괄 처리
+    responses = [_direct_answer(q, forced_intent) for q in questions]
+    rest = [i for i, r in enumerate(responses) if r is None]
+    if rest:
+        for i, r in zip(rest, _search_and_answer_batch([questions[i] for i in rest], forced_intent)):
+            responses[i] = r
+    return responses
+
+
+def _search_and_answer_batch(questions: list, forced_intent: str) -> list:
+    with span("intent_decision"):
+        decisions = _decision_engine.decide_batch(questions, forced_intent)
+
+    intents = [d["intent"] for d in decisions]
+    if any(i in NO_EMBEDDING_INTENTS for i in intents):
+        startup.require("merchant_table")
+    if any(i not in NO_EMBEDDING_INTENTS for i in intents):
+        startup.require("index", "model")
+    if any(i not in NO_EMBEDDING_INTENTS or _should_speculate(d) for i, d in zip(intents, decisions)):
+        vector_store.refresh_generation()
+
+    # ⚡ 유사 질문 응답 캐시 (질의 벡터는 decide_batch 에서 계산된 캐시 사용)
+    responses = [None] * len(questions)
+    q_vecs = [None] * len(questions)
+    with span("cache_lookup"):
+        for i, (q, intent) in enumerate(zip(questions, intents)):
+            if intent in NO_EMBEDDING_INTENTS:
+                continue
+            try:
+                q_vecs[i] = vector_store.embed_query(q)
+            except Exception:
+                continue
+            responses[i] = _answer_cache.lookup(intent, q_vecs[i])
+
+    # 🔀 검색: 저신뢰는 질문별 추측 검색, 나머지는 일괄 검색 (배치 전체가 retrieval slot 1개)
+    todo = [i for i, r in enumerate(responses) if r is None]
+    speculative = [i for i in todo if _should_speculate(decisions[i])]
+    direct = [i for i in todo if not _should_speculate(decisions[i])]
+
+    final = list(decisions)
+    candidates = {}
+    with lane(RETRIEVAL).slot():
+        if direct:
+            results = _search_engine.search_batch(
+                [questions[i] for i in direct],
+                [intents[i] for i in direct]
+            )
+            candidates.update(zip(direct, results))
+        for i in speculative:
+            intent, candidates[i] = _speculative_search(questions[i], decisions[i])
+            if not candidates[i]:
+                responses[i] = no_match()
+            elif intent != decisions[i]["intent"]:
+                final[i] = {**decisions[i], "intent": intent, "reason": f"{decisions[i].get('reason')}+speculative"}
+
+    # ✍ 답변 생성 (LLM 대기 시간 겹치기) — 이미 정해진 질문이므로 LLM lane 은 상한 없이 대기
+    futures = {
+        i: _format_pool.submit(tracing.propagate(
+            _formatter.build_and_format,
+            question=questions[i],
+            decision=final[i],
+            candidates=candidates[i],
+            llm_bounded=False
+        ))
+        for i in todo
+        if responses[i] is None
+    }
+    for i, fut in futures.items():
+        responses[i] = fut.result()
+        _store_answer(intents[i], q_vecs[i], questions[i], final[i], responses[i])
+
+    return responses
+
+
+# ==============================
+# 기동 시 백그라운드 로드 (startup)
+# ==============================
+def load_llm():
+    """OllamaLLM 클라이언트 생성 (langchain import 포함)"""
+    _formatter.load_llm()
+
+
+def load_intent_prototypes():
+    """semantic intent 프로토타입 행렬 미리 생성 (model + index 필요)"""
+    _decision_engine.semantic.prepare()
+
+
+# ==============================
+# 답변 모드 통계 (extractive / llm)
+# ==============================
+def answer_stats() -> dict:
+    return {**_formatter.get_stats(), "cache": _answer_cache.get_stats()}
+
+
+def _stats_collector():
+    """/metrics 용 답변 모드 / 프롬프트 토큰 / 응답 캐시 지표"""
+    stats = answer_stats()
+    prompt = stats["prompt"]
+    cache = stats["cache"]
+    out = [
+        ("rag_answer_mode_total", "counter", {"mode": "extractive"}, stats["extractive"]),
+        ("rag_answer_mode_total", "counter", {"mode": "llm"}, stats["llm"]),
+        ("rag_llm_prompts_total", "counter", {}, prompt["prompts"]),
+        ("rag_llm_prompt_tokens_total", "counter", {"source": "estimated"}, prompt["estimated_tokens"]),
+        ("rag_llm_prompt_tokens_total", "counter", {"source": "prompt_eval"}, prompt["prompt_eval_tokens"]),
+    ]
+    for k in ["hits", "misses", "stores", "evictions", "invalidations"]:
+        out.append(("rag_answer_cache_events_total", "counter", {"event": k}, cache[k]))
+    for intent, n in cache["entries"].items():
+        out.append(("rag_answer_cache_entries", "gauge", {"intent": intent}, n))
+    return out
+
+
+tracing.register_collector(_stats_collector)
+tracing.describe("rag_batch_duration_seconds", "histogram", "End-to-end /rag_query_batch duration")
+tracing.describe("rag_batch_questions_total", "counter", "Questions answered through /rag_query_batch")
+
+
+# ==============================
+# 문서 재임베딩 시 응답 캐시 무효화
+# ==============================
+def invalidate_answer_cache(file_name: str = None):
+    _answer_cache.invalidate(file_name)
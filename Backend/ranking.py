@@ -7,6 +7,27 @@ from rank_bm25 import BM25Okapi
 import numpy as np
 
 
+def hybrid_scores(query: str, texts: list, dense_scores, w_dense=0.6, w_sparse=0.4):
+    """
+    Dense 점수 + BM25 점수를 각각 최대값으로 정규화한 뒤 가중합
+    - 토큰이 없는 텍스트가 섞여 있으면 None (BM25 계산 불가)
+    """
+    tokenized = [(t or "").split() for t in texts]
+    if not tokenized or any(len(toks) == 0 for toks in tokenized):
+        return None
+
+    bm25 = BM25Okapi(tokenized)
+    bm25_scores = bm25.get_scores(query.split())
+    if np.max(bm25_scores) > 0:
+        bm25_scores = bm25_scores / np.max(bm25_scores)
+
+    dense_scores = np.asarray(dense_scores, dtype="float32")
+    if np.max(dense_scores) > 0:
+        dense_scores = dense_scores / np.max(dense_scores)
+
+    return w_dense * dense_scores + w_sparse * bm25_scores
+
+
 def hybrid_rank(query: str, faiss_results: list, w_dense=0.6, w_sparse=0.4):
 
     if not faiss_results:
@@ -18,23 +39,16 @@ def hybrid_rank(query: str, faiss_results: list, w_dense=0.6, w_sparse=0.4):
     if all((t is None or t.strip() == "") for t in corpus):
         return faiss_results
 
-    # BM25 준비
-    tokenized = [c.split() for c in corpus]
-
-    if any(len(toks) == 0 for toks in tokenized):
+    final = hybrid_scores(
+        query,
+        corpus,
+        [r["score"] for r in faiss_results],
+        w_dense=w_dense,
+        w_sparse=w_sparse
+    )
+    if final is None:
         return faiss_results
 
-    bm25 = BM25Okapi(tokenized)
-    bm25_scores = bm25.get_scores(query.split())
-    if np.max(bm25_scores) > 0:
-        bm25_scores = bm25_scores / np.max(bm25_scores)
-
-    dense_scores = np.array([r["score"] for r in faiss_results])
-    if np.max(dense_scores) > 0:
-        dense_scores = dense_scores / np.max(dense_scores)
-
-    final = w_dense * dense_scores + w_sparse * bm25_scores
-
     ranked = sorted(
         zip(faiss_results, final),
         key=lambda x: x[1],
@@ -1,32 +1,30 @@
 # --------------------------------------------------
 # File: ~/RAG_Chatbot/Backend/search_engine.py
 # Description:
-# - doc_profiles.json 기반 검색 엔진
-# - FAISS / CSV 검색 수행
+# - doc_profiles.json 기반 검색 엔진 (config_store 컴파일 결과 — 파일 수정 시 자동 반영)
+# - FAISS / 가맹점 테이블(merchant_table) / 메뉴 색인(menu_index) 검색 수행
 # - Formatter 친화적 dict 결과 반환
 # --------------------------------------------------
 
-from typing import List, Dict, Any
-import os
-import json
+from typing import List, Dict, Any, Mapping
 
+import numpy as np
+
+import config_store
+from config_store import IntentProfile
+import merchant_table
+import menu_index
 import vector_store
-from vector_store import search_faiss
+from vector_store import search_faiss, search_faiss_batch
 from ranking import hybrid_rank
-
-
-# ✅ 가맹점 조회에 사용할 필드만
-CSV_FIELDS = ["가맹점코드", "가맹점명", "사업자등록번호"]
-
-
-# doc_profiles.json 경로
-BASE_DIR = os.path.join(os.path.expanduser("~"), "RAG_Chatbot")
-DOC_PROFILES_PATH = os.path.join(BASE_DIR, "doc_profiles.json")
+from tracing import span
 
 
 class SearchEngine:
-    def __init__(self):
-        self.profiles = self._load_profiles()
+    @property
+    def profiles(self) -> Mapping[str, Any]:
+        """doc_profiles.json 원본 (읽기 전용 mapping)"""
+        return config_store.profiles().raw
 
     # ===============================
     # public
@@ -36,62 +34,103 @@ class SearchEngine:
         intent에 해당하는 문서 프로필 기준으로 검색 수행
         반환값: Formatter가 바로 쓰는 dict 리스트
         """
-        intent_cfg = self.profiles.get("intents", {}).get(intent)
-        if not intent_cfg:
+        profile = config_store.profiles().get(intent)
+        if profile is None:
             return []
 
         # ✅ 가맹점 조회는 CSV 전용 로직
         if intent == "MERCHANT_DATA":
-            return self._search_csv(question, intent_cfg)
+            with span("merchant_lookup"):
+                return self._search_csv(question, profile)
+
+        # ✅ 메뉴 이름 / 일부가 색인에 있으면 dense 검색 생략
+        if intent == menu_index.MENU_INTENT:
+            with span("menu_lookup"):
+                match = menu_index.lookup(question)
+            if match:
+                return menu_index.candidates(match)
 
-        return self._search_faiss(question, intent_cfg)
+        return self._search_faiss(question, profile)
+
+    def search_batch(self, questions: List[str], intents: List[str]) -> List[List[Dict[str, Any]]]:
+        """
+        여러 질문 일괄 검색 (질문별 search 와 같은 결과, 순서 유지)
+        - 가맹점 조회: merchant_table 1회 조회로 일괄 처리
+        - 문서 검색: intent 별로 묶어 질의 행렬 1개로 FAISS 검색 (질의 벡터는 embed_query 캐시)
+        """
+        profiles = config_store.profiles()
+        out: List[List[Dict[str, Any]]] = [[] for _ in questions]
+
+        groups: Dict[str, List[int]] = {}
+        for i, intent in enumerate(intents):
+            if profiles.get(intent) is not None:
+                groups.setdefault(intent, []).append(i)
+
+        for intent, idx in groups.items():
+            profile = profiles.get(intent)
+
+            if intent == "MERCHANT_DATA":
+                with span("merchant_lookup"):
+                    for i, res in zip(idx, self._search_csv_batch([questions[i] for i in idx], profile)):
+                        out[i] = res
+                continue
+
+            if intent == menu_index.MENU_INTENT:
+                with span("menu_lookup"):
+                    matches = {i: menu_index.lookup(questions[i]) for i in idx}
+                for i, match in matches.items():
+                    if match:
+                        out[i] = menu_index.candidates(match)
+                idx = [i for i in idx if not matches[i]]
+                if not idx:
+                    continue
+
+            q_vecs = np.vstack([vector_store.embed_query(questions[i]) for i in idx])
+            per_strategy = [
+                search_faiss_batch(
+                    q_vecs,
+                    top_k=profile.top_k,
+                    strategy_filter=st,
+                    file_name_filter=profile.files
+                )
+                for st in profile.strategies
+            ]
+            for j, i in enumerate(idx):
+                out[i] = self._finish(questions[i], profile, [res[j] for res in per_strategy])
+
+        return out
 
     def reload_profiles(self):
-        """doc_profiles.json 수정 후 핫 리로드용"""
-        self.profiles = self._load_profiles()
+        """doc_profiles.json 즉시 리로드 (평소에는 mtime 변경 시 자동)"""
+        config_store.reload_all()
 
     # ===============================
     # internal
     # ===============================
-    def _load_profiles(self) -> Dict[str, Any]:
-        if not os.path.exists(DOC_PROFILES_PATH):
-            return {"intents": {}}
-        try:
-            with open(DOC_PROFILES_PATH, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except Exception:
-            return {"intents": {}}
-
-    def _search_faiss(self, question: str, cfg: Dict[str, Any]) -> List[Dict[str, Any]]:
-        top_k = int(cfg.get("top_k", 3))
-        files = cfg.get("files")
-        strategies = cfg.get("strategies")
-        use_hybrid = bool(cfg.get("use_hybrid_rank", False))
-
-        candidates: List[Dict[str, Any]] = []
-
-        # 전략 1개
-        if strategies and len(strategies) == 1:
-            candidates = search_faiss(
+    def _search_faiss(self, question: str, profile: IntentProfile) -> List[Dict[str, Any]]:
+        per_strategy = [
+            search_faiss(
                 question,
-                top_k=top_k,
-                strategy_filter=strategies[0],
-                file_name_filter=files
+                top_k=profile.top_k,
+                strategy_filter=st,
+                file_name_filter=profile.files
             )
+            for st in profile.strategies
+        ]
+        return self._finish(question, profile, per_strategy)
+
+    def _finish(self, question: str, profile: IntentProfile, per_strategy: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """전략별 FAISS 결과 → 중복 제거 / 하이브리드 랭킹 / matched_by"""
+        top_k = profile.top_k
+        use_hybrid = profile.use_hybrid_rank
+
+        # 전략 1개
+        if len(per_strategy) == 1:
+            candidates = per_strategy[0]
 
         # 전략 여러 개
         else:
-            if not strategies:
-                strategies = [None]
-
-            for st in strategies:
-                results = search_faiss(
-                    question,
-                    top_k=top_k,
-                    strategy_filter=st,
-                    file_name_filter=files
-                )
-                candidates.extend(results)
+            candidates = [r for results in per_strategy for r in results]
 
             # 중복 제거 (hash 또는 id 기준)
             seen = set()
@@ -109,10 +148,11 @@ class SearchEngine:
 
         # 하이브리드 랭킹
         if use_hybrid:
-            candidates = hybrid_rank(question, candidates)
+            with span("hybrid_rank"):
+                candidates = hybrid_rank(question, candidates)
 
         # score / matched_by 보강
-        reason = self._build_reason(cfg)
+        reason = profile.reason
         out = []
         for r in candidates[:top_k]:
             out.append({
@@ -122,73 +162,51 @@ class SearchEngine:
 
         return out
 
-    def _search_csv(self, query: str, cfg: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def _search_csv(self, query: str, profile: IntentProfile) -> List[Dict[str, Any]]:
         """
-        ✅ 가맹점 조회 전용 CSV 검색
+        ✅ 가맹점 조회 전용 CSV 검색 (merchant_table — 임베딩 / FAISS 미사용)
         - 파일 필터 필수
-        - strategy == csv 만 허용
         - 토큰 기반 exact → partial
         - 결과는 1건만 반환 (UX 고정)
         """
         if not query:
             return []
 
-        allowed_files = cfg.get("files") or []
+        allowed_files = profile.file_list
         if not allowed_files:
             return []
 
-        # ---------------------------
         # 0) 토큰 분해 (문장형 입력 대응)
-        # ---------------------------
-        tokens = (
-            query.replace(",", " ")
-                .replace(":", " ")
-                .strip()
-                .split()
-        )
-
+        tokens = self._csv_tokens(query)
         if not tokens:
             return []
 
-        # ---------------------------
-        # 1) exact match (토큰 단위)
-        # ---------------------------
-        for m in vector_store.metadata:
-            if m.get("file_name") not in allowed_files:
-                continue
-            if m.get("strategy") != "csv":
-                continue
+        # 1) exact → 2) partial (KEY_FIELDS, 토큰 단위)
+        return self._csv_result(merchant_table.search(tokens, allowed_files))
 
-            for t in tokens:
-                if any((m.get(k) or "") == t for k in CSV_FIELDS):
-                    return [{
-                        **m,
-                        "score": 1.0,
-                        "matched_by": ["csv.exact"]
-                    }]
-
-        # ---------------------------
-        # 2) partial match (토큰 단위)
-        # ---------------------------
-        for m in vector_store.metadata:
-            if m.get("file_name") not in allowed_files:
-                continue
-            if m.get("strategy") != "csv":
-                continue
+    def _search_csv_batch(self, queries: List[str], profile: IntentProfile) -> List[List[Dict[str, Any]]]:
+        allowed_files = profile.file_list
+        if not allowed_files:
+            return [[] for _ in queries]
 
-            for t in tokens:
-                if any(t in (m.get(k, "") or "") for k in CSV_FIELDS):
-                    return [{
-                        **m,
-                        "score": 0.8,
-                        "matched_by": ["csv.partial"]
-                    }]
+        hits = merchant_table.search_many([self._csv_tokens(q or "") for q in queries], allowed_files)
+        return [self._csv_result(hit) for hit in hits]
 
-        return []
+    def _csv_tokens(self, query: str) -> List[str]:
+        return (
+            query.replace(",", " ")
+                .replace(":", " ")
+                .strip()
+                .split()
+        )
 
+    def _csv_result(self, hit) -> List[Dict[str, Any]]:
+        if hit is None:
+            return []
 
-    def _build_reason(self, cfg: Dict[str, Any]) -> str:
-        st = cfg.get("strategies")
-        if st:
-            return f"semantic:{','.join(st)}"
-        return "semantic"
+        row, kind = hit
+        return [{
+            **row,
+            "score": 1.0 if kind == "exact" else 0.8,
+            "matched_by": [f"csv.{kind}"]
+        }]
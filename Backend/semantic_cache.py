@@ -0,0 +1,150 @@
+# --------------------------------------------------
+# File: ~/RAG_Chatbot/Backend/semantic_cache.py
+# Description:
+# - 유사 질문 응답 캐시 (질문 임베딩 FAISS 인덱스 → 최종 응답)
+# - intent별 분리 / 유사도 임계값 / TTL / 용량 초과 시 LRU 제거
+# - 원본 문서(file_versions)가 바뀌면 해당 응답 무효화
+# --------------------------------------------------
+
+from typing import Dict, Any, Optional, List
+from collections import OrderedDict
+import threading
+import time
+
+import faiss
+import numpy as np
+
+import vector_store
+
+
+# 캐시 적중 cosine 하한 / 유효 시간(초) / intent별 최대 항목 수
+CACHE_THRESHOLD = 0.95
+CACHE_TTL = 3600
+CACHE_CAPACITY = 512
+
+
+class _IntentCache:
+    """intent 1개 분량의 질문 인덱스 + 응답 저장소"""
+
+    def __init__(self, dim: int):
+        self.index = faiss.IndexIDMap2(faiss.IndexFlatIP(dim))
+        # id → entry (OrderedDict 순서 = LRU 순서)
+        self.entries: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+
+    def remove(self, ids: List[int]):
+        if not ids:
+            return
+        self.index.remove_ids(np.asarray(ids, dtype="int64"))
+        for i in ids:
+            self.entries.pop(i, None)
+
+
+class SemanticCache:
+    def __init__(
+        self,
+        threshold: float = CACHE_THRESHOLD,
+        ttl: float = CACHE_TTL,
+        capacity: int = CACHE_CAPACITY
+    ):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.capacity = capacity
+
+        self._lock = threading.Lock()
+        self._caches: Dict[str, _IntentCache] = {}
+        self._next_id = 0
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "invalidations": 0}
+
+    # ===============================
+    # public
+    # ===============================
+    def lookup(self, intent: str, q_vec: np.ndarray) -> Optional[Dict[str, Any]]:
+        """
+        가장 유사한 과거 질문이 임계값 이상 + TTL 이내 + 원본 문서 불변이면 응답 반환
+        """
+        with self._lock:
+            cache = self._caches.get(intent)
+            if cache is None or cache.index.ntotal == 0:
+                self.stats["misses"] += 1
+                return None
+
+            D, I = cache.index.search(q_vec, 1)
+            entry_id, score = int(I[0][0]), float(D[0][0])
+            entry = cache.entries.get(entry_id)
+
+            if entry is None or score < self.threshold:
+                self.stats["misses"] += 1
+                return None
+
+            # TTL 만료 / 원본 문서 변경 → 제거
+            if time.time() - entry["created"] > self.ttl or not self._fresh(entry):
+                cache.remove([entry_id])
+                self.stats["invalidations"] += 1
+                self.stats["misses"] += 1
+                return None
+
+            cache.entries.move_to_end(entry_id)
+            entry["hits"] += 1
+            self.stats["hits"] += 1
+            return {**entry["response"], "cache": {"question": entry["question"], "score": round(score, 4)}}
+
+    def store(
+        self,
+        intent: str,
+        q_vec: np.ndarray,
+        question: str,
+        response: Dict[str, Any],
+        files: List[str]
+    ):
+        with self._lock:
+            cache = self._caches.get(intent)
+            if cache is None:
+                cache = self._caches[intent] = _IntentCache(q_vec.shape[1])
+
+            # 용량 초과 → 가장 오래 사용되지 않은 항목 제거
+            overflow = len(cache.entries) - self.capacity + 1
+            if overflow > 0:
+                victims = list(cache.entries.keys())[:overflow]
+                cache.remove(victims)
+                self.stats["evictions"] += len(victims)
+
+            entry_id = self._next_id
+            self._next_id += 1
+
+            cache.index.add_with_ids(q_vec, np.asarray([entry_id], dtype="int64"))
+            cache.entries[entry_id] = {
+                "question": question,
+                "response": response,
+                "created": time.time(),
+                "hits": 0,
+                "versions": {f: vector_store.file_versions.get(f, 0) for f in files or []}
+            }
+            self.stats["stores"] += 1
+
+    def invalidate(self, file_name: str = None):
+        """file_name 을 근거로 한 응답 제거 (None 이면 전체)"""
+        with self._lock:
+            for cache in self._caches.values():
+                victims = [
+                    i for i, e in cache.entries.items()
+                    if file_name is None or file_name in e["versions"]
+                ]
+                cache.remove(victims)
+                self.stats["invalidations"] += len(victims)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out = dict(self.stats)
+            out["entries"] = {k: len(c.entries) for k, c in self._caches.items()}
+        lookups = out["hits"] + out["misses"]
+        out["hit_ratio"] = round(out["hits"] / lookups, 4) if lookups else 0.0
+        return out
+
+    # ===============================
+    # internal
+    # ===============================
+    def _fresh(self, entry: Dict[str, Any]) -> bool:
+        return all(
+            vector_store.file_versions.get(f, 0) == v
+            for f, v in entry["versions"].items()
+        )
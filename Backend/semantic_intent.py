@@ -0,0 +1,133 @@
+# --------------------------------------------------
+# File: ~/RAG_Chatbot/Backend/semantic_intent.py
+# Description:
+# - 임베딩 기반 intent 분류 (프로토타입 벡터 ↔ 질의 벡터)
+# - 프로토타입 = intent 문서 청크 centroid + 예시 질문 벡터
+# - 질의 벡터는 검색용 캐시(vector_store.embed_query)를 그대로 사용
+# --------------------------------------------------
+
+from typing import Callable, Dict, Any, List, Mapping, Optional
+import threading
+
+import numpy as np
+
+import vector_store
+from intent_classifier import intent_examples
+
+
+# centroid 계산 시 한 번에 읽을 벡터 수 (float store / FAISS 복원)
+RECONSTRUCT_BLOCK = 4096
+
+
+class SemanticIntentClassifier:
+    """
+    intent별 프로토타입 행렬 P (n_proto × dim) 를 미리 만들어 두고
+    질의마다 P @ q 한 번으로 intent별 최대 cosine 유사도를 계산
+
+    프로토타입은 다음이 바뀌면 자동 재계산
+    - FAISS 인덱스 (신규 청크 추가)
+    - doc_profiles (파일 / 전략 구성)
+    - intent_keywords.json 예시 질문
+    """
+
+    def __init__(self, profile_loader: Callable[[], Mapping[str, Any]]):
+        self.profile_loader = profile_loader
+        self._lock = threading.Lock()
+        self._key = None
+        self._matrix: Optional[np.ndarray] = None
+        self._labels: List[str] = []
+
+    # ===============================
+    # public
+    # ===============================
+    def scores(self, q_vec: np.ndarray) -> Dict[str, float]:
+        """
+        q_vec: (1, dim) normalize된 질의 벡터
+        반환: intent → 최대 cosine 유사도 (프로토타입 없으면 {})
+        """
+        matrix, labels = self._ensure()
+        if matrix is None or q_vec.shape[-1] != matrix.shape[1]:
+            return {}
+
+        sims = matrix @ q_vec.reshape(-1)
+
+        out: Dict[str, float] = {}
+        for label, s in zip(labels, sims):
+            if s > out.get(label, -1.0):
+                out[label] = float(s)
+        return out
+
+    def prepare(self) -> int:
+        """프로토타입 행렬 미리 생성 (기동 시) → 프로토타입 수"""
+        matrix, _ = self._ensure()
+        return 0 if matrix is None else len(matrix)
+
+    # ===============================
+    # internal
+    # ===============================
+    def _ensure(self):
+        index = vector_store.faiss_index
+        if vector_store.embedder is None:
+            return None, []
+
+        profiles = self.profile_loader() or {}
+        examples, examples_version = intent_examples()
+        key = (
+            id(index),
+            index.ntotal if index is not None else 0,
+            id(profiles),
+            examples_version
+        )
+        if key == self._key:
+            return self._matrix, self._labels
+
+        with self._lock:
+            if key != self._key:
+                self._matrix, self._labels = self._build(index, profiles, examples)
+                self._key = key
+        return self._matrix, self._labels
+
+    def _build(self, index, profiles: Mapping[str, Any], examples: Dict[str, list]):
+        rows: List[np.ndarray] = []
+        labels: List[str] = []
+
+        for intent, cfg in profiles.get("intents", {}).items():
+            # 1) 문서 청크 centroid
+            if cfg.get("semantic_centroid", True) and index is not None:
+                centroid = self._centroid(index, cfg)
+                if centroid is not None:
+                    rows.append(centroid)
+                    labels.append(intent)
+
+            # 2) 예시 질문 (1문장 = 프로토타입 1개)
+            texts = examples.get(intent, [])
+            if texts:
+                vecs = vector_store.embed_texts(texts)
+                rows.extend(vecs)
+                labels.extend([intent] * len(texts))
+
+        if not rows:
+            return None, []
+
+        print(f"🟢 Intent prototypes built: {len(rows)} vectors / {len(set(labels))} intents")
+        return np.vstack(rows).astype("float32"), labels
+
+    def _centroid(self, index, cfg: Mapping[str, Any]) -> Optional[np.ndarray]:
+        # generation 의 ID 필터 재사용 (metadata 전체 decode 없음)
+        files = cfg.get("files") or None
+        ids = np.unique(np.concatenate([
+            vector_store.filter_ids(st, files) for st in cfg.get("strategies") or [None]
+        ]))
+        ids = ids[ids < index.ntotal]
+        if not len(ids):
+            return None
+
+        total = np.zeros(index.d, dtype="float64")
+        for start in range(0, len(ids), RECONSTRUCT_BLOCK):
+            block = np.asarray(ids[start:start + RECONSTRUCT_BLOCK], dtype="int64")
+            total += vector_store.get_vectors(block).sum(axis=0)
+
+        norm = np.linalg.norm(total)
+        if norm == 0:
+            return None
+        return (total / norm).astype("float32")
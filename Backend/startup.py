@@ -0,0 +1,151 @@
+# --------------------------------------------------
+# File: ~/RAG_Chatbot/Backend/startup.py
+# Description:
+# - 단계별 기동 (staged startup)
+#   · 서버는 즉시 응답 시작, 무거운 구성요소는 백그라운드에서 병렬 로드
+#   · 구성요소별 상태 / 소요 시간 기록 → /ready, /metrics
+# - 요청 경로는 필요한 구성요소만 require() → 준비 전이면 ComponentNotReady (HTTP 503)
+#
+# 사용 예:
+#   start({"model": load_embedder, "index": load_index})
+#   require("index")
+# --------------------------------------------------
+
+from typing import Callable, Dict, Any, Iterable, Optional
+import threading
+import time
+
+from tracing import register_collector, describe
+
+
+# 프로세스 기동 시각 (모듈 최초 import 기준)
+PROCESS_START = time.time()
+
+PENDING, LOADING, READY, ERROR = "pending", "loading", "ready", "error"
+
+
+class ComponentNotReady(RuntimeError):
+    """요청에 필요한 구성요소가 아직 로드되지 않음 (HTTP 503 + Retry-After)"""
+
+    def __init__(self, component: str):
+        super().__init__(f"{component} is not ready yet")
+        self.component = component
+
+
+class _Component:
+    __slots__ = ("status", "started_at", "seconds", "error", "event")
+
+    def __init__(self):
+        self.status = PENDING
+        self.started_at: Optional[float] = None
+        self.seconds: Optional[float] = None
+        self.error: Optional[str] = None
+        self.event = threading.Event()
+
+
+_components: Dict[str, _Component] = {}
+_lock = threading.Lock()
+
+
+def _get(name: str) -> _Component:
+    with _lock:
+        comp = _components.get(name)
+        if comp is None:
+            comp = _components[name] = _Component()
+        return comp
+
+
+# ===============================
+# 로드 실행
+# ===============================
+def load(name: str, fn: Callable[[], Any], after: Iterable[str] = ()):
+    """
+    구성요소 1개 로드 (현재 스레드)
+    - after: 먼저 준비돼야 하는 구성요소 (실패 시 이 구성요소도 실패)
+    """
+    comp = _get(name)
+    for dep in after:
+        _get(dep).event.wait()
+        if not is_ready(dep):
+            comp.status, comp.error = ERROR, f"dependency {dep} failed"
+            comp.event.set()
+            return
+
+    comp.status, comp.started_at = LOADING, time.time()
+    print(f"🔵 [STARTUP] {name} loading ...")
+    try:
+        fn()
+        comp.status = READY
+        print(f"🟢 [STARTUP] {name} ready ({time.time() - comp.started_at:.2f}s)")
+    except Exception as e:
+        comp.status, comp.error = ERROR, str(e)
+        print(f"❌ [STARTUP] {name} failed: {e}")
+    finally:
+        comp.seconds = round(time.time() - comp.started_at, 3)
+        comp.event.set()
+
+
+def start(loaders: Dict[str, Callable[[], Any]], after: Dict[str, Iterable[str]] = None):
+    """구성요소별 백그라운드 스레드로 병렬 로드 (즉시 반환)"""
+    after = after or {}
+    for name in loaders:
+        _get(name)
+    for name, fn in loaders.items():
+        threading.Thread(
+            target=load, args=(name, fn, after.get(name, ())),
+            name=f"startup-{name}", daemon=True
+        ).start()
+
+
+# ===============================
+# 조회
+# ===============================
+def is_ready(name: str) -> bool:
+    comp = _components.get(name)
+    return comp is not None and comp.status == READY
+
+
+def require(*names: str):
+    for name in names:
+        if not is_ready(name):
+            raise ComponentNotReady(name)
+
+
+def wait(*names: str, timeout: float = None) -> bool:
+    """구성요소가 (성공 / 실패 무관) 끝날 때까지 대기 → 모두 준비됐는지 반환"""
+    deadline = None if timeout is None else time.time() + timeout
+    for name in names or list(_components):
+        remaining = None if deadline is None else max(0.0, deadline - time.time())
+        _get(name).event.wait(remaining)
+    return all(is_ready(n) for n in (names or list(_components)))
+
+
+def report() -> Dict[str, Any]:
+    with _lock:
+        items = list(_components.items())
+
+    ready_at = [c.started_at + c.seconds for _, c in items if c.status == READY and c.seconds is not None]
+    all_ready = bool(items) and all(c.status == READY for _, c in items)
+    return {
+        "ready": all_ready,
+        "since_process_start_s": round(time.time() - PROCESS_START, 3),
+        "ready_after_s": round(max(ready_at) - PROCESS_START, 3) if all_ready and ready_at else None,
+        "components": {
+            name: {"status": c.status, "seconds": c.seconds, **({"error": c.error} if c.error else {})}
+            for name, c in items
+        },
+    }
+
+
+def _startup_collector():
+    out = []
+    for name, c in report()["components"].items():
+        out.append(("rag_component_ready", "gauge", {"component": name}, 1 if c["status"] == READY else 0))
+        if c["seconds"] is not None:
+            out.append(("rag_startup_stage_seconds", "gauge", {"component": name}, c["seconds"]))
+    return out
+
+
+describe("rag_component_ready", "gauge", "1 when a startup component is loaded")
+describe("rag_startup_stage_seconds", "gauge", "Load time of each startup component")
+register_collector(_startup_collector)
@@ -0,0 +1,61 @@
+# --------------------------------------------------
+# File: ~/RAG_Chatbot/Backend/tests/test_merchant_table.py
+# Description:
+# - 가맹점 테이블 journal 반영 (같은 worker 의 조회가 commit 도중 refresh)
+#
+# 실행 (Backend 디렉터리에서):
+#   python -m pytest tests
+# --------------------------------------------------
+
+import json
+import os
+import threading
+
+import pytest
+
+import merchant_table
+
+
+@pytest.fixture
+def fresh_table(tmp_path, monkeypatch):
+    monkeypatch.setattr(merchant_table, "DB_DIR", str(tmp_path))
+    monkeypatch.setattr(merchant_table, "TABLE_PATH", str(tmp_path / "merchant_table.npz"))
+    monkeypatch.setattr(merchant_table, "LOCK_PATH", str(tmp_path / ".merchant_table.lock"))
+    monkeypatch.setattr(merchant_table, "table", merchant_table.MerchantTable.from_rows([]))
+    for name, value in (("_epoch", 0), ("_stat", None), ("_journal_pos", 0), ("_journal_ops", 0), ("_last_poll", 0.0)):
+        monkeypatch.setattr(merchant_table, name, value)
+    return merchant_table
+
+
+def test_reader_refresh_during_commit_applies_journal_once(fresh_table, monkeypatch):
+    mt = fresh_table
+    mt.upsert([{"가맹점코드": "100", "가맹점명": "첫가게"}])
+
+    # journal fsync 도중 다른 요청 스레드가 refresh (조회 경로)
+    readers = []
+    real_fsync = os.fsync
+
+    def fsync_with_reader(fd):
+        real_fsync(fd)
+        reader = threading.Thread(target=mt.refresh, kwargs={"force": True})
+        reader.start()
+        reader.join(0.2)
+        readers.append(reader)
+
+    monkeypatch.setattr(mt.os, "fsync", fsync_with_reader)
+    result = mt.upsert([{"가맹점코드": "200", "가맹점명": "새가게"}])
+    monkeypatch.setattr(mt.os, "fsync", real_fsync)
+    for reader in readers:
+        reader.join()
+
+    assert result == {"inserted": 1, "updated": 0}
+    journal = mt._journal_path(mt._epoch)
+    assert mt._journal_pos == os.path.getsize(journal)
+
+    # 다른 worker 가 이어 쓴 줄도 정상 반영
+    with open(journal, "ab") as f:
+        f.write((json.dumps({"op": "upsert", "row": {"가맹점코드": "300", "가맹점명": "다른워커"}}, ensure_ascii=False) + "\n").encode("utf-8"))
+    assert mt.refresh(force=True)
+    assert mt.get("300")["가맹점명"] == "다른워커"
+    assert mt.get("200")["가맹점명"] == "새가게"
+    assert mt._journal_pos == os.path.getsize(journal)
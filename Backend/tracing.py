@@ -0,0 +1,200 @@
+# --------------------------------------------------
+# File: ~/RAG_Chatbot/Backend/tracing.py
+# Description:
+# - 요청 단위 단계별 소요 시간 측정 (span)
+# - 프로세스 전역 histogram / counter 집계
+# - Prometheus text format 출력 (/metrics)
+#
+# 사용 예:
+#   with span("faiss_search"):
+#       D, I = faiss_index.search(q_vec, k)
+# --------------------------------------------------
+
+from typing import Dict, Any, Callable, List, Optional, Tuple
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+import bisect
+import threading
+import time
+
+
+# 초 단위 histogram bucket (0.5ms ~ 30s)
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+STAGE_METRIC = "rag_stage_duration_seconds"
+
+# 현재 요청의 단계별 누적 시간 (ms) — 요청 밖에서는 None
+_current: ContextVar[Optional[Dict[str, float]]] = ContextVar("rag_trace", default=None)
+
+
+class _Histogram:
+    __slots__ = ("bounds", "counts", "total", "count")
+
+    def __init__(self, bounds: Tuple[float, ...] = BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+class _Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.help: Dict[str, Tuple[str, str]] = {}
+        self.buckets: Dict[str, Tuple[float, ...]] = {}
+        self.histograms: Dict[Tuple[str, Tuple], _Histogram] = {}
+        self.counters: Dict[Tuple[str, Tuple], float] = {}
+        self.collectors: List[Callable[[], List[Tuple[str, str, Dict[str, str], float]]]] = []
+
+    def describe(self, name: str, kind: str, text: str, buckets: Tuple[float, ...] = None):
+        self.help[name] = (kind, text)
+        if buckets:
+            self.buckets[name] = tuple(sorted(buckets))
+
+    def observe(self, name: str, value: float, labels: Dict[str, str] = None):
+        key = (name, tuple(sorted((labels or {}).items())))
+        with self._lock:
+            h = self.histograms.get(key)
+            if h is None:
+                h = self.histograms[key] = _Histogram(self.buckets.get(name, BUCKETS))
+            h.observe(value)
+
+    def inc(self, name: str, labels: Dict[str, str] = None, value: float = 1.0):
+        key = (name, tuple(sorted((labels or {}).items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0.0) + value
+
+
+registry = _Registry()
+registry.describe(STAGE_METRIC, "histogram", "RAG pipeline stage duration")
+registry.describe("rag_request_duration_seconds", "histogram", "End-to-end /rag_query duration")
+registry.describe("rag_requests_total", "counter", "RAG requests by response type")
+
+
+# ===============================
+# 기록 API
+# ===============================
+@contextmanager
+def span(stage: str):
+    """단계 소요 시간을 histogram + 현재 요청 trace 에 기록"""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        dt = time.perf_counter() - t0
+        registry.observe(STAGE_METRIC, dt, {"stage": stage})
+        trace = _current.get()
+        if trace is not None:
+            trace[stage] = trace.get(stage, 0.0) + dt * 1000
+
+
+def observe(name: str, value: float, labels: Dict[str, str] = None):
+    registry.observe(name, value, labels)
+
+
+def inc(name: str, labels: Dict[str, str] = None, value: float = 1.0):
+    registry.inc(name, labels, value)
+
+
+def describe(name: str, kind: str, text: str, buckets: Tuple[float, ...] = None):
+    """buckets: 초 단위가 아닌 histogram (예: batch 크기) 의 상한 목록"""
+    registry.describe(name, kind, text, buckets)
+
+
+def register_collector(fn: Callable[[], List[Tuple[str, str, Dict[str, str], float]]]):
+    """
+    /metrics 출력 시 호출되는 수집 함수 등록
+    fn() → [(metric 이름, "counter"|"gauge", labels, 값), ...]
+    """
+    registry.collectors.append(fn)
+
+
+# ===============================
+# 요청 trace
+# ===============================
+@contextmanager
+def request_trace():
+    """
+    요청 1건의 단계별 ms 를 담는 dict 를 yield
+    - 중첩 호출 시 바깥 trace 를 그대로 사용
+    """
+    trace = _current.get()
+    if trace is not None:
+        yield trace
+        return
+
+    trace = {}
+    token = _current.set(trace)
+    try:
+        yield trace
+    finally:
+        _current.reset(token)
+
+
+def propagate(fn: Callable, *args, **kwargs):
+    """스레드 풀에 넘길 때 현재 trace context 를 유지하도록 감싸기"""
+    ctx = copy_context()
+    return lambda: ctx.run(fn, *args, **kwargs)
+
+
+# ===============================
+# Prometheus text format
+# ===============================
+def _escape_label(value) -> str:
+    """label 값 escape (exposition format: 역슬래시 / 큰따옴표 / 줄바꿈)"""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _fmt_labels(labels) -> str:
+    if not labels:
+        return ""
+    inner = ",".join(f'{k}="{_escape_label(v)}"' for k, v in labels)
+    return "{" + inner + "}"
+
+
+def render_prometheus() -> str:
+    lines: List[str] = []
+    seen = set()
+
+    def header(name: str, kind: str):
+        if name in seen:
+            return
+        seen.add(name)
+        text = registry.help.get(name, (kind, name))[1]
+        lines.append(f"# HELP {name} {text}")
+        lines.append(f"# TYPE {name} {kind}")
+
+    with registry._lock:
+        histograms = sorted(registry.histograms.items())
+        counters = sorted(registry.counters.items())
+        hist_snap = [(k, h.bounds, list(h.counts), h.total, h.count) for k, h in histograms]
+
+    for (name, labels), bounds, counts, total, count in hist_snap:
+        header(name, "histogram")
+        cum = 0
+        for bound, c in zip(bounds, counts):
+            cum += c
+            lines.append(f"{name}_bucket{_fmt_labels(labels + (('le', repr(bound)),))} {cum}")
+        lines.append(f"{name}_bucket{_fmt_labels(labels + (('le', '+Inf'),))} {count}")
+        lines.append(f"{name}_sum{_fmt_labels(labels)} {total}")
+        lines.append(f"{name}_count{_fmt_labels(labels)} {count}")
+
+    for (name, labels), value in counters:
+        header(name, "counter")
+        lines.append(f"{name}{_fmt_labels(labels)} {value}")
+
+    for fn in registry.collectors:
+        try:
+            samples = fn()
+        except Exception:
+            continue
+        for name, kind, labels, value in samples:
+            header(name, kind)
+            lines.append(f"{name}{_fmt_labels(tuple(sorted(labels.items())))} {value}")
+
+    return "\n".join(lines) + "\n"
@@ -1,63 +1,826 @@
 # --------------------------------------------------
 # File: ~/RAG_Chatbot/Backend/vector_store.py
 # Description: FAISS 기반 벡터 DB + 코사인 유사도 검색
+# - 인덱스 저장 방식 (RAG_INDEX_MODE)
+#   · flat     : float32 원본 (4 KB/벡터, 1024차원 기준)
+#   · sq8      : 8bit scalar quantization (4x 압축)
+#   · pq       : product quantization, 기본 4차원당 1byte (16x 압축)
+#   · pca+sq8 / pca+pq : PCA 차원 축소 후 양자화 (RAG_INDEX_PCA_DIM)
+# - 원본 float32 벡터는 vectors.f32 (디스크, memmap) 에 보관
+#   → 압축 인덱스 후보를 원본으로 정확히 재채점 (re-rank)
+# - 저장소 = 불변 generation 디렉터리 + CURRENT 포인터
+#   · 인덱스 / float store / metadata 모두 mmap → uvicorn worker 간 OS page cache 공유
+#   · 저장 시 새 generation 작성 후 CURRENT 를 원자적으로 교체 (os.replace)
+#   · 각 worker 는 CURRENT 를 주기적으로 확인해 새 generation 으로 전환
+#
+#   faiss_db/
+#     CURRENT                     ← 현재 generation 이름
+#     generations/<name>/
+#       vector.index              ← FAISS (IO_FLAG_MMAP_IFC 로 열기)
+#       vectors.f32               ← 원본 float32 (np.memmap)
+#       metadata.jsonl            ← chunk 1개 = 1줄
+#       metadata.offsets.npy      ← 줄 시작 byte offset (n + 1)
+#       metadata.columns.npy      ← 반복 필드 (파일명 / 전략 / 장 · 절 / 메뉴 제목) 사전 코드 (n, 필드 수)
+#       metadata.pools.json       ← 필드별 고유 값 (코드 → 문자열)
+#       metadata.hashes.npy       ← 청크 hash (md5 16 byte) — 저장 시 중복 확인
+#       manifest.json             ← spec / dim / ntotal / file_versions
+#       readers.lock              ← 이 generation 을 연 worker 가 공유 잠금 (flock) 유지
+# - metadata 행 = ChunkView (반복 필드는 열 코드, 나머지는 접근 시 decode)
+#   → 검색 조건은 열 코드로 만든 ID 필터 bitmap 으로 확인, dict 복사는 최종 top-k 결과만
+# - 가맹점 CSV (column_record) 행은 임베딩하지 않고 merchant_table 로 적재
 # --------------------------------------------------
 
 import faiss
 import json
+import mmap
 import os
+import shutil
+import threading
+import time
+import fcntl
 import hashlib
 import numpy as np
-from sentence_transformers import SentenceTransformer
+from collections import OrderedDict
+from collections.abc import Mapping
+from contextlib import contextmanager
+from functools import lru_cache
+
+import config_store
+import merchant_table
+from embedders import create_embedder
+from embed_scheduler import EmbedScheduler
+from startup import ComponentNotReady
+from tracing import span, register_collector, describe
 
 # ===== 경로 설정 =====
 BASE_DIR = os.path.join(os.path.expanduser("~"), "RAG_Chatbot")
 DB_DIR = os.path.join(BASE_DIR, "faiss_db")
 os.makedirs(DB_DIR, exist_ok=True)
 
+GENERATIONS_DIR = os.path.join(DB_DIR, "generations")
+CURRENT_PATH = os.path.join(DB_DIR, "CURRENT")
+LOCK_PATH = os.path.join(DB_DIR, ".write.lock")
+
+INDEX_FILE = "vector.index"
+VECTORS_FILE = "vectors.f32"
+META_FILE = "metadata.jsonl"
+OFFSETS_FILE = "metadata.offsets.npy"
+COLUMNS_FILE = "metadata.columns.npy"
+POOLS_FILE = "metadata.pools.json"
+HASHES_FILE = "metadata.hashes.npy"
+MANIFEST_FILE = "manifest.json"
+READERS_FILE = "readers.lock"
+
+# 단일 파일 구버전 (최초 실행 시 generation 으로 변환)
 FAISS_PATH = os.path.join(DB_DIR, "vector.index")
 METADATA_PATH = os.path.join(DB_DIR, "metadata.json")
+VECTORS_PATH = os.path.join(DB_DIR, "vectors.f32")
+INDEX_INFO_PATH = os.path.join(DB_DIR, "index_info.json")
 MODEL_NAME = "BAAI/bge-m3"
 
+# ===== 인덱스 압축 설정 =====
+INDEX_MODE = os.environ.get("RAG_INDEX_MODE", "flat")
+INDEX_PCA_DIM = int(os.environ.get("RAG_INDEX_PCA_DIM", "256"))
+# PQ sub-quantizer 수 (0 = 차원 / 4 → 16x)
+INDEX_PQ_M = int(os.environ.get("RAG_INDEX_PQ_M", "0"))
+# 이보다 적은 벡터 수에서는 학습 데이터 부족 + 메모리 이득 미미 → flat 유지
+COMPRESS_MIN_VECTORS = int(os.environ.get("RAG_INDEX_COMPRESS_MIN", "10000"))
+# 압축 인덱스 검색 시 (top_k × 3 × RERANK_FACTOR) 후보를 원본 벡터로 재채점
+RERANK_FACTOR = int(os.environ.get("RAG_INDEX_RERANK_FACTOR", "4"))
+# 압축 인덱스 학습 표본 수 (PQ 학습 비용 ∝ 표본 수)
+TRAIN_SAMPLE = int(os.environ.get("RAG_INDEX_TRAIN_SAMPLE", "65536"))
+ADD_BLOCK = 16384
+# 검색 파라미터 (IDSelector) 미지원 index 에서 ID 필터 행이 이 수 이하면 원본 float32 로 전수 채점
+EXACT_FILTER_MAX = int(os.environ.get("RAG_INDEX_EXACT_FILTER_MAX", "2048"))
+
+# ===== generation 설정 =====
+# CURRENT 확인 주기 (초) — 다른 worker 가 publish 한 generation 반영 지연 상한
+GENERATION_POLL_SECONDS = float(os.environ.get("RAG_GENERATION_POLL_SECONDS", "1.0"))
+# 보관할 generation 수 (현재 포함) — 전환 중인 worker 가 이전 파일을 열고 있을 수 있음
+KEEP_GENERATIONS = 3
+# 교체된 generation 삭제 전 유예 시간 (초) — CURRENT 를 읽고 아직 열지 않은 worker 보호
+GENERATION_GRACE_SECONDS = float(os.environ.get("RAG_GENERATION_GRACE_SECONDS", "300"))
+# worker 별로 decode 해 두는 metadata 행 수 (원문은 mmap 공유)
+METADATA_ROW_CACHE = 4096
+# 열 단위로 사전 인코딩하는 반복 필드 (행마다 같은 문자열이 반복되는 값)
+COLUMN_FIELDS = ("file_name", "strategy", "chapter", "section", "title", "subtitle")
+COLUMN_INDEX = {name: c for c, name in enumerate(COLUMN_FIELDS)}
+FILE_COL, STRATEGY_COL = COLUMN_INDEX["file_name"], COLUMN_INDEX["strategy"]
+# 열 코드 특수값: 행에 키 없음 / 문자열이 아닌 값 (원문에서 읽기)
+ABSENT, INLINE = -1, -2
+
+# 질의 임베딩 캐시 크기 (intent 판단 / 검색 / 답변 추출이 같은 벡터를 공유)
+QUERY_CACHE_SIZE = 1024
+# 청크별 문장 임베딩 캐시 (extractive 답변) — 청크 수 기준
+SENTENCE_CACHE_CHUNKS = int(os.environ.get("RAG_SENTENCE_CACHE_CHUNKS", "512"))
+
 # ===== 전역 변수 =====
 faiss_index = None
 metadata = []
 embedder = None
+index_spec = "Flat"
+# 원본 float32 벡터 (np.memmap, read-only) — 행 번호 = FAISS id
+float_store = None
+# 파일별 변경 버전 (저장 시 +1) — 응답 캐시 무효화 기준
+file_versions = {}
+# 현재 열려 있는 generation 이름 (None = 저장된 데이터 없음)
+generation = None
+# 검색용 일관 스냅샷 (index, spec, metadata, float_store) — 한 번에 교체
+_snapshot = (None, "Flat", [], None)
+
+_last_poll = 0.0
+# 현재 generation 의 readers.lock (공유 잠금 유지용 file 객체)
+_reader_lock = None
+_refresh_lock = threading.Lock()
+_write_thread_lock = threading.Lock()
+
+
+# ===== metadata 열 (columnar) =====
+def _digest(h) -> bytes:
+    """청크 hash (md5 hex) → 16 byte"""
+    if not h:
+        return b""
+    try:
+        return bytes.fromhex(h)
+    except (TypeError, ValueError):
+        return hashlib.md5(str(h).encode("utf-8")).digest()
+
+
+class ChunkColumns:
+    """
+    metadata 반복 필드의 사전 인코딩 열 + 청크 hash 열
+    - codes[i, c] = pools[c] 번호 → 같은 값은 문자열 객체 1개를 모든 행이 공유
+    - generation 작성 시 함께 저장 (mmap) → 열 때 metadata.jsonl 전체 decode 없음
+    """
+
+    __slots__ = ("codes", "hashes", "pools", "lookup")
+
+    def __init__(self, codes: np.ndarray, hashes: np.ndarray, pools: list):
+        self.codes = codes
+        self.hashes = hashes
+        self.pools = pools
+        self.lookup = [{v: code for code, v in enumerate(pool)} for pool in pools]
+
+    @classmethod
+    def empty(cls) -> "ChunkColumns":
+        return cls(
+            np.empty((0, len(COLUMN_FIELDS)), dtype="int32"),
+            np.empty(0, dtype="S16"),
+            [[] for _ in COLUMN_FIELDS]
+        )
+
+    @classmethod
+    def open(cls, gen_dir: str) -> "ChunkColumns":
+        """저장된 열 (mmap) — 열 파일이 없는 generation 은 metadata.jsonl 을 읽어 생성"""
+        try:
+            with open(os.path.join(gen_dir, POOLS_FILE), "r", encoding="utf-8") as f:
+                pools = json.load(f)
+            if set(COLUMN_FIELDS) <= pools.keys():
+                # np.asarray: memmap 하위 클래스 대신 일반 ndarray view (행 단위 접근 비용 ↓)
+                return cls(
+                    np.asarray(np.load(os.path.join(gen_dir, COLUMNS_FILE), mmap_mode="r")),
+                    np.asarray(np.load(os.path.join(gen_dir, HASHES_FILE), mmap_mode="r")),
+                    [pools[name] for name in COLUMN_FIELDS]
+                )
+        except OSError:
+            pass
+
+        with open(os.path.join(gen_dir, META_FILE), "rb") as f:
+            return cls.empty().extend(json.loads(line) for line in f)
+
+    def save(self, gen_dir: str):
+        np.save(os.path.join(gen_dir, COLUMNS_FILE), np.ascontiguousarray(self.codes))
+        np.save(os.path.join(gen_dir, HASHES_FILE), np.asarray(self.hashes))
+        with open(os.path.join(gen_dir, POOLS_FILE), "w", encoding="utf-8") as f:
+            json.dump(dict(zip(COLUMN_FIELDS, self.pools)), f, ensure_ascii=False)
+
+    def extend(self, rows) -> "ChunkColumns":
+        """기존 열 + rows → 새 열 (기존 코드 유지, 새 값만 pool 에 추가)"""
+        pools = [list(pool) for pool in self.pools]
+        lookup = [dict(table) for table in self.lookup]
+        codes, hashes = [], []
+        for row in rows:
+            codes.append([self._intern(pools[c], lookup[c], row, name) for c, name in enumerate(COLUMN_FIELDS)])
+            hashes.append(_digest(row.get("hash")))
+
+        return ChunkColumns(
+            np.concatenate([self.codes, np.asarray(codes, dtype="int32").reshape(-1, len(COLUMN_FIELDS))]),
+            np.concatenate([self.hashes, np.asarray(hashes, dtype="S16")]),
+            pools
+        )
+
+    @staticmethod
+    def _intern(pool: list, lookup: dict, row, name: str) -> int:
+        if name not in row:
+            return ABSENT
+        value = row[name]
+        if value is not None and not isinstance(value, str):
+            return INLINE
+        code = lookup.get(value)
+        if code is None:
+            code = lookup[value] = len(pool)
+            pool.append(value)
+        return code
+
+    def mask(self, strategy=None, files=None) -> np.ndarray:
+        """(strategy, 파일 집합) 조건에 맞는 행 → bool 배열"""
+        mask = np.ones(len(self.codes), dtype=bool)
+        if strategy is not None:
+            code = self.lookup[STRATEGY_COL].get(strategy)
+            mask &= self.codes[:, STRATEGY_COL] == code if code is not None else False
+        if files is not None:
+            # 파일 코드 → 허용 여부 표 (특수 코드 ABSENT / INLINE 은 앞 2칸)
+            table = self.lookup[FILE_COL]
+            allowed = np.zeros(len(table) + 2, dtype=bool)
+            allowed[[table[f] + 2 for f in files if f in table]] = True
+            mask &= allowed[self.codes[:, FILE_COL] + 2]
+        return mask
+
+
+class ChunkView(Mapping):
+    """
+    metadata 행 1개 (읽기 전용 dict 처럼 사용)
+    - 반복 필드는 열에서 (pool 문자열 공유), 나머지는 처음 접근할 때 원문 decode (행 캐시)
+    - 결과로 내보낼 때만 dict 로 복사: {**chunk, "score": ...}
+    """
+
+    __slots__ = ("_meta", "_i")
+
+    def __init__(self, meta: "MappedMetadata", i: int):
+        self._meta = meta
+        self._i = i
+
+    def __getitem__(self, key):
+        c = COLUMN_INDEX.get(key)
+        if c is not None:
+            columns = self._meta.columns
+            code = int(columns.codes[self._i, c])
+            if code == ABSENT:
+                raise KeyError(key)
+            if code != INLINE:
+                return columns.pools[c][code]
+        return self._meta._row(self._i)[key]
+
+    def _pooled(self) -> list:
+        """열에 값이 있는 반복 필드 이름 (행 캐시에는 없음)"""
+        codes = self._meta.columns.codes[self._i].tolist()
+        return [name for name, code in zip(COLUMN_FIELDS, codes) if code >= 0]
+
+    def __iter__(self):
+        yield from self._pooled()
+        yield from self._meta._row(self._i)
+
+    def __len__(self) -> int:
+        return len(self._pooled()) + len(self._meta._row(self._i))
+
+    def __repr__(self) -> str:
+        return f"ChunkView({dict(self)!r})"
+
+
+# ===== mmap metadata =====
+class MappedMetadata:
+    """
+    metadata.jsonl + 줄 offset 배열을 mmap 으로 열어 list 처럼 접근 (len / index / slice / iter)
+    - 행 = ChunkView: 반복 필드는 열 (ChunkColumns), 나머지 원문은 접근 시 decode
+    - 원문 bytes / 열 코드는 worker 간 page cache 공유, 자주 읽는 행만 프로세스별 decode 캐시
+    """
+
+    def __init__(self, gen_dir: str):
+        self._offsets = np.load(os.path.join(gen_dir, OFFSETS_FILE), mmap_mode="r")
+        with open(os.path.join(gen_dir, META_FILE), "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        self._row = lru_cache(maxsize=METADATA_ROW_CACHE)(self._decode)
+        self.columns = ChunkColumns.open(gen_dir)
+        self._filters = {}
+        self._filter_lock = threading.Lock()
+        self._derived = {}
+        self._derived_lock = threading.Lock()   # build 가 id_filter 를 호출하므로 별도 lock
+
+    def _decode(self, i: int) -> dict:
+        """원문 1행 → dict (열에 있는 반복 필드는 빼고 캐시 — ChunkView 가 열에서 읽음)"""
+        row = json.loads(self._mm[self._offsets[i]:self._offsets[i + 1]])
+        for name, code in zip(COLUMN_FIELDS, self.columns.codes[i].tolist()):
+            if code >= 0:
+                del row[name]
+        return row
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def materialize(self, i: int) -> dict:
+        """행 i → 새 dict (결과로 내보낼 최종 행만)"""
+        columns = self.columns
+        out = {
+            name: pool[code]
+            for name, pool, code in zip(COLUMN_FIELDS, columns.pools, columns.codes[i].tolist())
+            if code >= 0
+        }
+        out.update(self._row(i))
+        return out
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [ChunkView(self, j) for j in range(*i.indices(len(self)))]
+        i = int(i)
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return ChunkView(self, i)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield ChunkView(self, i)
+
+    def id_filter(self, strategy=None, files=None):
+        """
+        (strategy, 파일 집합) 조건에 맞는 행 → IdFilter (조건 없음 / 전체 일치면 None)
+        - 같은 조건은 generation 안에서 1회만 계산
+        """
+        files = frozenset(files) if files else None
+        if strategy is None and files is None:
+            return None
+
+        key = (strategy, files)
+        if key not in self._filters:
+            with self._filter_lock:
+                if key not in self._filters:
+                    mask = self.columns.mask(strategy, files)
+                    self._filters[key] = None if mask.all() else IdFilter(mask)
+        return self._filters[key]
+
+    def derived(self, name: str, build):
+        """이 generation metadata 로 만든 파생 구조 (법령 / 메뉴 색인) — generation 당 1회 build(self)"""
+        if name not in self._derived:
+            with self._derived_lock:
+                if name not in self._derived:
+                    self._derived[name] = build(self)
+        return self._derived[name]
+
+
+class IdFilter:
+    """generation 행 부분집합 → faiss 검색 파라미터 (IDSelectorBitmap)"""
+
+    __slots__ = ("ids", "count", "params", "_bits", "_bitmap", "_selector")
+
+    def __init__(self, mask: np.ndarray):
+        self.ids = np.flatnonzero(mask)
+        self.count = len(self.ids)
+        # bitmap: bytes (후보 1개씩 조회) + 같은 메모리의 numpy view
+        # selector 는 bitmap 을 복사하지 않음 → 필터 객체가 함께 보관
+        self._bits = np.packbits(mask, bitorder="little").tobytes()
+        self._bitmap = np.frombuffer(self._bits, dtype=np.uint8)
+        self._selector = faiss.IDSelectorBitmap(len(mask), faiss.swig_ptr(self._bitmap))
+        self.params = faiss.SearchParameters(sel=self._selector)
+
+    def __contains__(self, i: int) -> bool:
+        return self._bits[i >> 3] >> (i & 7) & 1 == 1
+
+
+def derived(name: str, build):
+    """현재 generation 의 파생 구조 (인덱스 로드 전이면 None)"""
+    meta = _snapshot[2]
+    return meta.derived(name, build) if isinstance(meta, MappedMetadata) else None
+
+
+def filter_ids(strategy=None, files=None) -> np.ndarray:
+    """현재 generation 에서 조건에 맞는 id (조건 없으면 전체)"""
+    meta = _snapshot[2]
+    flt = meta.id_filter(strategy, files) if isinstance(meta, MappedMetadata) else None
+    return np.arange(len(meta), dtype="int64") if flt is None else flt.ids
 
 
 # ===== Embedding 모델 & FAISS 로드 =====
 def load_faiss_into_memory():
-    global faiss_index, metadata, embedder
+    """임베딩 모델 + 인덱스 순차 로드 (스크립트용 — 서버는 startup 에서 병렬 로드)"""
+    load_embedder()
+    load_index()
+
+
+def load_embedder():
+    global embedder
 
     print("🔵 Loading embedding model on CPU...")
-    embedder = SentenceTransformer(MODEL_NAME, device="cpu")
-    print("🟢 Embedding model loaded.")
+    model = create_embedder(MODEL_NAME)
+    embed_query.cache_clear()
+    with _sentence_lock:
+        _sentence_cache.clear()
+    embedder = model
+    print(f"🟢 Embedding model loaded. {embedder.describe()}")
 
-    # Load FAISS index (IP = Inner Product → cosine possible)
-    if os.path.exists(FAISS_PATH):
-        try:
-            faiss_index = faiss.read_index(FAISS_PATH)
-            print(f"🟢 FAISS index loaded. Total vectors: {faiss_index.ntotal}")
-        except Exception as e:
-            print(f"❌ Failed to load FAISS index: {e}")
-            faiss_index = None
-    else:
-        faiss_index = None
+
+def load_index():
+    """현재 generation 열기 (구버전 변환 / 압축 모드 재구성 포함)"""
+    with _write_lock():
+        if _read_current() is None:
+            _migrate_legacy()
+        refresh_generation(force=True)
+
+        # 설정된 압축 모드와 다르면 float store 로 인덱스 재생성 → 새 generation
+        if faiss_index is not None and float_store is not None:
+            target = _target_spec(faiss_index.d, faiss_index.ntotal)
+            if target != index_spec:
+                print(f"🔵 Rebuilding index: {index_spec} → {target}")
+                gen_dir = _new_generation_dir()
+                prev_dir = _generation_dir(generation)
+                for name in (VECTORS_FILE, META_FILE, OFFSETS_FILE):
+                    _link_or_copy(os.path.join(prev_dir, name), os.path.join(gen_dir, name))
+                _publish(gen_dir, build_index(float_store, target), target, file_versions)
+
+        # 구버전: 인덱스에 들어 있던 가맹점 CSV 행 → merchant_table 로 이관 (1회)
+        if not merchant_table.exists():
+            _move_table_rows()
+
+    if faiss_index is None:
         print("⚪ No FAISS index found. Starting fresh.")
+    else:
+        print(f"🟢 FAISS index loaded (mmap). generation={generation}, vectors={faiss_index.ntotal}, chunks={len(metadata)}")
+        print(f"🟢 Index mode: {index_spec} ({index_stats()['compression']}x)")
 
-    # Load metadata
-    if os.path.exists(METADATA_PATH):
+
+def refresh_generation(force: bool = False) -> bool:
+    """
+    CURRENT 가 바뀌었으면 새 generation 으로 전환
+    - force=False 면 GENERATION_POLL_SECONDS 에 1회만 확인 (요청 경로에서 호출)
+    반환: 전환 여부
+    """
+    global _last_poll
+
+    now = time.monotonic()
+    if not force and now - _last_poll < GENERATION_POLL_SECONDS:
+        return False
+    _last_poll = now
+
+    name = _read_current()
+    if name is None or name == generation:
+        return False
+
+    with _refresh_lock:
+        if name == generation:
+            return False
+        _open_generation(name)
+    return True
+
+
+def _open_generation(name: str):
+    """
+    generation 을 mmap 으로 열고 전역 참조 교체
+    - metadata / float store 를 인덱스보다 먼저 교체 (append 시 항상 상위 집합)
+    - 검색은 _snapshot 한 개만 읽음 → 행이 제거된 generation 으로 바뀌어도 id 불일치 없음
+    - 여는 동안 + 열려 있는 동안 readers.lock 공유 잠금 유지 (_cleanup_generations 가 건너뜀)
+    """
+    global faiss_index, metadata, float_store, index_spec, file_versions, generation, _snapshot, _reader_lock
+
+    gen_dir = _generation_dir(name)
+    reader = open(os.path.join(gen_dir, READERS_FILE), "a")
+    try:
+        fcntl.flock(reader, fcntl.LOCK_SH)
+        index, store, meta, manifest = _load_generation(gen_dir)
+    except Exception:
+        reader.close()
+        raise
+
+    metadata = meta
+    float_store = store
+    file_versions = dict(manifest.get("file_versions", {}))
+    faiss_index = index
+    index_spec = manifest["spec"]
+    generation = name
+    _snapshot = (index, index_spec, meta, store)
+
+    # 이전 generation 잠금 해제 (진행 중인 검색은 이미 mmap 한 파일만 사용)
+    previous, _reader_lock = _reader_lock, reader
+    if previous is not None:
+        previous.close()
+
+
+def _load_generation(gen_dir: str):
+    """generation 디렉터리 → (index, float store, MappedMetadata, manifest)"""
+    with open(os.path.join(gen_dir, MANIFEST_FILE), "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+
+    index = faiss.read_index(
+        os.path.join(gen_dir, INDEX_FILE),
+        faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY
+    )
+    store = None
+    if manifest["ntotal"]:
+        store = np.memmap(
+            os.path.join(gen_dir, VECTORS_FILE), dtype="float32", mode="r",
+            shape=(manifest["ntotal"], manifest["dim"])
+        )
+
+    meta = MappedMetadata(gen_dir)
+    # doc_profiles intent 별 (strategy, 파일) ID 필터는 전환 전에 미리 계산
+    for strategy, files in config_store.profiles().filter_keys():
+        meta.id_filter(strategy, files)
+    return index, store, meta, manifest
+
+
+# ===== generation 작성 / 게시 =====
+@contextmanager
+def _write_lock():
+    """프로세스 내 스레드 + worker 프로세스 간 쓰기 직렬화"""
+    with _write_thread_lock:
+        with open(LOCK_PATH, "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _read_current():
+    try:
+        with open(CURRENT_PATH, "r", encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def _generation_dir(name: str) -> str:
+    return os.path.join(GENERATIONS_DIR, name)
+
+
+def _new_generation_dir() -> str:
+    name = f"{int(time.time() * 1000):015d}-{os.getpid()}"
+    path = _generation_dir(name)
+    os.makedirs(path)
+    return path
+
+
+def _link_or_copy(src: str, dst: str):
+    """변경 없는 파일은 hard link (디스크 / page cache 공유), 불가하면 복사"""
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
+
+def _copy_append(src, dst: str, data: bytes):
+    """이전 generation 파일 + 추가분 → 새 파일"""
+    with open(dst, "wb") as out:
+        if src and os.path.exists(src):
+            with open(src, "rb") as f:
+                shutil.copyfileobj(f, out, 16 * 2**20)
+        out.write(data)
+
+
+def _write_metadata(gen_dir: str, prev_dir, rows: list):
+    """이전 metadata.jsonl 뒤에 rows 를 이어 쓰고 offset 배열 / 열 (ChunkColumns) 갱신"""
+    lines = [(json.dumps(r, ensure_ascii=False) + "\n").encode("utf-8") for r in rows]
+    prev_offsets = np.zeros(1, dtype="int64")
+    prev_meta = None
+    if prev_dir:
+        prev_offsets = np.load(os.path.join(prev_dir, OFFSETS_FILE))
+        prev_meta = os.path.join(prev_dir, META_FILE)
+
+    _copy_append(prev_meta, os.path.join(gen_dir, META_FILE), b"".join(lines))
+    new_offsets = prev_offsets[-1] + np.cumsum([len(line) for line in lines], dtype="int64")
+    np.save(os.path.join(gen_dir, OFFSETS_FILE), np.concatenate([prev_offsets, new_offsets]).astype("int64"))
+
+    prev_columns = ChunkColumns.open(prev_dir) if prev_dir else ChunkColumns.empty()
+    prev_columns.extend(rows).save(gen_dir)
+
+
+def _publish(gen_dir: str, index, spec: str, versions: dict):
+    """
+    인덱스 + manifest 작성 → CURRENT 원자적 교체 → 이 worker 도 즉시 전환
+    (다른 worker 는 refresh_generation 에서 전환)
+    """
+    faiss.write_index(index, os.path.join(gen_dir, INDEX_FILE))
+    with open(os.path.join(gen_dir, MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump({
+            "spec": spec,
+            "dim": index.d,
+            "ntotal": index.ntotal,
+            "file_versions": versions,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }, f, ensure_ascii=False)
+
+    name = os.path.basename(gen_dir)
+    tmp = CURRENT_PATH + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(name)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, CURRENT_PATH)
+
+    with _refresh_lock:
+        _open_generation(name)
+    _cleanup_generations()
+
+
+def _cleanup_generations():
+    """
+    오래된 generation 삭제 (최근 KEEP_GENERATIONS 개 + CURRENT + 이 worker 의 generation 은 유지)
+    - 다음 generation 게시 후 GENERATION_GRACE_SECONDS 가 지나지 않았으면 유지
+      (CURRENT 를 읽고 아직 readers.lock 을 잡지 않은 worker 보호)
+    - 다른 worker 가 열어 둔 generation (readers.lock 공유 잠금) 은 유지 → 이후 저장 때 다시 확인
+    """
+    names = sorted(os.listdir(GENERATIONS_DIR))
+    keep = {generation, _read_current()}
+    now = time.time()
+    for i, name in enumerate(names[:-KEEP_GENERATIONS]):
+        if name in keep:
+            continue
+        replaced_at = _published_at(names[i + 1:])
+        if replaced_at is None or now - replaced_at < GENERATION_GRACE_SECONDS:
+            continue
+        _remove_generation(name)
+
+
+def _published_at(names: list):
+    """names 중 가장 먼저 게시된 generation 의 게시 시각 (manifest mtime), 없으면 None"""
+    times = []
+    for name in names:
         try:
-            with open(METADATA_PATH, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                metadata[:] = data if isinstance(data, list) else []
-            print(f"🟢 Metadata loaded. Total chunks = {len(metadata)}")
-        except:
-            metadata[:] = []
-            print("⚪ Metadata load failed. Starting empty.")
+            times.append(os.path.getmtime(os.path.join(_generation_dir(name), MANIFEST_FILE)))
+        except OSError:
+            continue
+    return min(times) if times else None
+
+
+def _remove_generation(name: str) -> bool:
+    """readers.lock 배타 잠금을 얻은 경우에만 삭제 (사용 중이면 False)"""
+    gen_dir = _generation_dir(name)
+    try:
+        with open(os.path.join(gen_dir, READERS_FILE), "a") as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return False
+            shutil.rmtree(gen_dir)
+    except OSError as e:
+        print(f"⚠ generation 삭제 실패 ({name}): {e}")
+        return False
+    print(f"🟢 generation 삭제: {name}")
+    return True
+
+
+def _migrate_legacy():
+    """단일 파일 구버전 (vector.index + metadata.json) → 첫 generation"""
+    if not os.path.exists(FAISS_PATH):
+        return
+
+    print("🔵 Migrating legacy faiss_db → generation ...")
+    index = faiss.read_index(FAISS_PATH)
+    rows = []
+    if os.path.exists(METADATA_PATH):
+        with open(METADATA_PATH, "r", encoding="utf-8") as f:
+            data = json.load(f)
+            rows = data if isinstance(data, list) else []
+
+    spec = "Flat"
+    if os.path.exists(INDEX_INFO_PATH):
+        with open(INDEX_INFO_PATH, "r", encoding="utf-8") as f:
+            spec = json.load(f).get("spec", "Flat")
+
+    gen_dir = _new_generation_dir()
+    vectors_dst = os.path.join(gen_dir, VECTORS_FILE)
+    legacy_rows = os.path.getsize(VECTORS_PATH) // (4 * index.d) if os.path.exists(VECTORS_PATH) else 0
+    if legacy_rows == index.ntotal:
+        shutil.copyfile(VECTORS_PATH, vectors_dst)
     else:
-        metadata[:] = []
-        print("⚪ No metadata found. Starting fresh.")
+        # float store 없음 → 인덱스에서 복원 (flat 이면 원본과 동일)
+        with open(vectors_dst, "wb") as f:
+            for start in range(0, index.ntotal, ADD_BLOCK):
+                n = min(ADD_BLOCK, index.ntotal - start)
+                f.write(index.reconstruct_n(start, n).astype("float32").tobytes())
+
+    _write_metadata(gen_dir, None, rows)
+    _publish(gen_dir, index, spec, {})
+    print(f"🟢 Migrated {index.ntotal} vectors. 구버전 파일은 그대로 남아 있음 (확인 후 삭제 가능): {FAISS_PATH}, {METADATA_PATH}")
+
+
+def _move_table_rows():
+    """인덱스 metadata 의 가맹점 CSV 행 → merchant_table, 인덱스에서는 제거 (쓰기 lock 안에서 호출)"""
+    rows = [dict(m) for m in metadata if merchant_table.is_table_row(m)]
+    merchant_table.import_rows(rows)
+    if rows:
+        print(f"🔵 Moved {len(rows)} CSV rows → merchant_table")
+        _drop_chunks(merchant_table.is_table_row)
+
+
+def _drop_chunks(predicate) -> int:
+    """
+    predicate(chunk) 가 참인 청크를 뺀 새 generation 게시 (쓰기 lock 안에서 호출)
+    - id 는 0 부터 다시 부여, 인덱스는 남은 float store 로 재구성
+    반환: 제거한 청크 수
+    """
+    keep = [i for i, m in enumerate(metadata) if not predicate(m)]
+    dropped = len(metadata) - len(keep)
+    if faiss_index is None or not dropped:
+        return 0
+
+    dim = faiss_index.d
+    gen_dir = _new_generation_dir()
+    vectors_path = os.path.join(gen_dir, VECTORS_FILE)
+    with open(vectors_path, "wb") as f:
+        for start in range(0, len(keep), ADD_BLOCK):
+            f.write(get_vectors(keep[start:start + ADD_BLOCK]).astype("float32").tobytes())
+    _write_metadata(gen_dir, None, [{**metadata[i], "id": new_id} for new_id, i in enumerate(keep)])
+
+    target = _target_spec(dim, len(keep))
+    store = (
+        np.memmap(vectors_path, dtype="float32", mode="r", shape=(len(keep), dim))
+        if keep else np.zeros((0, dim), dtype="float32")
+    )
+    _publish(gen_dir, build_index(store, target), target, file_versions)
+    print(f"🟢 Dropped {dropped} chunks from index. 남은 청크: {len(keep)} (generation {generation})")
+    return dropped
+
+
+# ===== 인덱스 구성 (압축 모드) =====
+def build_index_spec(mode: str, dim: int, pca_dim: int = None, pq_m: int = None) -> str:
+    """
+    mode → faiss.index_factory 문자열
+    예) "sq8" → "SQ8", "pca+pq" (pca 256) → "PCA256,PQ64x8np"
+    """
+    pca_dim = pca_dim or INDEX_PCA_DIM
+    parts = mode.lower().split("+")
+    base, use_pca = parts[-1], parts[:-1] == ["pca"]
+
+    if base not in ("flat", "sq8", "pq") or (len(parts) > 1 and (not use_pca or base == "flat")):
+        raise ValueError(f"unknown index mode: {mode} (flat | sq8 | pq | pca+sq8 | pca+pq)")
+
+    d = pca_dim if use_pca else dim
+    if base == "flat":
+        spec = "Flat"
+    elif base == "sq8":
+        spec = "SQ8"
+    else:
+        m = pq_m or INDEX_PQ_M or d // 4
+        if d % m:
+            raise ValueError(f"PQ sub-quantizer 수({m})가 차원({d})을 나누지 못함")
+        # np: polysemous 학습 생략 (학습 시간 수십 배, 검색에는 미사용)
+        spec = f"PQ{m}x8np"
+    return f"PCA{pca_dim},{spec}" if use_pca else spec
+
+
+def _target_spec(dim: int, ntotal: int) -> str:
+    if ntotal < COMPRESS_MIN_VECTORS:
+        return "Flat"
+    return build_index_spec(INDEX_MODE, dim)
+
+
+def build_index(vectors: np.ndarray, spec: str):
+    """
+    vectors (memmap 가능) 로 인덱스 생성
+    - 학습은 표본만 사용, 추가는 블록 단위 → 원본 전체를 RAM 에 올리지 않음
+    """
+    n, dim = vectors.shape
+    index = faiss.index_factory(dim, spec, faiss.METRIC_INNER_PRODUCT)
+
+    if not index.is_trained:
+        sample_ids = np.arange(n)
+        if n > TRAIN_SAMPLE:
+            sample_ids = np.sort(np.random.default_rng(0).choice(n, TRAIN_SAMPLE, replace=False))
+        index.train(np.ascontiguousarray(vectors[sample_ids]))
+
+    for start in range(0, n, ADD_BLOCK):
+        index.add(np.ascontiguousarray(vectors[start:start + ADD_BLOCK]))
+    return index
+
+
+def get_vectors(ids) -> np.ndarray:
+    """FAISS id → 원본 float32 벡터 (float store 없으면 인덱스에서 복원)"""
+    ids = np.asarray(ids, dtype="int64")
+    if float_store is not None:
+        return np.asarray(float_store[ids])
+    return faiss_index.reconstruct_batch(ids)
+
+
+def index_stats() -> dict:
+    if faiss_index is None:
+        return {"generation": generation, "spec": index_spec, "ntotal": 0, "dim": 0, "code_bytes": 0, "float_store_bytes": 0, "compression": 1.0}
+
+    code_size = faiss_index.sa_code_size()
+    return {
+        "generation": generation,
+        "spec": index_spec,
+        "ntotal": faiss_index.ntotal,
+        "dim": faiss_index.d,
+        "code_bytes": faiss_index.ntotal * code_size,
+        "float_store_bytes": float_store.nbytes if float_store is not None else 0,
+        "compression": round(faiss_index.d * 4 / code_size, 1),
+    }
+
+
+def _index_collector():
+    stats = index_stats()
+    labels = {"spec": stats["spec"]}
+    return [
+        ("rag_index_vectors", "gauge", labels, stats["ntotal"]),
+        ("rag_index_code_bytes", "gauge", labels, stats["code_bytes"]),
+    ]
+
+
+describe("rag_index_vectors", "gauge", "Vectors in the FAISS index")
+describe("rag_index_code_bytes", "gauge", "In-memory FAISS code bytes (excluding float store)")
+register_collector(_index_collector)
+
 
 # ===== chunk → 임베딩 문자열 변환 (전략 확장 지원) =====
 def extract_text_for_embedding(chunk: dict) -> str:
@@ -95,102 +858,293 @@ def extract_text_for_embedding(chunk: dict) -> str:
 
 # ===== 임베딩 생성 (코사인 지원을 위해 normalize) =====
 def embed_texts(text_list):
-    vecs = embedder.encode(text_list, convert_to_numpy=True, batch_size=16)
+    if embedder is None:
+        raise ComponentNotReady("model")
+    vecs = embedder.encode(text_list)
     vecs = vecs / np.linalg.norm(vecs, axis=1, keepdims=True)
     return vecs.astype("float32")
 
 
+# ===== 질의 임베딩 (동일 질문은 1회만 encode) =====
+# embed_queries 가 일괄 계산한 벡터 → embed_query 캐시 miss 시 encode 대신 사용
+_prefetched = {}
+
+# 동시 요청의 캐시 miss 질의 → 짧게 모아 encode 1회 (embed_scheduler)
+_query_scheduler = EmbedScheduler(lambda texts: embedder.encode(texts))
+
+
+@lru_cache(maxsize=QUERY_CACHE_SIZE)
+def embed_query(query: str) -> np.ndarray:
+    """
+    반환: (1, dim) float32, L2 normalize 완료
+    - 캐시 공유 객체이므로 read-only로 고정
+    """
+    q_vec = _prefetched.pop(query, None)
+    if q_vec is not None:
+        return q_vec
+
+    if embedder is None:
+        raise ComponentNotReady("model")
+    with span("query_embedding"):
+        q_vec = _query_scheduler.encode(query)[None, :]
+    q_vec = q_vec / np.linalg.norm(q_vec)
+    q_vec = q_vec.astype("float32")
+    q_vec.setflags(write=False)
+    return q_vec
+
+
+def embed_queries(queries) -> np.ndarray:
+    """
+    여러 질의를 한 번의 encode 로 임베딩 후 embed_query 캐시에 등록
+    반환: (n, dim) float32 — queries 순서 그대로 (queries 는 1개 이상)
+    """
+    unique = list(dict.fromkeys(queries))
+    with span("query_embedding"):
+        vecs = embed_texts(unique)
+
+    for q, v in zip(unique, vecs):
+        v = v[None, :].copy()
+        v.setflags(write=False)
+        _prefetched[q] = v
+    try:
+        by_query = {q: embed_query(q) for q in unique}
+    finally:
+        for q in unique:
+            _prefetched.pop(q, None)
+    return np.vstack([by_query[q] for q in queries])
+
+
+# ===== 청크 문장 임베딩 (청크 hash 기준 LRU) =====
+# chunk key → (문장 tuple, (문장 수, dim) float32 read-only)
+_sentence_cache: "OrderedDict[str, tuple]" = OrderedDict()
+_sentence_lock = threading.Lock()
+
+
+def embed_chunk_sentences(chunks) -> list:
+    """
+    [(chunk key, 문장 목록 (1개 이상)), ...] → 청크별 문장 벡터 (문장 수, dim), L2 normalize 완료
+    - 같은 청크 (hash) 는 1회만 encode, 캐시 miss 청크 문장만 모아 encode 1회
+    """
+    out = [None] * len(chunks)
+    missing = []
+    with _sentence_lock:
+        for i, (key, sentences) in enumerate(chunks):
+            hit = _sentence_cache.get(key)
+            if hit is not None and hit[0] == tuple(sentences):
+                _sentence_cache.move_to_end(key)
+                out[i] = hit[1]
+            else:
+                missing.append(i)
+
+    if missing:
+        with span("sentence_embedding"):
+            vecs = embed_texts([sent for i in missing for sent in chunks[i][1]])
+        start = 0
+        with _sentence_lock:
+            for i in missing:
+                key, sentences = chunks[i]
+                block = vecs[start:start + len(sentences)]
+                start += len(sentences)
+                block.setflags(write=False)
+                out[i] = block
+                _sentence_cache[key] = (tuple(sentences), block)
+                _sentence_cache.move_to_end(key)
+            while len(_sentence_cache) > SENTENCE_CACHE_CHUNKS:
+                _sentence_cache.popitem(last=False)
+    return out
+
+
 # ===== 벡터 / 메타데이터 저장 =====
 def save_faiss(chunks, file_name: str):
-    global faiss_index, metadata
-
+    """새 generation (이전 + 신규 청크) 작성 후 게시"""
     if not chunks:
         print(f"⚠ 저장할 청크 없음: {file_name}")
         return
 
-    existing_hashes = {m.get("hash", "") for m in metadata}
+    # 가맹점 CSV 행은 임베딩 없이 열 단위 테이블로 (재업로드 = 파일 단위 교체)
+    table_rows = [c for c in chunks if merchant_table.is_table_row(c)]
+    if table_rows:
+        merchant_table.replace_file(file_name, table_rows)
+        chunks = [c for c in chunks if not merchant_table.is_table_row(c)]
+        if not chunks:
+            return
 
-    embedding_texts = []
-    new_meta = []
+    with _write_lock():
+        # 다른 worker 가 먼저 게시한 generation 위에 이어 쓰기
+        refresh_generation(force=True)
 
-    # CSV / 반복 데이터 중복 방지 (index + filename 포함)
-    for idx, c in enumerate(chunks):
-        embed_text = extract_text_for_embedding(c)
-        raw_string = f"{file_name}-{idx}-{embed_text}"
-        h = hashlib.md5(raw_string.encode("utf-8")).hexdigest()
+        # CSV / 반복 데이터 중복 방지 (index + filename 포함) — 저장된 hash 열과 한 번에 비교
+        prepared = []
+        for idx, c in enumerate(chunks):
+            embed_text = extract_text_for_embedding(c)
+            raw_string = f"{file_name}-{idx}-{embed_text}"
+            prepared.append((c, embed_text, hashlib.md5(raw_string.encode("utf-8")).hexdigest()))
+        duplicate = _contains_hashes(_existing_hashes(metadata), np.asarray([_digest(h) for _, _, h in prepared], dtype="S16"))
 
-        if h in existing_hashes:
-            continue
+        embedding_texts = []
+        new_meta = []
 
-        embedding_texts.append(embed_text)
-        new_meta.append({
-            "id": len(metadata) + len(new_meta),
-            "file_name": file_name,
-            **c,
-            "hash": h
-        })
+        for (c, embed_text, h), dup in zip(prepared, duplicate):
+            if dup:
+                continue
 
-    if not embedding_texts:
-        print("⚪ 모든 청크가 중복 — 저장 생략")
-        return
+            embedding_texts.append(embed_text)
+            new_meta.append({
+                "id": len(metadata) + len(new_meta),
+                "file_name": file_name,
+                **c,
+                "hash": h
+            })
 
-    vectors = embed_texts(embedding_texts)
-    dim = vectors.shape[1]
+        if not embedding_texts:
+            print("⚪ 모든 청크가 중복 — 저장 생략")
+            return
 
-    if faiss_index is None or faiss_index.ntotal == 0:
-        index = faiss.IndexFlatIP(dim)
-        index.add(vectors)
-        faiss_index = index
-    else:
-        existing_vectors = faiss_index.reconstruct_n(0, faiss_index.ntotal)
-        index = faiss.IndexFlatIP(dim)
-        index.add(existing_vectors)
-        index.add(vectors)
-        faiss_index = index
+        vectors = embed_texts(embedding_texts)
+        dim = vectors.shape[1]
+        ntotal = len(metadata) + len(new_meta)
+
+        prev_dir = _generation_dir(generation) if generation else None
+        gen_dir = _new_generation_dir()
+
+        # 원본 벡터: 이전 float store + 신규 (재채점 / 재학습용)
+        _copy_append(
+            os.path.join(prev_dir, VECTORS_FILE) if prev_dir else None,
+            os.path.join(gen_dir, VECTORS_FILE),
+            vectors.tobytes()
+        )
+        _write_metadata(gen_dir, prev_dir, new_meta)
 
-    metadata.extend(new_meta)
+        target = _target_spec(dim, ntotal)
+        if faiss_index is None or faiss_index.ntotal == 0 or target != index_spec:
+            # 최초 생성 / 압축 전환 시점 → float store 로 (재)학습
+            store = np.memmap(os.path.join(gen_dir, VECTORS_FILE), dtype="float32", mode="r", shape=(ntotal, dim))
+            index = build_index(store, target)
+        else:
+            # mmap 인덱스는 읽기 전용 → 쓰기 가능한 사본에 추가
+            index = faiss.read_index(os.path.join(prev_dir, INDEX_FILE))
+            index.add(vectors)
 
-    faiss.write_index(faiss_index, FAISS_PATH)
-    with open(METADATA_PATH, "w", encoding="utf-8") as f:
-        json.dump(metadata, f, ensure_ascii=False, indent=2)
+        versions = {**file_versions, file_name: file_versions.get(file_name, 0) + 1}
+        _publish(gen_dir, index, target, versions)
 
-    print(f"🟢 저장 완료 — 파일: {file_name}, 새 청크: {len(new_meta)}, 전체: {faiss_index.ntotal}")
+    print(f"🟢 저장 완료 — 파일: {file_name}, 새 청크: {len(new_meta)}, 전체: {faiss_index.ntotal} (generation {generation})")
 
 
 # ===== 검색 (코사인 기반) =====
 def search_faiss(query, top_k=3, strategy_filter=None, file_name_filter=None):
-    global metadata, faiss_index
+    return search_faiss_batch(embed_query(query), top_k, strategy_filter, file_name_filter)[0]
 
-    if faiss_index is None:
+
+def search_faiss_batch(q_vecs: np.ndarray, top_k=3, strategy_filter=None, file_name_filter=None):
+    """
+    (n, dim) 질의 행렬을 한 번의 index.search 로 검색
+    반환: 질의별 결과 list (search_faiss 와 같은 형식)
+    """
+    # generation 전환과 겹쳐도 한 요청 안에서는 같은 스냅샷 사용
+    index, spec, meta, store = _snapshot
+
+    if index is None:
         raise RuntimeError("FAISS index not initialized!")
 
-    q_vec = embedder.encode([query], convert_to_numpy=True)
-    q_vec = q_vec / np.linalg.norm(q_vec)
-    q_vec = q_vec.astype("float32")
+    # intent 의 strategy / 파일 조건 → ID 필터 검색 (조건에 맞는 행이 없으면 검색 생략)
+    flt = meta.id_filter(strategy_filter, file_name_filter) if isinstance(meta, MappedMetadata) else None
+    if flt is not None and flt.count == 0:
+        return [[] for _ in range(len(q_vecs))]
 
-    D, I = faiss_index.search(q_vec, top_k * 3)
+    rerank = spec != "Flat" and store is not None
+    D = None
+    if flt is not None and spec not in _NO_SELECTOR_SPECS:
+        # 후보가 모두 조건을 만족 → 후처리 필터용 여유분 불필요
+        k = top_k
+        try:
+            with span("faiss_search"):
+                D, I = index.search(q_vecs, k * RERANK_FACTOR if rerank else k, params=flt.params)
+        except RuntimeError:
+            # IndexPQ 등 검색 파라미터 미지원 → 이 spec 은 후처리 필터
+            _NO_SELECTOR_SPECS.add(spec)
 
-    results = []
-    for idx, score in zip(I[0], D[0]):
-        if 0 <= idx < len(metadata):
-            chunk = metadata[idx]
+    # 후처리 필터: 조건 행이 적으면 그 행만 원본으로 정확히 채점 (over-fetch 로 놓치는 후보 없음)
+    if D is None and flt is not None and store is not None and flt.count <= EXACT_FILTER_MAX:
+        with span("exact_filtered_search"):
+            return [
+                _collect(meta, d, i, top_k, strategy_filter, file_name_filter)
+                for d, i in zip(*_search_subset(store, q_vecs, flt.ids, top_k))
+            ]
+
+    post_filter = flt if D is None else None
+    if D is None:
+        k = top_k * 3
+        with span("faiss_search"):
+            D, I = index.search(q_vecs, k * RERANK_FACTOR if rerank else k)
 
-            # strategy 필터
-            if strategy_filter:
-                if chunk.get("strategy") != strategy_filter:
-                    continue
+    out = []
+    for row in range(len(q_vecs)):
+        d, i = D[row:row + 1], I[row:row + 1]
+        if rerank:
+            # 후처리 필터는 재채점 전에 적용 → 조건에 맞는 후보를 상위 k 자르기로 버리지 않음
+            with span("rerank"):
+                d, i = _rerank(store, q_vecs[row:row + 1], i[0], k, post_filter)
+        out.append(_collect(meta, d[0], i[0], top_k, strategy_filter, file_name_filter))
+    return out
 
-            # 추가된 문서(file_name) 필터
-            if file_name_filter:
-                if chunk.get("file_name") not in file_name_filter:
-                    continue
 
-            results.append({**chunk, "score": float(score)})
+def _search_subset(store: np.ndarray, q_vecs: np.ndarray, ids: np.ndarray, k: int):
+    """ids 행만 원본 float32 로 cosine 전수 계산 → 질의별 (점수, id) 상위 k"""
+    exact = (np.asarray(store[ids]) @ q_vecs.T).T
+    order = np.argsort(-exact, axis=1)[:, :k]
+    return np.take_along_axis(exact, order, axis=1), ids[order]
 
-        if len(results) >= top_k:
-            break
 
+# 검색 파라미터(IDSelector) 를 지원하지 않는 index spec
+_NO_SELECTOR_SPECS = set()
+
+
+def _collect(meta, scores, ids, top_k, strategy_filter, file_name_filter):
+    """후보 → strategy / 파일 조건은 ID 필터 bitmap 으로 확인, dict 복사는 최종 top_k 행만"""
+    # generation 당 1회 계산된 ID 필터 재사용
+    flt = meta.id_filter(strategy_filter or None, file_name_filter)
+    n = len(meta)
+    results = []
+    for idx, score in zip(ids.tolist(), scores.tolist()):
+        if 0 <= idx < n and (flt is None or idx in flt):
+            chunk = meta.materialize(idx)
+            chunk["score"] = score
+            results.append(chunk)
+            if len(results) >= top_k:
+                break
     return results
 
 
+def _existing_hashes(meta) -> np.ndarray:
+    """저장된 청크 hash 열 (16 byte) — 열 파일이라 metadata decode 없음"""
+    return meta.columns.hashes if isinstance(meta, MappedMetadata) else np.empty(0, dtype="S16")
+
+
+def _contains_hashes(existing: np.ndarray, new: np.ndarray) -> np.ndarray:
+    """new 의 각 hash 가 existing 에 있는지 — 앞 8 byte 정수로 정렬 / 이진 탐색 후 후보만 16 byte 비교"""
+    found = np.zeros(len(new), dtype=bool)
+    if not len(existing) or not len(new):
+        return found
+
+    def head(h: np.ndarray) -> np.ndarray:
+        return np.ascontiguousarray(h, dtype="S16").view("<u8")[::2]
+
+    heads = head(existing)
+    order = np.argsort(heads)
+    sorted_heads, new_heads = heads[order], head(new)
+    lo = np.searchsorted(sorted_heads, new_heads, "left")
+    hi = np.searchsorted(sorted_heads, new_heads, "right")
+    for j in np.flatnonzero(hi > lo):
+        found[j] = new[j] in existing[order[lo[j]:hi[j]]]
+    return found
+
 
+def _rerank(store: np.ndarray, q_vec: np.ndarray, ids: np.ndarray, k: int, flt: "IdFilter" = None):
+    """압축 인덱스 후보 (flt 가 있으면 조건에 맞는 것만) → 원본 float32 로 정확한 cosine 재계산 후 상위 k"""
+    ids = ids[ids >= 0]
+    if flt is not None:
+        ids = np.asarray([i for i in ids.tolist() if i in flt], dtype="int64")
+    exact = np.asarray(store[ids]) @ q_vec[0]
+    order = np.argsort(-exact)[:k]
+    return exact[order][None, :], ids[order][None, :]